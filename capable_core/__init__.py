@@ -27,7 +27,23 @@ CLI:
 __version__ = "0.2.1"
 __author__ = "CapAble Core Foundry Team"
 
-from capable_core.flows.nightwatch import NightwatchWorkflow, WorkflowConfig, WorkflowResult
+from typing import Any
+
+
+# Workflow classes are resolved on first access (PEP 562) so that lightweight
+# entry points such as `capable-run --help` don't load the ADK/genai stack.
+_LAZY_WORKFLOW_EXPORTS = frozenset({"NightwatchWorkflow", "WorkflowConfig", "WorkflowResult"})
+
+
+def __getattr__(name: str) -> Any:
+    """Resolve workflow exports from capable_core.flows.nightwatch on first access."""
+    if name not in _LAZY_WORKFLOW_EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from capable_core.flows import nightwatch
+
+    value = getattr(nightwatch, name)
+    globals()[name] = value
+    return value
 
 
 __all__ = [
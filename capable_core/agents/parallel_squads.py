@@ -48,6 +48,8 @@ from capable_core.tools.github_tools import (
     get_pr_details,
     get_repo_secrets_list,
     get_repo_variables,
+    get_secrets_for_repos,
+    get_variables_for_repos,
     push_files_to_branch,
 )
 from capable_core.tools.sandbox_tools import (
@@ -410,6 +412,7 @@ You have {max_workers} Issue Workers available. Each worker is a complete squad:
 - `get_env_template(repo_name, ref)` - Read .env.example to see what env vars are needed
 - `get_repo_secrets_list(repo_name)` - List available GitHub secrets (names only, values are never exposed)
 - `get_repo_variables(repo_name)` - List GitHub variables with their values
+- `get_secrets_for_repos(repo_names)` / `get_variables_for_repos(repo_names)` - Same, for several repos in one call
 - `build_env_from_github(repo_name, ref)` - Build env config mapping .env.example to available secrets/variables
 
 **Use these ONCE at the start** to build an env_config that workers need for running tests!
@@ -721,6 +724,8 @@ def create_parallel_tech_lead(
         # Environment & secrets discovery
         get_repo_secrets_list,
         get_repo_variables,
+        get_secrets_for_repos,
+        get_variables_for_repos,
         get_env_template,
         build_env_from_github,
     ]
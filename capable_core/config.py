@@ -108,6 +108,11 @@ class SandboxConfig(BaseSettings):
     timeout: int = Field(300, description="Container timeout in seconds")
     memory_limit: str = Field("512m", description="Container memory limit")
     cpu_limit: float = Field(1.0, description="Container CPU limit")
+    use_bind_mount: bool = Field(False, description="Share code with containers through a host directory instead of a TAR upload")
+    setup_image_cache_size: int = Field(20, description="Images with setup commands baked in to keep (0 disables baking)")
+    prewarm_images: str = Field(
+        "python:3.12-slim,node:22-slim", description="Comma-separated images to pull in the background when a live run starts"
+    )
 
 
 class Settings(BaseSettings):
@@ -28,7 +28,6 @@ import structlog
 from dotenv import load_dotenv
 
 from capable_core.config import settings, validate_environment
-from capable_core.flows.nightwatch import NightwatchWorkflow, WorkflowConfig
 
 
 load_dotenv()
@@ -76,6 +75,9 @@ def run_nightwatch(
     Returns:
         Dict with execution results.
     """
+    # Imported here so `capable-run --help` never loads the agent stack
+    from capable_core.flows.nightwatch import NightwatchWorkflow, WorkflowConfig
+
     log.info("nightwatch_starting", repo=repo_name, issue=issue_number, dry_run=dry_run)
 
     config = WorkflowConfig(
@@ -93,6 +95,10 @@ def run_nightwatch(
         log.info("dry_run_mode", mission=mission)
         return {"status": "dry_run", "mission": mission, "would_execute": True}
 
+    # Pull the common sandbox images while the agents are still planning
+    from capable_core.tools.sandbox_tools import prewarm_sandbox_images
+
+    prewarm_sandbox_images()
     result = workflow.execute(issue_number=issue_number)
 
     if result.success:
@@ -117,12 +123,7 @@ def run_nightwatch(
 # =============================================================================
 
 
-def main() -> None:
-    """CLI entry point."""
-    parser = argparse.ArgumentParser(
-        description="CapAble core - Nightwatch Autonomous Development System",
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
+_EPILOG = """
 Examples:
   capable-run --repo "my-org/backend"
       Scan for assigned issues and fix the highest priority one
@@ -137,8 +138,23 @@ Environment Variables:
   GITHUB_TOKEN         GitHub Personal Access Token (required)
   GOOGLE_API_KEY       Google AI API Key (required unless using Vertex AI)
   GOOGLE_PROJECT_ID    GCP Project ID (for Vertex AI)
-""",
-    )
+"""
+
+
+def _build_parser(with_help: bool) -> argparse.ArgumentParser:
+    """Build the CLI argument parser.
+
+    The description, epilog and -h/--help action are only set up when help was
+    actually requested; regular runs get a minimal parser.
+    """
+    if with_help:
+        parser = argparse.ArgumentParser(
+            description="CapAble core - Nightwatch Autonomous Development System",
+            formatter_class=argparse.RawDescriptionHelpFormatter,
+            epilog=_EPILOG,
+        )
+    else:
+        parser = argparse.ArgumentParser(add_help=False)
 
     parser.add_argument("--repo", "-r", type=str, required=True, help="Target GitHub repository (owner/repo format)")
 
@@ -148,6 +164,37 @@ Environment Variables:
 
     parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose logging")
 
+    return parser
+
+
+def _wants_help(parser: argparse.ArgumentParser, argv: list[str]) -> bool:
+    """Whether argv asks for help the way argparse would read it.
+
+    Covers abbreviations of --help (``--he``) and -h inside a cluster of short
+    flags (``-vh``), which the minimal parser would otherwise reject as unknown.
+    """
+    for arg in argv:
+        if arg == "--":
+            break
+        if arg.startswith("--"):
+            if len(arg) > 2 and "--help".startswith(arg):
+                return True
+        elif arg.startswith("-"):
+            for char in arg[1:]:
+                if char == "h":
+                    return True
+                action = parser._option_string_actions.get(f"-{char}")
+                if action is None or action.nargs != 0:
+                    break  # Unknown, or the rest of the cluster is this flag's value
+    return False
+
+
+def main() -> None:
+    """CLI entry point."""
+    parser = _build_parser(with_help=False)
+    if _wants_help(parser, sys.argv[1:]):
+        parser = _build_parser(with_help=True)
+
     args = parser.parse_args()
 
     # Validate environment
@@ -1,34 +1,61 @@
 """CapeAble Core Foundry Tools Package.
 
 Provides tools for GitHub integration, CI monitoring, and sandbox execution.
+
+Tools are re-exported lazily (PEP 562) so that importing a single tool does not
+pull in PyGithub, Docker and structlog for the whole package.
 """
 
-from capable_core.tools.ci_tools import (
-    get_workflow_summary,
-    monitor_ci_for_pr,
-    trigger_workflow,
-)
-from capable_core.tools.github_tools import (
-    add_issue_comment,
-    add_pr_comment,
-    create_pr_with_changes,
-    get_ci_status,
-    get_directory_tree,
-    get_file_content,
-    get_issue_content,
-    get_my_assigned_issues,
-    get_pr_details,
-    update_pr_with_changes,
-    wait_for_ci_completion,
-)
-from capable_core.tools.sandbox_tools import (
-    lint_code,
-    run_command_on_branch,
-    run_mutation_tests,
-    run_tests_in_sandbox,
-    run_tests_with_coverage,
-    validate_syntax,
-)
+import importlib
+from typing import Any
+
+
+_CI_TOOLS = "capable_core.tools.ci_tools"
+_GITHUB_TOOLS = "capable_core.tools.github_tools"
+_SANDBOX_TOOLS = "capable_core.tools.sandbox_tools"
+
+# Public name -> module that defines it
+_LAZY: dict[str, str] = {
+    # GitHub
+    "add_issue_comment": _GITHUB_TOOLS,
+    "add_pr_comment": _GITHUB_TOOLS,
+    "create_pr_with_changes": _GITHUB_TOOLS,
+    "get_ci_status": _GITHUB_TOOLS,
+    "get_directory_tree": _GITHUB_TOOLS,
+    "get_file_content": _GITHUB_TOOLS,
+    "get_issue_content": _GITHUB_TOOLS,
+    "get_my_assigned_issues": _GITHUB_TOOLS,
+    "get_pr_details": _GITHUB_TOOLS,
+    "update_pr_with_changes": _GITHUB_TOOLS,
+    "wait_for_ci_completion": _GITHUB_TOOLS,
+    # CI
+    "get_workflow_summary": _CI_TOOLS,
+    "monitor_ci_for_pr": _CI_TOOLS,
+    "trigger_workflow": _CI_TOOLS,
+    # Sandbox
+    "lint_code": _SANDBOX_TOOLS,
+    "run_command_on_branch": _SANDBOX_TOOLS,
+    "run_mutation_tests": _SANDBOX_TOOLS,
+    "run_quality_gate": _SANDBOX_TOOLS,
+    "run_tests_in_sandbox": _SANDBOX_TOOLS,
+    "run_tests_with_coverage": _SANDBOX_TOOLS,
+    "validate_syntax": _SANDBOX_TOOLS,
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Resolve a tool from its defining module on first access."""
+    module_name = _LAZY.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value  # Cache so later lookups skip __getattr__
+    return value
+
+
+def __dir__() -> list[str]:
+    """List module attributes including the lazily exported tools."""
+    return sorted({*globals(), *_LAZY})
 
 
 __all__ = [
@@ -48,6 +75,7 @@ __all__ = [
     "monitor_ci_for_pr",
     "run_command_on_branch",
     "run_mutation_tests",
+    "run_quality_gate",
     # Sandbox
     "run_tests_in_sandbox",
     "run_tests_with_coverage",
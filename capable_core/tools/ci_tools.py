@@ -3,19 +3,134 @@
 Provides specialized tools for monitoring GitHub Actions and other CI pipelines.
 """
 
+from __future__ import annotations
+
+import functools
+import logging
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any
+from typing import TYPE_CHECKING, Any
+
+
+if TYPE_CHECKING:
+    from capable_core.tools.github_tools import CIStatus
+
+
+# Max concurrent run.jobs() requests when collecting failed jobs
+_MAX_JOB_FETCH_WORKERS = 8
+
+# Result messages returned by monitor_ci_for_pr. The agents key off the
+# CI_STATUS lines, so keep them stable.
+_PASSED_TEMPLATE = """
+## CI Pipeline Result ✅
+
+**CI_STATUS: PASSED**
+**PR:** #{pr_number}
+**Repository:** {repo_name}
+**Duration:** {duration}s
+
+### All Checks Passed ✅
+
+---
+**CI_STATUS: PASSED**
+**REQUIRED_ACTION:** CI is green! Report back to Tech Lead with the successful PR.
+
+DEVELOPMENT_COMPLETE:
+- PR: #{pr_number}
+- Repository: {repo_name}
+- CI: PASSED
+"""
+
+_FAILED_TEMPLATE = """
+## CI Pipeline Result ❌
+
+**CI_STATUS: FAILED**
+**PR:** #{pr_number}
+**Repository:** {repo_name}
+**Duration:** {duration}s
+
+### Failed Jobs
+{failed_jobs_block}
+
+### Error Logs
+```
+{logs}
+```
+
+---
+**CI_STATUS: FAILED**
+**REQUIRED_ACTION:** Fix the errors above and push a new commit to the PR branch.
+**DO NOT** proceed to QA verification until CI passes.
+"""
+
+_CANCELLED_TEMPLATE = """
+## CI Pipeline Result ⚠️
+
+**CI_STATUS: CANCELLED**
+**PR:** #{pr_number}
+**Duration:** {duration}s
+
+CI was cancelled. Check https://github.com/{repo_name}/pull/{pr_number}/checks
+"""
+
+_TIMEOUT_TEMPLATE = """
+## CI Pipeline Result ⏱️
+
+**CI_STATUS: TIMEOUT**
+**PR:** #{pr_number}
+**Repository:** {repo_name}
+**Last Status:** {status}
+**Waited:** {waited}s
+
+### CI Timeout ⏱️
+
+---
+**CI_STATUS: TIMEOUT**
+**REQUIRED_ACTION:** CI did not complete within {timeout_seconds} seconds.
+Check GitHub Actions manually at: https://github.com/{repo_name}/pull/{pr_number}/checks
+
+You can either:
+1. Wait longer and call `monitor_ci_for_pr` again with a higher timeout
+2. Check the GitHub Actions page directly for status
+"""
+
+_STOPPED_TEMPLATE = """
+## CI Pipeline Result ⏹️
+
+**CI_STATUS: STOPPED**
+**PR:** #{pr_number}
+**Repository:** {repo_name}
+**Last Status:** {status}
+
+CI monitoring was stopped before the pipeline finished.
+Check https://github.com/{repo_name}/pull/{pr_number}/checks
+"""
+
+
+# NOTE: github_tools (PyGithub) and structlog are imported at call-site so that
+# importing this module stays cheap for callers that never touch the CI tools.
+
+
+@functools.cache
+def _get_log() -> Any:
+    """Return the module logger, importing structlog on first use."""
+    import structlog
 
-import structlog
+    return structlog.get_logger()
 
-from capable_core.tools.github_tools import CIStatus, _get_client, get_ci_failure_logs, get_ci_status
 
+def _info_enabled() -> bool:
+    """Whether INFO events from this module would actually be emitted."""
+    import structlog
 
-log = structlog.get_logger()
+    if not structlog.is_configured():
+        return True  # structlog's default logger prints every level
+    return logging.getLogger(__name__).isEnabledFor(logging.INFO)
 
 
-@dataclass
+@dataclass(slots=True)
 class CIRunResult:
     """Structured CI run result."""
 
@@ -44,29 +159,49 @@ class CIMonitor:
         self.repo_name = repo_name
         self.timeout = timeout
         self.poll_interval = poll_interval
+
+        from capable_core.tools.github_tools import _get_client
+
         self.client = _get_client()
+        # Resolve the repo once; monitor_pr and _extract_failed_jobs reuse it
+        self.repo = self.client.get_repo(repo_name)
 
-    def monitor_pr(self, pr_number: int) -> CIRunResult:
+    def monitor_pr(self, pr_number: int, stop: threading.Event | None = None) -> CIRunResult:
         """
         Monitors CI for a PR until completion or timeout.
 
         Args:
             pr_number: The PR number to monitor.
+            stop: Optional event; setting it aborts monitoring at the next wait.
 
         Returns:
             CIRunResult with status and details.
         """
-        repo = self.client.get_repo(self.repo_name)
+        from capable_core.tools.github_tools import CIStatus, _poll_ci_status, get_ci_failure_logs, get_ci_status
+
+        repo = self.repo
         pr = repo.get_pull(pr_number)
         commit_sha = pr.head.sha
 
-        start_time = time.time()
-
-        while time.time() - start_time < self.timeout:
-            status = get_ci_status(self.repo_name, commit_sha)
+        stop = stop or threading.Event()
+        start_time = time.monotonic()
+        deadline = start_time + self.timeout
+        status = None
+        etag = None
+        # Adaptive backoff: poll quickly at first, then back off to poll_interval
+        interval = min(2.0, self.poll_interval)
+
+        while time.monotonic() < deadline and not stop.is_set():
+            try:
+                new_status, etag = _poll_ci_status(repo, self.repo_name, commit_sha, etag)
+                if new_status is not None:
+                    status = new_status
+            except Exception:
+                status = get_ci_status(self.repo_name, commit_sha)
+                etag = None
 
             if status in [CIStatus.SUCCESS.value, CIStatus.FAILURE.value, CIStatus.CANCELLED.value]:
-                duration = int(time.time() - start_time)
+                duration = int(time.monotonic() - start_time)
 
                 if status == CIStatus.FAILURE.value:
                     logs = get_ci_failure_logs(self.repo_name, commit_sha)
@@ -76,22 +211,31 @@ class CIMonitor:
 
                 return CIRunResult(status=CIStatus.SUCCESS, duration_seconds=duration, failed_jobs=[], error_logs="")
 
-            time.sleep(self.poll_interval)
+            stop.wait(min(interval, max(0.0, deadline - time.monotonic())))
+            interval = min(self.poll_interval, interval * 1.5)
 
+        if stop.is_set():
+            return CIRunResult(
+                status=CIStatus.UNKNOWN, duration_seconds=int(time.monotonic() - start_time), failed_jobs=[], error_logs="CI monitoring stopped"
+            )
         return CIRunResult(status=CIStatus.UNKNOWN, duration_seconds=self.timeout, failed_jobs=[], error_logs="CI timed out")
 
     def _extract_failed_jobs(self, commit_sha: str) -> list[str]:
         """Extract list of failed job names."""
-        repo = self.client.get_repo(self.repo_name)
-        failed = []
+        repo = self.repo
+        failed: list[str] = []
 
         try:
-            runs = repo.get_workflow_runs(head_sha=commit_sha)
-            for run in runs:
-                if run.conclusion == "failure":
-                    for job in run.jobs():
-                        if job.conclusion == "failure":
-                            failed.append(f"{run.name}/{job.name}")
+            # Let the API filter to failed runs rather than paging through every run of the commit
+            failed_runs = [run for run in repo.get_workflow_runs(head_sha=commit_sha, status="failure") if run.conclusion == "failure"]
+            if not failed_runs:
+                return failed
+
+            # One jobs request per failed run - fan them out instead of paying N serial round-trips
+            with ThreadPoolExecutor(max_workers=min(_MAX_JOB_FETCH_WORKERS, len(failed_runs))) as executor:
+                jobs_per_run = executor.map(lambda run: (run.name, list(run.jobs())), failed_runs)
+                for run_name, jobs in jobs_per_run:
+                    failed.extend(f"{run_name}/{job.name}" for job in jobs if job.conclusion == "failure")
         except Exception:
             pass
 
@@ -114,140 +258,100 @@ def monitor_ci_for_pr(repo_name: str, pr_number: int, timeout_seconds: int = 600
     Returns:
         CI result with clear CI_STATUS indicator (PASSED/FAILED/TIMEOUT).
     """
-    from capable_core.tools.github_tools import CIStatus, _get_client, get_ci_failure_logs, get_ci_status
+    return _monitor_ci_for_pr(repo_name, pr_number, timeout_seconds, poll_interval)
+
+
+def _monitor_ci_for_pr(
+    repo_name: str,
+    pr_number: int,
+    timeout_seconds: int = 600,
+    poll_interval: int = 15,
+    stop: threading.Event | None = None,
+) -> str:
+    """Polling loop behind `monitor_ci_for_pr`.
+
+    Kept separate so programmatic callers can pass ``stop`` to cancel the wait;
+    the agent-facing tool signature must stay JSON-schema friendly.
+    """
+    # Single import for everything this tool needs (github_tools is loaded lazily, see module note)
+    from capable_core.tools.github_tools import CIStatus, _failed_check_run_names, _get_client, _poll_ci_status, get_ci_failure_logs
 
     client = _get_client()
     repo = client.get_repo(repo_name)
     pr = repo.get_pull(pr_number)
     commit_sha = pr.head.sha
 
-    start_time = time.time()
+    stop = stop or threading.Event()
+    start_time = time.monotonic()
+    deadline = start_time + timeout_seconds
     check_count = 0
-
+    status = None
+    etag = None
+    # Adaptive backoff: poll quickly at first to catch short CI runs, then back
+    # off to poll_interval. ETag-conditional requests make unchanged polls cheap.
+    interval = min(2.0, poll_interval)
+
+    log = _get_log()
+    # Checked once per run so quiet configurations skip building per-poll events
+    info_enabled = _info_enabled()
     log.info("ci_monitor_started", repo=repo_name, pr=pr_number, sha=commit_sha[:8])
 
     # Terminal states that indicate CI is done
     terminal_states = {CIStatus.SUCCESS.value, CIStatus.FAILURE.value, CIStatus.CANCELLED.value}
 
-    while True:
-        elapsed = time.time() - start_time
+    while not stop.is_set():
+        elapsed = time.monotonic() - start_time
         check_count += 1
 
         # Get current status with retry on connection errors
         try:
-            status = get_ci_status(repo_name, commit_sha)
-            log.info("ci_status_check", check=check_count, status=status, elapsed=f"{elapsed:.0f}s")
+            new_status, etag = _poll_ci_status(repo, repo_name, commit_sha, etag)
+            if new_status is not None:
+                status = new_status
+            if info_enabled:
+                log.info("ci_status_check", check=check_count, status=status, changed=new_status is not None, elapsed=int(elapsed))
         except Exception as e:
             # Handle connection errors gracefully - just log and retry
-            log.warning("ci_status_check_failed", check=check_count, error=str(e), elapsed=f"{elapsed:.0f}s")
+            log.warning("ci_status_check_failed", check=check_count, error=str(e), elapsed=int(elapsed))
             status = None  # Will retry on next iteration
+            etag = None  # Force a full fetch on retry
 
         # Check if CI completed (only if we got a valid status)
         if status and status in terminal_states:
             duration = int(elapsed)
 
             if status == CIStatus.SUCCESS.value:
-                return f"""
-## CI Pipeline Result ✅
-
-**CI_STATUS: PASSED**
-**PR:** #{pr_number}
-**Repository:** {repo_name}
-**Duration:** {duration}s
-
-### All Checks Passed ✅
-
----
-**CI_STATUS: PASSED**
-**REQUIRED_ACTION:** CI is green! Report back to Tech Lead with the successful PR.
-
-DEVELOPMENT_COMPLETE:
-- PR: #{pr_number}
-- Repository: {repo_name}
-- CI: PASSED
-"""
+                return _PASSED_TEMPLATE.format(pr_number=pr_number, repo_name=repo_name, duration=duration)
 
             elif status == CIStatus.FAILURE.value:
                 logs = get_ci_failure_logs(repo_name, commit_sha)
-                failed_jobs = _extract_failed_jobs_for_sha(repo_name, commit_sha)
-
-                return f"""
-## CI Pipeline Result ❌
-
-**CI_STATUS: FAILED**
-**PR:** #{pr_number}
-**Repository:** {repo_name}
-**Duration:** {duration}s
-
-### Failed Jobs
-{chr(10).join(f"- {job}" for job in failed_jobs) or "Unknown"}
-
-### Error Logs
-```
-{logs[:2000]}
-```
-
----
-**CI_STATUS: FAILED**
-**REQUIRED_ACTION:** Fix the errors above and push a new commit to the PR branch.
-**DO NOT** proceed to QA verification until CI passes.
-"""
+                # The poll above stored the check-runs ETag, so this is usually a free 304
+                try:
+                    failed_jobs = _failed_check_run_names(repo, commit_sha)
+                except Exception as e:
+                    log.warning("failed_to_extract_failed_jobs", repo=repo_name, sha=commit_sha, error=str(e))
+                    failed_jobs = []
+                failed_jobs_block = "\n".join(f"- {job}" for job in failed_jobs) or "Unknown"
+
+                return _FAILED_TEMPLATE.format(
+                    pr_number=pr_number, repo_name=repo_name, duration=duration, failed_jobs_block=failed_jobs_block, logs=logs[:2000]
+                )
 
             else:  # CANCELLED
-                return f"""
-## CI Pipeline Result ⚠️
-
-**CI_STATUS: CANCELLED**
-**PR:** #{pr_number}
-**Duration:** {duration}s
-
-CI was cancelled. Check https://github.com/{repo_name}/pull/{pr_number}/checks
-"""
+                return _CANCELLED_TEMPLATE.format(pr_number=pr_number, repo_name=repo_name, duration=duration)
 
         # Check timeout
-        if elapsed >= timeout_seconds:
-            return f"""
-## CI Pipeline Result ⏱️
-
-**CI_STATUS: TIMEOUT**
-**PR:** #{pr_number}
-**Repository:** {repo_name}
-**Last Status:** {status}
-**Waited:** {int(elapsed)}s
-
-### CI Timeout ⏱️
-
----
-**CI_STATUS: TIMEOUT**
-**REQUIRED_ACTION:** CI did not complete within {timeout_seconds} seconds.
-Check GitHub Actions manually at: https://github.com/{repo_name}/pull/{pr_number}/checks
-
-You can either:
-1. Wait longer and call `monitor_ci_for_pr` again with a higher timeout
-2. Check the GitHub Actions page directly for status
-"""
-
-        # Wait before next check (shorter interval for faster response)
-        time.sleep(poll_interval)
-
-
-def _extract_failed_jobs_for_sha(repo_name: str, commit_sha: str) -> list[str]:
-    """Extract list of failed job names for a commit."""
-    client = _get_client()
-    repo = client.get_repo(repo_name)
-    failed = []
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return _TIMEOUT_TEMPLATE.format(
+                pr_number=pr_number, repo_name=repo_name, status=status, waited=int(elapsed), timeout_seconds=timeout_seconds
+            )
 
-    try:
-        runs = repo.get_workflow_runs(head_sha=commit_sha)
-        for run in runs:
-            if run.conclusion == "failure":
-                for job in run.jobs():
-                    if job.conclusion == "failure":
-                        failed.append(f"{run.name}/{job.name}")
-    except Exception as e:
-        log.warning("failed_to_extract_failed_jobs", repo=repo_name, sha=commit_sha, error=str(e))
+        # Wait before next check, backing off towards poll_interval (returns early if stopped)
+        stop.wait(min(interval, remaining))
+        interval = min(poll_interval, interval * 1.5)
 
-    return failed
+    return _STOPPED_TEMPLATE.format(pr_number=pr_number, repo_name=repo_name, status=status)
 
 
 def get_workflow_summary(repo_name: str) -> str:
@@ -260,20 +364,23 @@ def get_workflow_summary(repo_name: str) -> str:
     Returns:
         Summary of recent CI runs.
     """
+    from capable_core.tools.github_tools import _get_client
+
     client = _get_client()
     repo = client.get_repo(repo_name)
 
     try:
         runs = repo.get_workflow_runs()
 
-        summary = "## Recent CI Runs\n\n"
+        parts = ["## Recent CI Runs\n\n"]
 
-        for run in list(runs)[:10]:
+        # Only the first page is needed - list(runs) would page through the whole history
+        for run in runs.get_page(0)[:10]:
             status_icon = "✅" if run.conclusion == "success" else "❌" if run.conclusion == "failure" else "🔄"
-            summary += f"{status_icon} **{run.name}** (#{run.run_number}): {run.conclusion or run.status}\n"
-            summary += f"   Branch: {run.head_branch} | Commit: {run.head_sha[:7]}\n\n"
+            parts.append(f"{status_icon} **{run.name}** (#{run.run_number}): {run.conclusion or run.status}\n")
+            parts.append(f"   Branch: {run.head_branch} | Commit: {run.head_sha[:7]}\n\n")
 
-        return summary
+        return "".join(parts)
     except Exception as e:
         return f"Error fetching workflows: {e!s}"
 
@@ -290,12 +397,16 @@ def trigger_workflow(repo_name: str, workflow_id: str, ref: str = "main") -> str
     Returns:
         Success or error message.
     """
+    from capable_core.tools.github_tools import _forget_ci_status, _get_client
+
     client = _get_client()
     repo = client.get_repo(repo_name)
 
     try:
         workflow = repo.get_workflow(workflow_id)
         workflow.create_dispatch(ref)
+        # The new run may be on an already finished SHA - don't serve its old result
+        _forget_ci_status(repo, repo_name)
         return f"✅ Workflow '{workflow_id}' triggered on branch '{ref}'."
     except Exception as e:
         return f"❌ Failed to trigger workflow: {e!s}"
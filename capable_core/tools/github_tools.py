@@ -4,20 +4,56 @@ GitHub Tools for the CapAble-Core multi-agent system.
 Provides comprehensive GitHub integration for issues, PRs, files, and CI monitoring.
 """
 
+import base64
+import functools
+import hashlib
+import io
+import json
 import os
+import random
+import re
 import time
+import urllib.parse
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import asdict, dataclass, field
-from datetime import datetime
 from enum import Enum
-from typing import Any, Optional
+from typing import Any, TypeVar
 
 import structlog
-from github import Auth, Github, GithubException
+from github import Auth, Github, GithubException, GithubObject, GithubRetry
 from github.Repository import Repository
 
 
 log = structlog.get_logger()
 
+# Issue labels that mark an issue as high priority
+_HIGH_PRIORITY_LABELS = frozenset({"critical", "urgent", "P0", "P1"})
+
+# Max repositories kept in GitHubClient's repo LRU
+_REPO_CACHE_SIZE = 64
+
+# Keep-alive pool size; covers CIMonitor's concurrent job fetches with headroom
+_HTTP_POOL_SIZE = 16
+
+# Idempotent reads are retried with backoff on throttling and transient 5xx.
+# GithubRetry also honours Retry-After on rate-limited 403s.
+_HTTP_RETRY = GithubRetry(total=5, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504], allowed_methods={"GET"})
+
+# Concurrent blob uploads per commit - GitHub advises keeping concurrency low
+# to stay clear of its secondary rate limits
+_MAX_BLOB_UPLOAD_WORKERS = 8
+
+# Attempts per blob upload when GitHub throttles (403/429)
+_BLOB_UPLOAD_ATTEMPTS = 4
+
+# (repo API URL, branch) -> (commit_sha, tree_sha) of the branch head as this
+# process last created or moved it; lets a push skip the ref and commit reads.
+# Keyed on repo.url, which a lazy repo knows without fetching its metadata
+_BRANCH_TIP_CACHE: dict[tuple[str, str], tuple[str, str]] = {}
+
+_T = TypeVar("_T")
+
 
 class PRStatus(Enum):
     """Pull Request status states."""
@@ -40,7 +76,7 @@ class CIStatus(Enum):
     UNKNOWN = "unknown"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class IssueData:
     """Structured issue data for agent consumption."""
 
@@ -54,18 +90,46 @@ class IssueData:
 
     def to_prompt(self) -> str:
         """Format issue for LLM consumption."""
-        return f"""
-## Issue #{self.number}: {self.title}
-**Priority:** {self.priority}
-**Labels:** {", ".join(self.labels) or "None"}
-**Created:** {self.created_at}
+        return _format_issue(self.number, self.title, self.body, tuple(self.labels), self.created_at, self.priority)
+
+
+@functools.lru_cache(maxsize=256)
+def _format_issue(number: int, title: str, body: str, labels: tuple[str, ...], created_at: str, priority: str) -> str:
+    """Render an issue prompt (memoized - issues are re-rendered across inbox scans)."""
+    return f"""
+## Issue #{number}: {title}
+**Priority:** {priority}
+**Labels:** {", ".join(labels) or "None"}
+**Created:** {created_at}
 
 ### Description
-{self.body or "No description provided."}
+{body or "No description provided."}
 """
 
 
-@dataclass
+def _derive_priority(labels: list[str]) -> str:
+    """Derive issue priority from its labels."""
+    return "high" if _HIGH_PRIORITY_LABELS.intersection(labels) else "normal"
+
+
+def _issue_list_fields(issue: Any) -> tuple[list[str], list[str], str]:
+    """Read labels, assignee logins and creation time from an issue's list payload.
+
+    Going through the raw JSON avoids PyGithub lazily completing partially
+    hydrated label/user objects with extra GETs.
+    """
+    try:
+        raw = issue._rawData  # Not .raw_data, which would force a completing GET
+        return (
+            [label["name"] for label in raw.get("labels") or []],
+            [assignee["login"] for assignee in raw.get("assignees") or []],
+            raw["created_at"],
+        )
+    except (AttributeError, KeyError, TypeError):
+        return [label.name for label in issue.labels], [a.login for a in issue.assignees], issue.created_at.isoformat()
+
+
+@dataclass(slots=True)
 class PRData:
     """Structured PR data for agent consumption."""
 
@@ -88,49 +152,56 @@ class PRData:
 
 
 class GitHubClient:
-    """Singleton GitHub client with connection pooling and error handling."""
-
-    _instance: Optional["GitHubClient"] = None
-
-    def __new__(cls) -> "GitHubClient":
-        """Ensures only one instance of GitHubClient exists (singleton pattern).
+    """GitHub client with connection pooling and error handling.
 
-        Returns:
-            GitHubClient: _description_
-        """
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance._initialized = False
-        return cls._instance
+    Use `_get_client()` to share one instance per process.
+    """
 
     def __init__(self):
         """Initialize the GitHub client with token authentication."""
-        if self._initialized:
-            return
-
         token = os.getenv("GITHUB_TOKEN")
         if not token:
             raise ValueError("GITHUB_TOKEN environment variable required")
 
         self.auth = Auth.Token(token)
-        self.client = Github(auth=self.auth, per_page=100)
+        self.client = Github(auth=self.auth, per_page=100, retry=_HTTP_RETRY, pool_size=_HTTP_POOL_SIZE)
         self.current_user = self.client.get_user().login
-        self._repo_cache: dict[str, Repository] = {}
-        self._initialized = True
+        # Repos are resolved lazily: the /repos/{owner}/{repo} metadata GET only
+        # happens if a tool reads a field not derivable from the name.
+        # Bounded LRU so long-lived processes touching many repos don't grow unbounded.
+        self._get_repo_cached = functools.lru_cache(maxsize=_REPO_CACHE_SIZE)(self.client.withLazy(True).get_repo)
         log.info("github_client_initialized", user=self.current_user)
 
     def get_repo(self, repo_name: str) -> Repository:
         """Get repository with caching."""
-        if repo_name not in self._repo_cache:
-            self._repo_cache[repo_name] = self.client.get_repo(repo_name)
-        return self._repo_cache[repo_name]
+        return self._get_repo_cached(repo_name)
 
 
 # Module-level client getter
+@functools.lru_cache(maxsize=1)
 def _get_client() -> GitHubClient:
+    """Return the process-wide GitHubClient, creating it on first use."""
     return GitHubClient()
 
 
+def _error_message(e: GithubException) -> str:
+    """Message of a GitHub API error, falling back to the exception text."""
+    data = getattr(e, "data", None)
+    return data.get("message", str(e)) if isinstance(data, dict) else str(e)
+
+
+def _throttle_delay(e: GithubException, attempt: int = 0) -> float | None:
+    """Seconds to wait before retrying a throttled request, or None if e is not throttling.
+
+    Honours ``Retry-After``; otherwise backs off exponentially by attempt.
+    """
+    retry_after = (e.headers or {}).get("retry-after")
+    throttled = e.status == 429 or (e.status == 403 and (retry_after or "rate limit" in _error_message(e).lower()))
+    if not throttled:
+        return None
+    return float(retry_after) if retry_after else float(2**attempt)
+
+
 # =============================================================================
 # ISSUE TOOLS
 # =============================================================================
@@ -151,7 +222,8 @@ def get_my_assigned_issues(repo_name: str, labels: list[str] | None = None) -> s
         client = _get_client()
         repo = client.get_repo(repo_name)
 
-        issues = repo.get_issues(state="open", assignee=client.current_user, labels=labels or [])
+        # NotSet leaves the labels filter out of the query instead of sending an empty one
+        issues = repo.get_issues(state="open", assignee=client.current_user, labels=labels or GithubObject.NotSet)
 
         issue_list: list[IssueData] = []
 
@@ -159,8 +231,8 @@ def get_my_assigned_issues(repo_name: str, labels: list[str] | None = None) -> s
             if issue.pull_request:  # Skip PRs (GitHub API quirk)
                 continue
 
-            labels_list = [label.name for label in issue.labels]
-            priority = "high" if any(p in labels_list for p in ["critical", "urgent", "P0", "P1"]) else "normal"
+            labels_list, assignees, created_at = _issue_list_fields(issue)
+            priority = _derive_priority(labels_list)
 
             issue_list.append(
                 IssueData(
@@ -168,8 +240,8 @@ def get_my_assigned_issues(repo_name: str, labels: list[str] | None = None) -> s
                     title=issue.title,
                     body=issue.body or "",
                     labels=labels_list,
-                    assignees=[a.login for a in issue.assignees],
-                    created_at=issue.created_at.isoformat(),
+                    assignees=assignees,
+                    created_at=created_at,
                     priority=priority,
                 )
             )
@@ -180,13 +252,16 @@ def get_my_assigned_issues(repo_name: str, labels: list[str] | None = None) -> s
         # Sort by priority (high first), then by creation date (oldest first)
         issue_list.sort(key=lambda x: (0 if x.priority == "high" else 1, x.created_at))
 
-        report = f"## Issues Assigned to {client.current_user}\n\n"
+        # Write straight into one buffer - no per-issue concatenation or list of parts
+        buf = io.StringIO()
+        buf.write(f"## Issues Assigned to {client.current_user}\n\n")
         for issue in issue_list:
-            report += issue.to_prompt() + "\n---\n"
+            buf.write(issue.to_prompt())
+            buf.write("\n---\n")
 
-        return report
+        return buf.getvalue()
     except GithubException as e:
-        return f"Error fetching issues: {e.data.get('message', str(e)) if hasattr(e, 'data') else str(e)}"
+        return f"Error fetching issues: {_error_message(e)}"
     except Exception as e:
         log.error("get_my_assigned_issues_error", repo=repo_name, error=str(e))
         return f"Error fetching assigned issues: {e!s}"
@@ -212,7 +287,7 @@ def get_issue_content(repo_name: str, issue_number: int) -> str:
         issue = repo.get_issue(number=issue_number)
 
         labels = [label.name for label in issue.labels] if issue.labels else []
-        priority = "high" if any(p in labels for p in ["critical", "urgent", "P0", "P1"]) else "normal"
+        priority = _derive_priority(labels)
 
         data = IssueData(
             number=issue.number,
@@ -228,13 +303,11 @@ def get_issue_content(repo_name: str, issue_number: int) -> str:
         result = data.to_prompt()
 
         try:
-            comments = list(issue.get_comments())
-            if comments:
-                comments_text = ""
-                for comment in comments[:5]:
-                    comments_text += f"\n**{comment.user.login}** ({comment.created_at.date()}):\n{comment.body}\n"
-                if comments_text:
-                    result += f"\n### Discussion\n{comments_text}"
+            # Only the first few comments are shown, so a single page is enough
+            comments = issue.get_comments().get_page(0)[:5]
+            comments_text = "".join(f"\n**{comment.user.login}** ({comment.created_at.date()}):\n{comment.body}\n" for comment in comments)
+            if comments_text:
+                result += f"\n### Discussion\n{comments_text}"
         except Exception as ce:
             log.warning("failed_to_fetch_comments", error=str(ce))
 
@@ -243,7 +316,7 @@ def get_issue_content(repo_name: str, issue_number: int) -> str:
     except ValueError:
         return f"Error: Invalid issue number '{issue_number}' - must be an integer."
     except GithubException as e:
-        return f"Error fetching issue #{issue_number}: {e.data.get('message', str(e)) if hasattr(e, 'data') else str(e)}"
+        return f"Error fetching issue #{issue_number}: {_error_message(e)}"
     except Exception as e:
         log.error("get_issue_content_failed", error=str(e), issue=issue_number)
         return f"Error: {e!s}"
@@ -254,6 +327,24 @@ def get_issue_content(repo_name: str, issue_number: int) -> str:
 # =============================================================================
 
 
+def _fetch_raw_file(repo: Repository, file_path: str, ref: str) -> str | None:
+    """Fetch a file's text via the raw media type, skipping the base64 JSON envelope.
+
+    Returns None when the path is not a plain file (e.g. a directory) or the
+    request returns an error status, so the caller can fall back to `get_contents`.
+    """
+    status, headers, body = repo._requester.requestBlob(
+        "GET",
+        f"{repo.url}/contents/{urllib.parse.quote(file_path)}",
+        parameters={"ref": ref},
+        headers={"Accept": "application/vnd.github.raw"},
+    )
+    # Directories come back as a JSON listing even when raw is requested
+    if status != 200 or headers.get("content-type", "").startswith("application/json"):
+        return None
+    return body
+
+
 def get_file_content(repo_name: str, file_path: str, ref: str = "main") -> str:
     """
     Reads a file from the repository.
@@ -270,12 +361,17 @@ def get_file_content(repo_name: str, file_path: str, ref: str = "main") -> str:
         client = _get_client()
         repo = client.get_repo(repo_name)
 
+        content = _fetch_raw_file(repo, file_path, ref)
+        if content is not None:
+            return content
+
+        # Fallback also produces the usual errors for directories and missing paths
         contents = repo.get_contents(file_path, ref=ref)
         if isinstance(contents, list):
             return f"Error: {file_path} is a directory, not a file."
         return contents.decoded_content.decode("utf-8")
     except GithubException as e:
-        return f"Error reading {file_path}: {e.data.get('message', str(e))}"
+        return f"Error reading {file_path}: {_error_message(e)}"
     except Exception as e:
         log.error("get_file_content_error", file_path=file_path, ref=ref, error=str(e))
         return f"Error reading {file_path}: {e!s}"
@@ -301,20 +397,15 @@ def get_directory_tree(repo_name: str, path: str = "", ref: str = "main") -> str
         if not isinstance(contents, list):
             return f"{path} is a file, not a directory."
 
-        tree = f"Directory: {path or '/'}\n"
-
-        # Sort: directories first, then files
-        dirs = sorted([c for c in contents if c.type == "dir"], key=lambda x: x.path)
-        files = sorted([c for c in contents if c.type == "file"], key=lambda x: x.path)
+        # Sort: directories first, then files (symlinks/submodules are not listed)
+        entries = sorted((c for c in contents if c.type in ("dir", "file")), key=lambda c: (c.type != "dir", c.path))
 
-        for d in dirs:
-            tree += f"  📁 {d.name}/\n"
-        for f in files:
-            tree += f"  📄 {f.name}\n"
+        tree_parts = [f"Directory: {path or '/'}\n"]
+        tree_parts.extend(f"  📁 {e.name}/\n" if e.type == "dir" else f"  📄 {e.name}\n" for e in entries)
 
-        return tree
+        return "".join(tree_parts)
     except GithubException as e:
-        return f"Error: {e.data.get('message', str(e))}"
+        return f"Error: {_error_message(e)}"
     except Exception as e:
         log.error("get_directory_tree_error", path=path, ref=ref, error=str(e))
         return f"Error getting directory tree: {e!s}"
@@ -325,6 +416,203 @@ def get_directory_tree(repo_name: str, path: str = "", ref: str = "main") -> str
 # =============================================================================
 
 
+class _DirectoryPathError(ValueError):
+    """A path in file_changes names an existing directory on the branch."""
+
+
+def _git_blob_sha(content: str) -> str:
+    """SHA git (and GitHub) assigns to a blob holding content as UTF-8."""
+    data = content.encode("utf-8")
+    return hashlib.sha1(b"blob %d\0" % len(data) + data, usedforsecurity=False).hexdigest()
+
+
+def _create_blob(repo: Repository, content: str) -> str:
+    """Upload one blob and return its SHA, backing off when GitHub throttles.
+
+    Blob creation is a POST, so the client's GET-only retry does not cover it;
+    it is content-addressed, though, and therefore safe to repeat.
+    """
+    for attempt in range(_BLOB_UPLOAD_ATTEMPTS - 1):
+        try:
+            return repo.create_git_blob(content, "utf-8").sha
+        except GithubException as e:
+            delay = _throttle_delay(e, attempt)
+            if delay is None:
+                raise
+            log.warning("blob_upload_throttled", status=e.status, retry_in=delay)
+            time.sleep(delay)
+    return repo.create_git_blob(content, "utf-8").sha
+
+
+def _remember_branch_tip(repo: Repository, branch_name: str, source: Any) -> None:
+    """Seed the tip cache for a branch just created at source (a get_branch() result)."""
+    # The branch payload already embeds the head commit's tree, so this costs no request
+    _BRANCH_TIP_CACHE[(repo.url, branch_name)] = (source.commit.sha, source.commit.commit.tree.sha)
+
+
+def _branch_tip(repo: Repository, branch_name: str) -> tuple[str, str]:
+    """(commit_sha, tree_sha) of a branch head, from the tip cache when this process last moved it."""
+    key = (repo.url, branch_name)
+    tip = _BRANCH_TIP_CACHE.get(key)
+    if tip is None:
+        ref = repo.get_git_ref(f"heads/{branch_name}")
+        head_commit = repo.get_git_commit(ref.object.sha)
+        tip = _BRANCH_TIP_CACHE[key] = (head_commit.sha, head_commit.tree.sha)
+    return tip
+
+
+def _load_branch_tree(repo: Repository, branch_name: str, paths: Iterable[str]) -> tuple[str, str, dict[str, Any]]:
+    """Read a branch's head commit and the tree entries of the given paths.
+
+    Returns:
+        Tuple of (head_sha, tree_sha, {path: tree_entry}). Paths that don't exist are absent.
+    """
+    head_sha, tree_sha = _branch_tip(repo, branch_name)
+    # One recursive tree read replaces a get_contents() existence/directory check per file
+    tree = repo.get_git_tree(tree_sha, recursive=True)
+    if not tree.truncated:
+        return head_sha, tree_sha, {entry.path: entry for entry in tree.tree}
+
+    # Very large repos exceed the recursive listing limit - walk just the directories on our paths
+    log.info("git_tree_truncated", branch=branch_name)
+    return head_sha, tree_sha, _walk_tree_entries(repo, tree_sha, paths)
+
+
+def _walk_tree_entries(repo: Repository, root_tree_sha: str, paths: Iterable[str]) -> dict[str, Any]:
+    """Resolve paths one directory level at a time, reading each directory's tree once."""
+    listings: dict[str, dict[str, Any]] = {}
+
+    def listing(dir_path: str) -> dict[str, Any]:
+        if dir_path not in listings:
+            tree_sha = root_tree_sha
+            if dir_path:
+                parent, _, name = dir_path.rpartition("/")
+                entry = listing(parent).get(name)
+                if entry is None or entry.type != "tree":
+                    listings[dir_path] = {}
+                    return listings[dir_path]
+                tree_sha = entry.sha
+            # Non-recursive listings name entries relative to their directory
+            listings[dir_path] = {entry.path: entry for entry in repo.get_git_tree(tree_sha).tree}
+        return listings[dir_path]
+
+    entries = {}
+    for path in paths:
+        parent, _, name = path.rpartition("/")
+        entry = listing(parent).get(name)
+        if entry is not None:
+            entries[path] = entry
+    return entries
+
+
+def _commit_tree_elements(
+    repo: Repository, branch_name: str, head_sha: str, tree_sha: str, elements: list[dict[str, Any]], commit_message: str
+) -> str:
+    """Write elements on top of tree_sha as one commit and fast-forward the branch to it.
+
+    Works from SHAs alone, so a cached branch tip needs no ref/commit reads first.
+
+    Returns:
+        SHA of the new commit.
+    """
+    key = (repo.url, branch_name)
+    requester = repo._requester  # PyGithub's create_git_* helpers want full objects, not SHAs
+    _, tree = requester.requestJsonAndCheck("POST", f"{repo.url}/git/trees", input={"base_tree": tree_sha, "tree": elements})
+    _, commit = requester.requestJsonAndCheck(
+        "POST", f"{repo.url}/git/commits", input={"message": commit_message, "tree": tree["sha"], "parents": [head_sha]}
+    )
+    try:
+        requester.requestJsonAndCheck(
+            "PATCH", f"{repo.url}/git/refs/heads/{urllib.parse.quote(branch_name)}", input={"sha": commit["sha"], "force": False}
+        )
+    except GithubException:
+        # The branch moved under us (or is gone) - the cached tip can't be trusted any more
+        _BRANCH_TIP_CACHE.pop(key, None)
+        raise
+    _BRANCH_TIP_CACHE[key] = (commit["sha"], tree["sha"])
+    return commit["sha"]
+
+
+def _retry_on_stale_tip(repo: Repository, branch_name: str, operation: Callable[[], _T]) -> _T:
+    """Run operation, re-running it once from a fresh branch read if a cached tip proved stale.
+
+    A stale parent makes the non-forced ref update fail with 409/422; the failed
+    update has already evicted the tip, so the second run reads the live branch.
+    """
+    had_cached_tip = (repo.url, branch_name) in _BRANCH_TIP_CACHE
+    try:
+        return operation()
+    except GithubException as e:
+        if not had_cached_tip or e.status not in (409, 422):
+            raise
+        log.info("branch_tip_stale", branch=branch_name)
+        return operation()
+
+
+def _commit_file_changes(repo: Repository, branch_name: str, file_changes: dict[str, str], commit_message: str) -> tuple[list[str], list[str]]:
+    """Commit all file_changes to a branch as a single commit via the Git Data API.
+
+    Costs one blob upload per new distinct content plus a fixed handful of requests
+    (ref, commit, tree, new tree, new commit, ref update), instead of a lookup and
+    a PUT per file.
+
+    Returns:
+        Tuple of (files_created, files_updated).
+
+    Raises:
+        _DirectoryPathError: If a path is an existing directory on the branch.
+    """
+    return _retry_on_stale_tip(repo, branch_name, lambda: _commit_file_changes_once(repo, branch_name, file_changes, commit_message))
+
+
+def _commit_file_changes_once(repo: Repository, branch_name: str, file_changes: dict[str, str], commit_message: str) -> tuple[list[str], list[str]]:
+    """Single attempt of _commit_file_changes against the branch tip as currently known."""
+    head_sha, tree_sha, existing = _load_branch_tree(repo, branch_name, file_changes)
+
+    for file_path in file_changes:
+        entry = existing.get(file_path)
+        if entry is not None and entry.type == "tree":
+            raise _DirectoryPathError(file_path)
+
+    # Git blob SHAs are content hashes, so they can be computed locally. Upload each
+    # distinct content once, and skip contents the tree already holds (unchanged files).
+    blob_shas = {path: _git_blob_sha(content) for path, content in file_changes.items()}
+    known_shas = {entry.sha for entry in existing.values()}
+    to_upload = {sha: file_changes[path] for path, sha in blob_shas.items() if sha not in known_shas}
+
+    if to_upload:
+        # Blob uploads are independent - fan them out; the commit and ref update stay serial
+        with ThreadPoolExecutor(max_workers=min(_MAX_BLOB_UPLOAD_WORKERS, len(to_upload))) as executor:
+            list(executor.map(lambda content: _create_blob(repo, content), to_upload.values()))
+
+    elements = []
+    for file_path, blob_sha in blob_shas.items():
+        entry = existing.get(file_path)
+        # Keep the mode of existing files (e.g. executable scripts)
+        mode = entry.mode if entry is not None else "100644"
+        elements.append({"path": file_path, "mode": mode, "type": "blob", "sha": blob_sha})
+
+    commit_sha = _commit_tree_elements(repo, branch_name, head_sha, tree_sha, elements, commit_message)
+
+    files_created = [path for path in file_changes if path not in existing]
+    files_updated = [path for path in file_changes if path in existing]
+    log.info("files_committed", branch=branch_name, sha=commit_sha[:8], created=len(files_created), updated=len(files_updated))
+    return files_created, files_updated
+
+
+def _file_list_block(paths: list[str]) -> str:
+    """Indented bullet list of paths for the push result messages."""
+    return "\n".join(f"  - {path}" for path in paths) or "  (none)"
+
+
+def _directory_path_error(file_path: str, branch_name: str) -> str:
+    """Error message for a file_changes path that is a directory on the branch."""
+    return (
+        f"ERROR: '{file_path}' is a directory in the repo (ref='{branch_name}'), "
+        "but file_changes expects file paths. Choose a file path like 'dir/file.py'."
+    )
+
+
 def create_branch_with_files(repo_name: str, branch_name: str, file_changes: dict[str, str], commit_message: str, base_branch: str = "main") -> str:
     """
     Creates a new branch AND pushes files to it in one atomic operation.
@@ -375,37 +663,19 @@ def create_branch_with_files(repo_name: str, branch_name: str, file_changes: dic
         # Step 2: Create the new branch
         try:
             repo.create_git_ref(ref=f"refs/heads/{branch_name}", sha=base_sha)
+            _remember_branch_tip(repo, branch_name, source)
             log.info("branch_created", repo=repo_name, branch=branch_name, base=base_branch)
             branch_status = "created"
         except GithubException as e:
-            error_msg = e.data.get("message", str(e)) if hasattr(e, "data") else str(e)
+            error_msg = _error_message(e)
             if "Reference already exists" in error_msg:
                 log.info("branch_exists", repo=repo_name, branch=branch_name)
                 branch_status = "already existed"
             else:
                 return f"Error creating branch: {error_msg}"
 
-        # Step 3: Push all files to the branch
-        files_updated = []
-        files_created = []
-
-        for file_path, content in file_changes.items():
-            try:
-                # Check if file exists
-                existing = repo.get_contents(file_path, ref=branch_name)
-                if isinstance(existing, list):
-                    return (
-                        f"ERROR: '{file_path}' is a directory in the repo (ref='{branch_name}'), "
-                        "but file_changes expects file paths. Choose a file path like 'dir/file.py'."
-                    )
-                repo.update_file(path=file_path, message=f"{commit_message}", content=content, sha=existing.sha, branch=branch_name)
-                files_updated.append(file_path)
-                log.info("file_updated", path=file_path, branch=branch_name)
-            except GithubException:
-                # File doesn't exist, create it
-                repo.create_file(path=file_path, message=f"{commit_message}", content=content, branch=branch_name)
-                files_created.append(file_path)
-                log.info("file_created", path=file_path, branch=branch_name)
+        # Step 3: Push all files to the branch in a single commit
+        files_created, files_updated = _commit_file_changes(repo, branch_name, file_changes, commit_message)
 
         total_files = len(files_created) + len(files_updated)
 
@@ -417,16 +687,18 @@ SUCCESS: Branch {branch_status} and {total_files} file(s) pushed!
 **Base:** {base_branch}
 
 **Files Created:** {len(files_created)}
-{chr(10).join(f"  - {f}" for f in files_created) if files_created else "  (none)"}
+{_file_list_block(files_created)}
 
 **Files Updated:** {len(files_updated)}
-{chr(10).join(f"  - {f}" for f in files_updated) if files_updated else "  (none)"}
+{_file_list_block(files_updated)}
 
 **Next Step:** Run tests on this branch using `run_tests_on_branch("{repo_name}", "{branch_name}", "pytest")`
 Then create a PR using `create_pr_with_changes`.
 """
+    except _DirectoryPathError as e:
+        return _directory_path_error(str(e), branch_name)
     except GithubException as e:
-        error_msg = e.data.get("message", str(e)) if hasattr(e, "data") else str(e)
+        error_msg = _error_message(e)
         return f"Error: {error_msg}"
 
 
@@ -452,6 +724,7 @@ def create_branch(repo_name: str, branch_name: str, base_branch: str = "main") -
 
         # Create the new branch
         repo.create_git_ref(ref=f"refs/heads/{branch_name}", sha=base_sha)
+        _remember_branch_tip(repo, branch_name, source)
 
         log.info("branch_created", repo=repo_name, branch=branch_name, base=base_branch)
 
@@ -465,7 +738,7 @@ SUCCESS: Branch created!
 You can now push files to this branch using `push_files_to_branch`.
 """
     except GithubException as e:
-        error_msg = e.data.get("message", str(e)) if hasattr(e, "data") else str(e)
+        error_msg = _error_message(e)
         if "Reference already exists" in error_msg:
             return f"Branch '{branch_name}' already exists in {repo_name}. Use a different name or push directly to it."
         return f"Error creating branch: {error_msg}"
@@ -498,46 +771,23 @@ def push_files_to_branch(repo_name: str, branch_name: str, file_changes: dict[st
     repo = client.get_repo(repo_name)
 
     try:
-        files_updated = []
-        files_created = []
-
-        for file_path, content in file_changes.items():
-            try:
-                # Check if file exists
-                existing = repo.get_contents(file_path, ref=branch_name)
-                if isinstance(existing, list):
-                    return (
-                        f"ERROR: '{file_path}' is a directory in the repo (ref='{branch_name}'), "
-                        "but file_changes expects file paths. Choose a file path like 'dir/file.py'."
-                    )
-                repo.update_file(
-                    path=file_path,
-                    message=f"{commit_message} - update {file_path}",
-                    content=content,
-                    sha=existing.sha,
-                    branch=branch_name,
-                )
-                files_updated.append(file_path)
-                log.info("file_updated", path=file_path, branch=branch_name)
-            except GithubException:
-                # File doesn't exist, create it
-                repo.create_file(path=file_path, message=f"{commit_message} - add {file_path}", content=content, branch=branch_name)
-                files_created.append(file_path)
-                log.info("file_created", path=file_path, branch=branch_name)
+        files_created, files_updated = _commit_file_changes(repo, branch_name, file_changes, commit_message)
 
         return f"""
 SUCCESS: Files pushed to branch '{branch_name}'!
 
 **Created:** {len(files_created)} file(s)
-{chr(10).join(f"  - {f}" for f in files_created) if files_created else "  (none)"}
+{_file_list_block(files_created)}
 
 **Updated:** {len(files_updated)} file(s)
-{chr(10).join(f"  - {f}" for f in files_updated) if files_updated else "  (none)"}
+{_file_list_block(files_updated)}
 
 You can now run tests on this branch using `run_tests_on_branch`.
 """
+    except _DirectoryPathError as e:
+        return _directory_path_error(str(e), branch_name)
     except GithubException as e:
-        error_msg = e.data.get("message", str(e)) if hasattr(e, "data") else str(e)
+        error_msg = _error_message(e)
         return f"Error pushing files: {error_msg}"
 
 
@@ -570,28 +820,25 @@ def delete_files_from_branch(repo_name: str, branch_name: str, file_paths: list,
     client = _get_client()
     repo = client.get_repo(repo_name)
 
-    try:
-        files_deleted = []
-        files_not_found = []
+    def delete_once() -> tuple[list[str], list[str]]:
+        head_sha, tree_sha, existing = _load_branch_tree(repo, branch_name, file_paths)
 
-        for file_path in file_paths:
-            try:
-                # Get the file to obtain its SHA (required for deletion)
-                existing = repo.get_contents(file_path, ref=branch_name)
-                repo.delete_file(
-                    path=file_path,
-                    message=f"{commit_message} - delete {file_path}",
-                    sha=existing.sha,
-                    branch=branch_name,
-                )
-                files_deleted.append(file_path)
-                log.info("file_deleted", path=file_path, branch=branch_name)
-            except GithubException as e:
-                if e.status == 404:
-                    files_not_found.append(file_path)
-                    log.warning("file_not_found_for_deletion", path=file_path, branch=branch_name)
-                else:
-                    raise
+        # Existence is checked against the tree in memory instead of a 404 per path
+        unique_paths = list(dict.fromkeys(file_paths))
+        files_deleted = [path for path in unique_paths if path in existing and existing[path].type == "blob"]
+        files_not_found = [path for path in unique_paths if path not in existing or existing[path].type != "blob"]
+        for path in files_not_found:
+            log.warning("file_not_found_for_deletion", path=path, branch=branch_name)
+
+        if files_deleted:
+            # A null sha removes the path from the new tree - one commit for all deletions
+            elements = [{"path": path, "mode": existing[path].mode, "type": "blob", "sha": None} for path in files_deleted]
+            commit_sha = _commit_tree_elements(repo, branch_name, head_sha, tree_sha, elements, commit_message)
+            log.info("files_deleted", branch=branch_name, sha=commit_sha[:8], count=len(files_deleted))
+        return files_deleted, files_not_found
+
+    try:
+        files_deleted, files_not_found = _retry_on_stale_tip(repo, branch_name, delete_once)
 
         result_parts = [f"SUCCESS: File deletion completed on branch '{branch_name}'!"]
 
@@ -606,7 +853,7 @@ def delete_files_from_branch(repo_name: str, branch_name: str, file_paths: list,
         return "\n".join(result_parts)
 
     except GithubException as e:
-        error_msg = e.data.get("message", str(e)) if hasattr(e, "data") else str(e)
+        error_msg = _error_message(e)
         return f"Error deleting files: {error_msg}"
 
 
@@ -639,7 +886,7 @@ def get_branch_info(repo_name: str, branch_name: str) -> str:
 **Protected:** {"Yes" if branch.protected else "No"}
 """
     except GithubException as e:
-        return f"Error: {e.data.get('message', str(e)) if hasattr(e, 'data') else str(e)}"
+        return f"Error: {_error_message(e)}"
 
 
 # =============================================================================
@@ -647,6 +894,28 @@ def get_branch_info(repo_name: str, branch_name: str) -> str:
 # =============================================================================
 
 
+def _error_messages(e: GithubException) -> list[str]:
+    """The per-field messages of a 422 validation error, if any."""
+    data = e.data if isinstance(e.data, dict) else {}
+    return [err["message"] for err in data.get("errors") or [] if isinstance(err, dict) and err.get("message")]
+
+
+def _is_missing_head_error(e: GithubException) -> bool:
+    """Whether a create_pull failure means the head branch does not exist."""
+    data = e.data if isinstance(e.data, dict) else {}
+    if "head ref does not exist" in str(data.get("message", "")).lower():
+        return True
+    # Usually a 422 "Validation Failed" with an invalid "head" field
+    return e.status == 422 and any(
+        isinstance(err, dict) and err.get("field") == "head" and err.get("code") == "invalid" for err in data.get("errors") or []
+    )
+
+
+# Existing PR number that ends a "pull request already exists" error, e.g. "... (#42)." -
+# only the trailing form, since the rest of the message names the head branch, which may contain "#"
+_RE_EXISTING_PR_NUMBER = re.compile(r"\(#(\d+)\)\.?\s*$")
+
+
 def create_pr(repo_name: str, branch_name: str, title: str, description: str, base_branch: str = "main", draft: bool = False) -> str:
     """
     Creates a Pull Request from an existing branch.
@@ -676,13 +945,7 @@ def create_pr(repo_name: str, branch_name: str, title: str, description: str, ba
     repo = client.get_repo(repo_name)
 
     try:
-        # Verify branch exists
-        try:
-            repo.get_branch(branch_name)
-        except GithubException:
-            return f"ERROR: Branch '{branch_name}' does not exist. Use `create_branch_with_files` first."
-
-        # Create PR
+        # No branch pre-check: a missing head branch is reported by create_pull itself
         pr = repo.create_pull(title=title, body=description, head=branch_name, base=base_branch, draft=draft)
 
         log.info("pr_created", number=pr.number, url=pr.html_url, branch=branch_name)
@@ -698,11 +961,28 @@ SUCCESS: Pull Request Created!
 """
 
     except GithubException as e:
-        error_msg = e.data.get("message", str(e)) if hasattr(e, "data") else str(e)
-        if "A pull request already exists" in error_msg:
+        error_msg = _error_message(e)
+        if _is_missing_head_error(e):
+            return f"ERROR: Branch '{branch_name}' does not exist. Use `create_branch_with_files` first."
+        # GitHub puts the specific reason in errors[].message under a generic "Validation Failed"
+        messages = [error_msg, *_error_messages(e)]
+        if "A pull request already exists" in " ".join(messages):
+            # Newer GitHub versions name the existing PR in the error - no lookup needed then
+            matches = [match for match in map(_RE_EXISTING_PR_NUMBER.search, messages) if match]
+            if matches:
+                pr_number = int(matches[0].group(1))
+                return f"""
+NOTE: A PR already exists for this branch!
+
+**PR #{pr_number}**
+**URL:** https://github.com/{repo_name}/pull/{pr_number}
+
+Use `monitor_ci_for_pr("{repo_name}", {pr_number})` to check CI status.
+"""
             # Find existing PR
             try:
-                prs = repo.get_pulls(state="open", head=f"{repo.owner.login}:{branch_name}")
+                owner = repo_name.split("/", 1)[0]
+                prs = repo.get_pulls(state="open", head=f"{owner}:{branch_name}")
                 for pr in prs:
                     return f"""
 NOTE: A PR already exists for this branch!
@@ -718,6 +998,70 @@ Use `monitor_ci_for_pr("{repo_name}", {pr.number})` to check CI status.
         return f"ERROR creating PR: {error_msg}"
 
 
+# Body of PRs opened by create_pr_with_changes
+_PR_BODY_TEMPLATE = """
+## Summary
+{description}
+
+## Related Issue
+Closes #{issue_number}
+
+## Changes Made
+{changes_block}
+
+---
+*This PR was automatically generated by CapeAble Core Foundry AI.*
+"""
+
+# Branch, commit and pull request as one document - GraphQL runs the mutation
+# fields of a request serially, so each step sees the previous one's result
+_OPEN_PR_WITH_COMMIT = """
+mutation($ref: CreateRefInput!, $commit: CreateCommitOnBranchInput!, $pr: CreatePullRequestInput!) {
+  createRef(input: $ref) { ref { name } }
+  createCommitOnBranch(input: $commit) { commit { oid tree { oid } } }
+  createPullRequest(input: $pr) { pullRequest { number url } }
+}
+"""
+
+
+def _open_pr_graphql(
+    repo: Repository, branch_name: str, base_sha: str, file_changes: dict[str, str], headline: str, pr_input: dict[str, Any]
+) -> dict[str, Any]:
+    """Create the branch, commit file_changes and open the PR in a single GraphQL request.
+
+    Returns:
+        Payload of each mutation that succeeded, keyed by mutation name. Failed steps
+        are absent so the caller can finish them over REST.
+    """
+    variables = {
+        "ref": {"repositoryId": repo.node_id, "name": f"refs/heads/{branch_name}", "oid": base_sha},
+        "commit": {
+            "branch": {"repositoryNameWithOwner": repo.full_name, "branchName": branch_name},
+            "expectedHeadOid": base_sha,
+            "message": {"headline": headline},
+            "fileChanges": {
+                "additions": [
+                    {"path": path, "contents": base64.b64encode(content.encode("utf-8")).decode("ascii")} for path, content in file_changes.items()
+                ]
+            },
+        },
+        "pr": {"repositoryId": repo.node_id, "headRefName": branch_name, **pr_input},
+    }
+    try:
+        _, data = repo._requester.graphql_query(_OPEN_PR_WITH_COMMIT, variables)
+    except GithubException as e:
+        # Errors still carry the partial "data" of the mutations that ran; a document
+        # GitHub can't validate (e.g. Enterprise < 3.6, no createCommitOnBranch) runs none
+        log.warning("graphql_pr_failed", branch=branch_name, error=_error_message(e))
+        data = e.data if isinstance(e.data, dict) else {}
+
+    done = {name: payload for name, payload in (data.get("data") or {}).items() if payload}
+    if "createCommitOnBranch" in done:
+        commit = done["createCommitOnBranch"]["commit"]
+        _BRANCH_TIP_CACHE[(repo.url, branch_name)] = (commit["oid"], commit["tree"]["oid"])
+    return done
+
+
 def create_pr_with_changes(
     repo_name: str,
     issue_number: int,
@@ -749,75 +1093,59 @@ def create_pr_with_changes(
         if not test_files:
             log.warning("pr_missing_tests", issue=issue_number)
 
-    # Generate unique branch name
-    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-    branch_name = f"ai-fix-{issue_number}-{timestamp}"
+    # Generate unique branch name - millisecond resolution, so two PRs for the
+    # same issue opened within one second don't collide on the ref
+    branch_name = f"ai-fix-{issue_number}-{time.time_ns() // 1_000_000:x}"
 
     try:
         # Get base branch
         base_branch = repo.default_branch
         source = repo.get_branch(base_branch)
 
-        # Create feature branch
-        repo.create_git_ref(ref=f"refs/heads/{branch_name}", sha=source.commit.sha)
-        log.info("branch_created", branch=branch_name, base=base_branch)
-
-        # Commit files
-        for file_path, content in file_changes.items():
-            try:
-                # Check if file exists
-                existing = repo.get_contents(file_path, ref=branch_name)
-                repo.update_file(
-                    path=file_path,
-                    message=f"fix(#{issue_number}): Update {file_path}",
-                    content=content,
-                    sha=existing.sha,
-                    branch=branch_name,
-                )
-                log.info("file_updated", path=file_path)
-            except GithubException:
-                # File doesn't exist, create it
-                repo.create_file(
-                    path=file_path,
-                    message=f"feat(#{issue_number}): Add {file_path}",
-                    content=content,
-                    branch=branch_name,
-                )
-                log.info("file_created", path=file_path)
-
-        # Create PR
         pr_title = f"fix: Resolve issue #{issue_number}"
-        pr_body = f"""
-## Summary
-{description}
-
-## Related Issue
-Closes #{issue_number}
-
-## Changes Made
-{chr(10).join(f"- `{f}`" for f in file_changes)}
+        changes_block = "\n".join(f"- `{f}`" for f in file_changes)
+        pr_body = _PR_BODY_TEMPLATE.format(description=description, issue_number=issue_number, changes_block=changes_block)
+        commit_headline = f"fix(#{issue_number}): Resolve issue #{issue_number}"
+
+        # Branch, commit and PR in one round trip; any step GraphQL didn't
+        # complete is finished over REST
+        pr_input = {"baseRefName": base_branch, "title": pr_title, "body": pr_body, "draft": draft}
+        done = _open_pr_graphql(repo, branch_name, source.commit.sha, file_changes, commit_headline, pr_input)
+
+        if "createRef" not in done:
+            repo.create_git_ref(ref=f"refs/heads/{branch_name}", sha=source.commit.sha)
+            _remember_branch_tip(repo, branch_name, source)
+        log.info("branch_created", branch=branch_name, base=base_branch)
 
----
-*This PR was automatically generated by CapeAble Core Foundry AI.*
-"""
+        if "createCommitOnBranch" in done:
+            log.info("files_committed", branch=branch_name, sha=done["createCommitOnBranch"]["commit"]["oid"][:8], files=len(file_changes))
+        else:
+            _commit_file_changes(repo, branch_name, file_changes, commit_headline)
 
-        pr = repo.create_pull(title=pr_title, body=pr_body, head=branch_name, base=base_branch, draft=draft)
+        if "createPullRequest" in done:
+            pull_request = done["createPullRequest"]["pullRequest"]
+            pr_number, pr_url = pull_request["number"], pull_request["url"]
+        else:
+            pr = repo.create_pull(title=pr_title, body=pr_body, head=branch_name, base=base_branch, draft=draft)
+            pr_number, pr_url = pr.number, pr.html_url
 
-        log.info("pr_created", number=pr.number, url=pr.html_url)
+        log.info("pr_created", number=pr_number, url=pr_url)
 
         return f"""
 SUCCESS: Pull Request Created!
 
-**PR #{pr.number}:** {pr.title}
-**URL:** {pr.html_url}
+**PR #{pr_number}:** {pr_title}
+**URL:** {pr_url}
 **Branch:** {branch_name} → {base_branch}
 **Files Changed:** {len(file_changes)}
 
 Waiting for CI to run...
 """
 
+    except _DirectoryPathError as e:
+        return _directory_path_error(str(e), branch_name)
     except GithubException as e:
-        error_msg = e.data.get("message", str(e)) if hasattr(e, "data") else str(e)
+        error_msg = _error_message(e)
         log.error("pr_creation_failed", error=error_msg, issue=issue_number)
         return f"ERROR creating PR: {error_msg}"
 
@@ -842,17 +1170,23 @@ def update_pr_with_changes(repo_name: str, pr_number: int, file_changes: dict[st
         pr = repo.get_pull(pr_number)
         branch_name = pr.head.ref
 
-        for file_path, content in file_changes.items():
-            try:
-                existing = repo.get_contents(file_path, ref=branch_name)
-                repo.update_file(path=file_path, message=commit_message, content=content, sha=existing.sha, branch=branch_name)
-            except GithubException:
-                repo.create_file(path=file_path, message=commit_message, content=content, branch=branch_name)
+        # The PR already names its head commit - seed the tip from it instead of reading the ref
+        if (repo.url, branch_name) not in _BRANCH_TIP_CACHE:
+            head_commit = repo.get_git_commit(pr.head.sha)
+            _BRANCH_TIP_CACHE[(repo.url, branch_name)] = (head_commit.sha, head_commit.tree.sha)
+
+        # One commit for all files, so CI runs once for the update rather than once per file
+        files_created, files_updated = _commit_file_changes(repo, branch_name, file_changes, commit_message)
 
-        return f"SUCCESS: PR #{pr_number} updated with {len(file_changes)} file(s)."
+        return (
+            f"SUCCESS: PR #{pr_number} updated with {len(file_changes)} file(s) in one commit "
+            f"({len(files_created)} created, {len(files_updated)} updated)."
+        )
 
+    except _DirectoryPathError as e:
+        return _directory_path_error(str(e), branch_name)
     except GithubException as e:
-        return f"ERROR updating PR: {e.data.get('message', str(e))}"
+        return f"ERROR updating PR: {_error_message(e)}"
 
 
 def get_pr_details(repo_name: str, pr_number: int) -> str:
@@ -871,7 +1205,6 @@ def get_pr_details(repo_name: str, pr_number: int) -> str:
 
     try:
         pr = repo.get_pull(pr_number)
-        files = pr.get_files()
 
         status = PRStatus.DRAFT if pr.draft else PRStatus.OPEN
         if pr.merged:
@@ -882,7 +1215,11 @@ def get_pr_details(repo_name: str, pr_number: int) -> str:
         # Get CI status
         ci_status = get_ci_status(repo_name, pr.head.sha)
 
-        files_list = [f.filename for f in files]
+        # One page (100 files) is plenty for a human-readable summary
+        files_list = [f.filename for f in pr.get_files().get_page(0)]
+        files_block = "\n".join(f"- `{f}`" for f in files_list)
+        if pr.changed_files > len(files_list):
+            files_block += f"\n- ... and {pr.changed_files - len(files_list)} more"
 
         result = f"""
 ## PR #{pr.number}: {pr.title}
@@ -892,8 +1229,8 @@ def get_pr_details(repo_name: str, pr_number: int) -> str:
 **Author:** {pr.user.login}
 **CI Status:** {ci_status}
 
-### Files Changed ({len(files_list)})
-{chr(10).join(f"- `{f}`" for f in files_list)}
+### Files Changed ({pr.changed_files})
+{files_block}
 
 ### Description
 {pr.body or "No description."}
@@ -901,7 +1238,7 @@ def get_pr_details(repo_name: str, pr_number: int) -> str:
         return result
 
     except GithubException as e:
-        return f"ERROR: {e.data.get('message', str(e))}"
+        return f"ERROR: {_error_message(e)}"
     except Exception as e:
         log.error("get_pr_details_error", pr_number=pr_number, error=str(e))
         return f"Error getting PR details: {e!s}"
@@ -912,12 +1249,24 @@ def get_pr_details(repo_name: str, pr_number: int) -> str:
 # =============================================================================
 
 
+# get_ci_status memo: (repo_name, sha) -> (status, monotonic time it was read).
+# Finished CI only changes through re-runs, so terminal states are kept longer than
+# in-progress ones, which only absorb bursts of repeat calls - but briefly, since a
+# re-run on the same SHA must show up. trigger_workflow drops a repo's entries.
+_ci_status_cache: dict[tuple[str, str], tuple[str, float]] = {}
+_CI_STATUS_CACHE_SIZE = 256
+_CI_STATUS_ACTIVE_TTL = 2.0
+_CI_STATUS_TERMINAL_TTL = 30.0
+_TERMINAL_CI_STATES = frozenset({CIStatus.SUCCESS.value, CIStatus.FAILURE.value, CIStatus.CANCELLED.value})
+
+
 def get_ci_status(repo_name: str, commit_sha: str) -> str:
     """
     Gets the CI/CD status for a specific commit.
 
-    Checks GitHub Actions workflow runs first (most common), then falls back
-    to combined status for other CI systems.
+    Checks the commit's check runs first (GitHub Actions jobs and other
+    check-based CI apps), then falls back to combined status for other CI systems.
+    Results are memoized per commit: briefly while CI runs, longer once it finished.
 
     Args:
         repo_name: Repository in "owner/repo" format.
@@ -926,54 +1275,45 @@ def get_ci_status(repo_name: str, commit_sha: str) -> str:
     Returns:
         CI status string.
     """
+    key = (repo_name, commit_sha)
+    cached = _ci_status_cache.get(key)
+    if cached is not None:
+        status, cached_at = cached
+        ttl = _CI_STATUS_TERMINAL_TTL if status in _TERMINAL_CI_STATES else _CI_STATUS_ACTIVE_TTL
+        if time.monotonic() - cached_at < ttl:
+            return status
+
+    status = _compute_ci_status(repo_name, commit_sha)
+    if len(_ci_status_cache) >= _CI_STATUS_CACHE_SIZE:
+        _ci_status_cache.pop(next(iter(_ci_status_cache)), None)  # Drop the oldest entry
+    _ci_status_cache[key] = (status, time.monotonic())
+    return status
+
+
+def _compute_ci_status(repo_name: str, commit_sha: str) -> str:
+    """Fetch the CI status of a commit, bypassing the `get_ci_status` memo."""
     client = _get_client()
     repo = client.get_repo(repo_name)
 
-    # First, check GitHub Actions workflow runs (most common CI for GitHub)
+    # First, check the check runs (one per GitHub Actions job) in a single request
     try:
-        runs = repo.get_workflow_runs(head_sha=commit_sha)
-
-        if runs.totalCount > 0:
-            # Check ALL workflow runs, not just the first one
-            all_completed = True
-            any_failed = False
-            any_cancelled = False
-
-            for run in runs:
-                if run.status != "completed":
-                    all_completed = False
-                elif run.conclusion == "failure" or run.conclusion == "timed_out":
-                    any_failed = True
-                elif run.conclusion == "cancelled":
-                    any_cancelled = True
-
-            if not all_completed:
-                return CIStatus.IN_PROGRESS.value
-            elif any_failed:
-                return CIStatus.FAILURE.value
-            elif any_cancelled:
-                return CIStatus.CANCELLED.value
-            else:
-                return CIStatus.SUCCESS.value
+        check_runs = _fetch_check_runs(repo, commit_sha)
+
+        if check_runs:
+            # Check ALL check runs, not just the first one
+            return _summarize_run_states((cr.get("status"), cr.get("conclusion")) for cr in check_runs)
     except Exception:
         # Log but continue to check combined status
         pass
 
     # Fallback: Check combined status (for other CI systems like Jenkins, CircleCI, etc.)
     try:
-        commit = repo.get_commit(commit_sha)
-        status = commit.get_combined_status()
+        status = _get_json_conditional(repo, f"{repo.url}/commits/{commit_sha}/status")
 
         # Only trust combined status if there are actual statuses
-        if status.total_count > 0:
-            if status.state == "success":
-                return CIStatus.SUCCESS.value
-            elif status.state == "pending":
-                return CIStatus.PENDING.value
-            elif status.state == "failure":
-                return CIStatus.FAILURE.value
-            else:
-                return status.state
+        if status.get("total_count", 0) > 0:
+            # success/pending/failure are CIStatus values as-is; "error" is passed through
+            return status["state"]
     except Exception:
         pass
 
@@ -981,6 +1321,146 @@ def get_ci_status(repo_name: str, commit_sha: str) -> str:
     return CIStatus.PENDING.value
 
 
+def _summarize_run_states(states: Iterable[tuple[str | None, str | None]]) -> str:
+    """Reduce (status, conclusion) pairs of check/workflow runs to one CIStatus value."""
+    all_completed = True
+    any_failed = False
+    any_cancelled = False
+
+    for run_status, conclusion in states:
+        if run_status != "completed":
+            all_completed = False
+        elif conclusion == "failure" or conclusion == "timed_out":
+            any_failed = True
+        elif conclusion == "cancelled":
+            any_cancelled = True
+
+    if not all_completed:
+        return CIStatus.IN_PROGRESS.value
+    elif any_failed:
+        return CIStatus.FAILURE.value
+    elif any_cancelled:
+        return CIStatus.CANCELLED.value
+    else:
+        return CIStatus.SUCCESS.value
+
+
+# Last (etag, body) per URL and query, so repeat reads can be answered with 304 Not Modified
+_etag_cache: dict[str, tuple[str, Any]] = {}
+_ETAG_CACHE_SIZE = 256
+
+
+def _get_json_conditional(repo: Repository, url: str, parameters: dict[str, Any] | None = None) -> Any:
+    """GET a JSON resource with ``If-None-Match``, reusing the cached body on 304.
+
+    Unchanged responses carry no body and don't count against the primary rate limit.
+    """
+    key = _etag_key(url, parameters)
+    cached = _etag_cache.get(key)
+    headers = {"If-None-Match": cached[0]} if cached else None
+    response_headers, data = repo._requester.requestJsonAndCheck("GET", url, parameters=parameters, headers=headers)
+
+    if not data and cached:  # 304 Not Modified - empty body
+        return cached[1]
+
+    _remember_etag(key, response_headers.get("etag"), data)
+    return data
+
+
+def _etag_key(url: str, parameters: dict[str, Any] | None) -> str:
+    """Key of a URL and query in `_etag_cache`."""
+    return f"{url}?{urllib.parse.urlencode(sorted(parameters.items()))}" if parameters else url
+
+
+def _remember_etag(key: str, etag: str | None, data: Any) -> None:
+    """Store a response body under its ETag so the next read of it can be a 304."""
+    if etag:
+        if len(_etag_cache) >= _ETAG_CACHE_SIZE:
+            _etag_cache.pop(next(iter(_etag_cache), None), None)  # Drop the oldest entry
+        _etag_cache[key] = (etag, data)
+
+
+def _forget_ci_status(repo: Repository, repo_name: str) -> None:
+    """Drop a repo's memoized CI statuses and cached commit payloads, e.g. once a run was triggered."""
+    for key in [key for key in _ci_status_cache if key[0] == repo_name]:
+        _ci_status_cache.pop(key, None)
+    prefix = f"{repo.url}/commits/"
+    for key in [key for key in _etag_cache if key.startswith(prefix)]:
+        _etag_cache.pop(key, None)
+
+
+# Query of the check-runs listing, shared by the polling and the one-off reads
+_CHECK_RUNS_PARAMETERS = {"per_page": 100}
+
+
+def _fetch_check_runs(repo: Repository, commit_sha: str) -> list[dict[str, Any]]:
+    """Fetch status, conclusion and job name of every check run of a commit.
+
+    One request unless the commit has more than a page of check runs. Conditional,
+    so re-reading an unchanged payload (e.g. right after a poll) is a free 304,
+    while re-run jobs on the same commit still show up.
+    """
+    url = f"{repo.url}/commits/{commit_sha}/check-runs"
+    return _all_check_runs(repo, url, _get_json_conditional(repo, url, parameters=_CHECK_RUNS_PARAMETERS))
+
+
+def _all_check_runs(repo: Repository, url: str, first_page: dict[str, Any]) -> list[dict[str, Any]]:
+    """The check runs of first_page plus those of the following pages, for large job matrices."""
+    check_runs = list(first_page.get("check_runs") or [])
+    total = first_page.get("total_count", 0)
+    page = 1
+    while len(check_runs) < total:
+        page += 1
+        batch = _get_json_conditional(repo, url, parameters={**_CHECK_RUNS_PARAMETERS, "page": page}).get("check_runs")
+        if not batch:
+            break  # Runs vanished between pages - summarize what was read
+        check_runs.extend(batch)
+    return check_runs
+
+
+def _failed_check_run_names(repo: Repository, commit_sha: str) -> list[str]:
+    """Names of the failed check runs (jobs) of a commit."""
+    return [cr["name"] for cr in _fetch_check_runs(repo, commit_sha) if cr.get("conclusion") in ("failure", "timed_out")]
+
+
+def _poll_ci_status(repo: Repository, repo_name: str, commit_sha: str, etag: str | None = None) -> tuple[str | None, str | None]:
+    """Conditionally re-fetch the check runs of a commit for CI polling loops.
+
+    Sends ``If-None-Match: <etag>`` so GitHub can answer ``304 Not Modified``,
+    which is cheap and not counted against the rate limit. Commits without
+    check runs fall back to `get_ci_status` (combined status).
+
+    Returns:
+        Tuple of (status, etag). ``status`` is None when nothing changed since ``etag``.
+        ``etag`` is None after a payload without check runs, so the next poll re-reads
+        the combined status instead of stopping at a 304 on the empty check-run list,
+        and after one with more than a page of runs, whose later pages can change
+        while the first one doesn't.
+    """
+    url = f"{repo.url}/commits/{commit_sha}/check-runs"
+    headers = {"If-None-Match": etag} if etag else None
+    response_headers, data = repo._requester.requestJsonAndCheck("GET", url, parameters=_CHECK_RUNS_PARAMETERS, headers=headers)
+    new_etag = response_headers.get("etag", etag)
+
+    if not data:  # 304 Not Modified - empty body
+        return None, new_etag
+
+    # Lets a follow-up _fetch_check_runs (failed job names) be answered with a 304
+    _remember_etag(_etag_key(url, _CHECK_RUNS_PARAMETERS), response_headers.get("etag"), data)
+
+    check_runs = data.get("check_runs") or []
+    if not check_runs:
+        # Status-only CI (Jenkins, CircleCI, ...) never changes the check-run list
+        return get_ci_status(repo_name, commit_sha), None
+
+    if data.get("total_count", 0) > len(check_runs):
+        # Later pages are conditional reads of their own, so unchanged ones stay free
+        check_runs = _all_check_runs(repo, url, data)
+        return _summarize_run_states((cr.get("status"), cr.get("conclusion")) for cr in check_runs), None
+
+    return _summarize_run_states((cr.get("status"), cr.get("conclusion")) for cr in check_runs), new_etag
+
+
 def wait_for_ci_completion(repo_name: str, pr_number: int, timeout_seconds: int = 600, poll_interval: int = 30) -> str:
     """
     Waits for CI to complete on a PR.
@@ -997,14 +1477,36 @@ def wait_for_ci_completion(repo_name: str, pr_number: int, timeout_seconds: int
     client = _get_client()
     repo = client.get_repo(repo_name)
 
-    start_time = time.time()
+    start_time = time.monotonic()
+    deadline = start_time + timeout_seconds
+    # Exponential backoff from 2s up to poll_interval, reset whenever the status moves
+    initial_delay = min(2.0, poll_interval)
 
     try:
         pr = repo.get_pull(pr_number)
         commit_sha = pr.head.sha
 
-        while time.time() - start_time < timeout_seconds:
-            status = get_ci_status(repo_name, commit_sha)
+        status = None
+        etag = None
+        delay = initial_delay
+        unchanged_polls = 0
+
+        while time.monotonic() < deadline:
+            try:
+                new_status, etag = _poll_ci_status(repo, repo_name, commit_sha, etag)
+            except Exception as e:
+                log.warning("ci_poll_failed", error=str(e))
+                new_status, etag = None, None
+                throttle = _throttle_delay(e) if isinstance(e, GithubException) else None
+                if throttle is not None:
+                    delay = max(delay, throttle)  # Wait at least as long as GitHub asked
+
+            if new_status is not None and new_status != status:
+                status = new_status
+                delay = initial_delay
+                unchanged_polls = 0
+            else:
+                unchanged_polls += 1
 
             if status in [CIStatus.SUCCESS.value, CIStatus.FAILURE.value, CIStatus.CANCELLED.value]:
                 # Get detailed logs if failed
@@ -1013,13 +1515,18 @@ def wait_for_ci_completion(repo_name: str, pr_number: int, timeout_seconds: int
                     return f"CI_STATUS: {status.upper()}\n\n### Failure Logs\n{logs}"
                 return f"CI_STATUS: {status.upper()}"
 
-            log.info("ci_polling", status=status, elapsed=int(time.time() - start_time))
-            time.sleep(poll_interval)
+            # A run of 304s means CI is in a long stretch - stop ramping and poll at the cap
+            if unchanged_polls > 3:
+                delay = max(delay, poll_interval)
+
+            log.info("ci_polling", status=status, elapsed=int(time.monotonic() - start_time), next_poll=round(delay, 1))
+            time.sleep(min(delay + random.uniform(0, delay * 0.1), max(0.0, deadline - time.monotonic())))
+            delay = min(poll_interval, delay * 2)
 
         return f"CI_STATUS: TIMEOUT (exceeded {timeout_seconds}s)"
 
     except GithubException as e:
-        return f"CI_STATUS: ERROR - {e.data.get('message', str(e))}"
+        return f"CI_STATUS: ERROR - {_error_message(e)}"
 
 
 def get_ci_failure_logs(repo_name: str, commit_sha: str) -> str:
@@ -1037,25 +1544,24 @@ def get_ci_failure_logs(repo_name: str, commit_sha: str) -> str:
     repo = client.get_repo(repo_name)
 
     try:
-        runs = repo.get_workflow_runs(head_sha=commit_sha)
+        # Failed runs only, first page only - we report the first one we find
+        runs = repo.get_workflow_runs(head_sha=commit_sha, status="failure").get_page(0)
 
         for run in runs:
             if run.conclusion == "failure":
-                # Get jobs for this run
-                jobs = run.jobs()
+                # "latest" skips jobs from earlier attempts of a re-run workflow
+                jobs = run.jobs("latest")
 
-                logs = f"**Workflow:** {run.name}\n"
+                log_parts = [f"**Workflow:** {run.name}\n"]
 
                 for job in jobs:
                     if job.conclusion == "failure":
-                        logs += f"\n**Failed Job:** {job.name}\n"
+                        log_parts.append(f"\n**Failed Job:** {job.name}\n")
 
                         # Get step failures
-                        for step in job.steps:
-                            if step.conclusion == "failure":
-                                logs += f"  ❌ Step: {step.name}\n"
+                        log_parts.extend(f"  ❌ Step: {step.name}\n" for step in job.steps if step.conclusion == "failure")
 
-                return logs
+                return "".join(log_parts)
 
         return "No failure details found."
 
@@ -1088,7 +1594,7 @@ def add_pr_comment(repo_name: str, pr_number: int, comment: str) -> str:
         pr.create_issue_comment(comment)
         return f"Comment added to PR #{pr_number}."
     except GithubException as e:
-        return f"Error: {e.data.get('message', str(e))}"
+        return f"Error: {_error_message(e)}"
 
 
 def add_issue_comment(repo_name: str, issue_number: int, comment: str) -> str:
@@ -1111,7 +1617,7 @@ def add_issue_comment(repo_name: str, issue_number: int, comment: str) -> str:
         issue.create_comment(comment)
         return f"Comment added to issue #{issue_number}."
     except GithubException as e:
-        return f"Error: {e.data.get('message', str(e))}"
+        return f"Error: {_error_message(e)}"
 
 
 # =============================================================================
@@ -1133,19 +1639,17 @@ def get_repo_secrets_list(repo_name: str) -> str:
     repo = client.get_repo(repo_name)
 
     try:
-        secrets = repo.get_secrets()
-        secret_names = [s.name for s in secrets]
+        secret_names = _secret_names(repo)
 
         if not secret_names:
             return "No secrets found in repository."
 
-        result = "**Repository Secrets (names only):**\n"
-        for name in secret_names:
-            result += f"- `{name}`\n"
-        result += "\n*Note: Secret VALUES are never exposed. Use these names in your workflows/tests.*"
-        return result
+        parts = ["**Repository Secrets (names only):**\n"]
+        parts.extend(f"- `{name}`\n" for name in secret_names)
+        parts.append("\n*Note: Secret VALUES are never exposed. Use these names in your workflows/tests.*")
+        return "".join(parts)
     except GithubException as e:
-        return f"Error listing secrets: {e.data.get('message', str(e))}"
+        return f"Error listing secrets: {_error_message(e)}"
     except Exception as e:
         return f"Error: {e!s}"
 
@@ -1166,23 +1670,196 @@ def get_repo_variables(repo_name: str) -> str:
     repo = client.get_repo(repo_name)
 
     try:
-        variables = repo.get_variables()
-        var_dict = {v.name: v.value for v in variables}
+        var_dict = _variable_values(repo)
 
         if not var_dict:
             return "No variables found in repository."
 
-        result = "**Repository Variables:**\n```\n"
-        for name, value in var_dict.items():
-            result += f"{name}={value}\n"
-        result += "```"
-        return result
+        parts = ["**Repository Variables:**\n```\n"]
+        parts.extend(f"{name}={value}\n" for name, value in var_dict.items())
+        parts.append("```")
+        return "".join(parts)
     except GithubException as e:
-        return f"Error listing variables: {e.data.get('message', str(e))}"
+        return f"Error listing variables: {_error_message(e)}"
     except Exception as e:
         return f"Error: {e!s}"
 
 
+# Concurrent repos per multi-repo listing
+_MAX_REPO_FAN_OUT_WORKERS = 8
+
+
+def _fan_out_per_repo(repo_names: list[str], tool: Callable[[str], str]) -> str:
+    """Run a single-repo tool for every repo concurrently and join the reports in input order."""
+    unique_names = list(dict.fromkeys(repo_names))
+    if not unique_names:
+        return "ERROR: repo_names cannot be empty."
+    # Each call is a few blocking GETs - overlap them instead of paying one round trip per repo
+    with ThreadPoolExecutor(max_workers=min(_MAX_REPO_FAN_OUT_WORKERS, len(unique_names))) as executor:
+        reports = list(executor.map(tool, unique_names))
+    return "\n\n".join(f"## {name}\n{report}" for name, report in zip(unique_names, reports, strict=True))
+
+
+def get_secrets_for_repos(repo_names: list[str]) -> str:
+    """
+    Lists repository secret names for several repositories at once.
+
+    Args:
+        repo_names: Repositories in "owner/repo" format.
+
+    Returns:
+        One secrets section per repository (names only - values are never exposed).
+    """
+    return _fan_out_per_repo(repo_names, get_repo_secrets_list)
+
+
+def get_variables_for_repos(repo_names: list[str]) -> str:
+    """
+    Lists repository variables with their values for several repositories at once.
+
+    Args:
+        repo_names: Repositories in "owner/repo" format.
+
+    Returns:
+        One variables section per repository.
+    """
+    return _fan_out_per_repo(repo_names, get_repo_variables)
+
+
+# Env template names, in the order they're preferred
+_ENV_TEMPLATE_FILES = (".env.example", ".env.template", ".env.sample", "env.example", ".env.test.example")
+
+# "NAME=value" assignments in an env template, optionally prefixed with "export";
+# comment lines never match since "#" can't start a name
+_RE_ENV_KEY = re.compile(r"^[ \t]*(?:export[ \t]+)?([A-Za-z_][A-Za-z0-9_]*)[ \t]*=", re.MULTILINE)
+
+
+def _env_var_names(env_content: str) -> list[str]:
+    """Variable names assigned in an env template, in file order."""
+    return _RE_ENV_KEY.findall(env_content)
+
+
+# Secrets/variables listings: (repo API URL, kind) -> (listing, monotonic time it was read).
+# An agent turn typically calls get_env_template then build_env_from_github back to
+# back; within the TTL the second call needs no request at all, not even a 304.
+_env_listing_cache: dict[tuple[str, str], tuple[Any, float]] = {}
+_ENV_LISTING_CACHE_SIZE = 128
+_ENV_LISTING_TTL = 60.0
+
+
+def _cached_env_listing(repo: Repository, kind: str, fetch: Callable[[Repository], _T]) -> _T:
+    """Return a secrets/variables listing read within the last _ENV_LISTING_TTL seconds, else fetch it."""
+    key = (repo.url, kind)
+    cached = _env_listing_cache.get(key)
+    if cached is not None and time.monotonic() - cached[1] < _ENV_LISTING_TTL:
+        return cached[0]
+
+    listing = fetch(repo)
+    if len(_env_listing_cache) >= _ENV_LISTING_CACHE_SIZE:
+        _env_listing_cache.pop(next(iter(_env_listing_cache), None), None)  # Drop the oldest entry
+    _env_listing_cache[key] = (listing, time.monotonic())
+    return listing
+
+
+def _secret_names(repo: Repository) -> list[str]:
+    """Names of the repo's Actions secrets."""
+    return _cached_env_listing(repo, "secrets", _fetch_secret_names)
+
+
+def _variable_values(repo: Repository) -> dict[str, str]:
+    """The repo's Actions variables as {name: value}."""
+    return _cached_env_listing(repo, "variables", _fetch_variable_values)
+
+
+def _fetch_secret_names(repo: Repository) -> list[str]:
+    """Read the repo's Actions secret names from the API."""
+    # Conditional GET - once the TTL lapses, an unchanged list still comes back as a 304
+    data = _get_json_conditional(repo, f"{repo.url}/actions/secrets", {"per_page": 100})
+    if data["total_count"] <= len(data["secrets"]):
+        return [s["name"] for s in data["secrets"]]
+    return [s.name for s in repo.get_secrets()]
+
+
+def _fetch_variable_values(repo: Repository) -> dict[str, str]:
+    """Read the repo's Actions variables from the API."""
+    # The variables endpoint caps per_page at 30
+    data = _get_json_conditional(repo, f"{repo.url}/actions/variables", {"per_page": 30})
+    if data["total_count"] <= len(data["variables"]):
+        return {v["name"]: v["value"] for v in data["variables"]}
+    return {v.name: v.value for v in repo.get_variables()}
+
+
+def _read_env_template_file(repo: Repository, path: str, ref: str) -> str | None:
+    """Text of one candidate template file, or None if it doesn't exist."""
+    # The raw media type returns the file body itself - no base64 envelope to decode
+    return _fetch_raw_file(repo, path, ref)
+
+
+def _find_env_template_graphql(repo: Repository, repo_name: str, ref: str, template_files: tuple[str, ...]) -> tuple[str, str] | None:
+    """Probe every candidate template in one GraphQL query, one aliased object() per path.
+
+    Returns:
+        (template_path, content) of the first candidate that exists as a text blob, or None.
+    """
+    owner, name = repo_name.split("/", 1)
+    selections = "\n".join(f"    t{i}: object(expression: $e{i}) {{ ... on Blob {{ text }} }}" for i in range(len(template_files)))
+    declarations = "".join(f", $e{i}: String!" for i in range(len(template_files)))
+    query = f"query($owner: String!, $name: String!{declarations}) {{\n  repository(owner: $owner, name: $name) {{\n{selections}\n  }}\n}}"
+    variables = {"owner": owner, "name": name, **{f"e{i}": f"{ref}:{path}" for i, path in enumerate(template_files)}}
+
+    _, data = repo._requester.graphql_query(query, variables)
+    blobs = data["data"]["repository"] or {}
+    for i, path in enumerate(template_files):
+        text = (blobs.get(f"t{i}") or {}).get("text")
+        if text is not None:
+            return path, text
+    return None
+
+
+def _find_env_template_rest(repo: Repository, ref: str, template_files: tuple[str, ...], executor: ThreadPoolExecutor) -> tuple[str, str] | None:
+    """Probe the candidate templates with concurrent REST reads, keeping their priority order."""
+    futures = [executor.submit(_read_env_template_file, repo, path, ref) for path in template_files]
+    try:
+        for path, future in zip(template_files, futures, strict=True):
+            content = future.result()
+            if content is not None:
+                return path, content
+        return None
+    finally:
+        # Lower-priority probes still queued are no longer needed
+        for future in futures:
+            future.cancel()
+
+
+def _load_env_sources(
+    repo: Repository, repo_name: str, ref: str, template_files: tuple[str, ...]
+) -> tuple[tuple[str, str] | None, list[str], dict[str, str]]:
+    """Fetch the env template, secret names and variables concurrently.
+
+    All template candidates are probed with a single GraphQL query (REST probes
+    if GraphQL is unavailable) while secrets and variables - which GraphQL
+    doesn't expose - are read over REST alongside it.
+
+    Returns:
+        Tuple of ((template_path, content) or None, secret_names, variables).
+        The template is the first of template_files that exists.
+    """
+    with ThreadPoolExecutor(max_workers=len(template_files) + 2) as executor:
+        secrets_future = executor.submit(_secret_names, repo)
+        variables_future = executor.submit(_variable_values, repo)
+
+        try:
+            template = _find_env_template_graphql(repo, repo_name, ref, template_files)
+        except GithubException as e:
+            log.warning("graphql_env_template_failed", error=_error_message(e))
+            template = _find_env_template_rest(repo, ref, template_files, executor)
+
+        # Secrets and variables only enrich the report - an unreadable list counts as empty
+        secrets = secrets_future.result() if secrets_future.exception() is None else []
+        variables = variables_future.result() if variables_future.exception() is None else {}
+        return template, secrets, variables
+
+
 def get_env_template(repo_name: str, ref: str = "main") -> str:
     """
     Reads .env.example or similar template files.
@@ -1200,71 +1877,25 @@ def get_env_template(repo_name: str, ref: str = "main") -> str:
     client = _get_client()
     repo = client.get_repo(repo_name)
 
-    # Common env template file names
-    template_files = [
-        ".env.example",
-        ".env.template",
-        ".env.sample",
-        "env.example",
-        ".env.test.example",
-    ]
-
-    env_content = None
-    found_file = None
-
     try:
-        for template_file in template_files:
-            try:
-                content = repo.get_contents(template_file, ref=ref)
-                if content.encoding == "base64":
-                    import base64
-
-                    env_content = base64.b64decode(content.content).decode("utf-8")
-                else:
-                    env_content = content.decoded_content.decode("utf-8")
-                found_file = template_file
-                break
-            except GithubException:
-                continue
-
-        if not env_content:
+        template, secrets, variables = _load_env_sources(repo, repo_name, ref, _ENV_TEMPLATE_FILES)
+        if template is None or not template[1]:
             return "No environment template file found (.env.example, .env.template, etc.)"
+        found_file, env_content = template
 
-        # Parse the template to extract variable names
-        env_vars = []
-        for line in env_content.split("\n"):
-            line = line.strip()
-            if line and not line.startswith("#") and "=" in line:
-                var_name = line.split("=")[0].strip()
-                env_vars.append(var_name)
-
-        # Get available secrets and variables for cross-reference
-        try:
-            secrets = [s.name for s in repo.get_secrets()]
-        except Exception:
-            secrets = []
-
-        try:
-            variables = {v.name: v.value for v in repo.get_variables()}
-        except Exception:
-            variables = {}
+        env_vars = _env_var_names(env_content)
 
         # Build result with mapping
-        result = f"**Environment Template:** `{found_file}`\n\n"
-        result += "```env\n"
-        result += env_content
-        result += "\n```\n\n"
-
-        result += "**Variable Mapping:**\n"
+        parts = [f"**Environment Template:** `{found_file}`\n\n```env\n{env_content}\n```\n\n**Variable Mapping:**\n"]
         for var in env_vars:
             if var in secrets:
-                result += f"- `{var}` → ✅ Available as GitHub Secret\n"
+                parts.append(f"- `{var}` → ✅ Available as GitHub Secret\n")
             elif var in variables:
-                result += f"- `{var}` → ✅ Available as GitHub Variable: `{variables[var]}`\n"
+                parts.append(f"- `{var}` → ✅ Available as GitHub Variable: `{variables[var]}`\n")
             else:
-                result += f"- `{var}` → ⚠️ Not found in secrets/variables\n"
+                parts.append(f"- `{var}` → ⚠️ Not found in secrets/variables\n")
 
-        return result
+        return "".join(parts)
     except Exception as e:
         return f"Error reading environment template: {e!s}"
 
@@ -1290,39 +1921,10 @@ def build_env_from_github(repo_name: str, ref: str = "main") -> str:
     repo = client.get_repo(repo_name)
 
     try:
-        # Get available secrets and variables
-        try:
-            secrets = [s.name for s in repo.get_secrets()]
-        except Exception:
-            secrets = []
-
-        try:
-            variables = {v.name: v.value for v in repo.get_variables()}
-        except Exception:
-            variables = {}
+        # Template, secrets and variables are fetched concurrently
+        template, secrets, variables = _load_env_sources(repo, repo_name, ref, _ENV_TEMPLATE_FILES[:3])
 
-        # Try to read .env.example
-        template_files = [".env.example", ".env.template", ".env.sample"]
-        env_vars = []
-
-        for template_file in template_files:
-            try:
-                content = repo.get_contents(template_file, ref=ref)
-                if content.encoding == "base64":
-                    import base64
-
-                    decoded = base64.b64decode(content.content).decode("utf-8")
-                else:
-                    decoded = content.decoded_content.decode("utf-8")
-
-                for line in decoded.split("\n"):
-                    line = line.strip()
-                    if line and not line.startswith("#") and "=" in line:
-                        var_name = line.split("=")[0].strip()
-                        env_vars.append(var_name)
-                break
-            except GithubException:
-                continue
+        env_vars = _env_var_names(template[1]) if template is not None else []
 
         # Build the env config
         env_config: dict[str, Any] = {
@@ -1348,25 +1950,19 @@ def build_env_from_github(repo_name: str, ref: str = "main") -> str:
                 env_config["missing"].append(var)
 
         # Format output
-        result = "**Environment Configuration for Tests:**\n\n"
+        parts = ["**Environment Configuration for Tests:**\n\n"]
 
+        # json.dumps gives valid JSON (no trailing commas, quotes escaped) for the sandbox to parse
         if env_config["from_secrets"]:
-            result += "**Secrets to Inject (pass to sandbox):**\n```json\n"
-            result += "{\n"
-            for env_var, secret_name in env_config["from_secrets"].items():
-                result += f'  "{env_var}": "GITHUB_SECRET:{secret_name}",\n'
-            result += "}\n```\n\n"
+            secrets_map = {env_var: f"GITHUB_SECRET:{secret_name}" for env_var, secret_name in env_config["from_secrets"].items()}
+            parts.append(f"**Secrets to Inject (pass to sandbox):**\n```json\n{json.dumps(secrets_map, indent=2)}\n```\n\n")
 
         if env_config["from_variables"]:
-            result += "**Variables (direct values):**\n```json\n"
-            result += "{\n"
-            for env_var, value in env_config["from_variables"].items():
-                result += f'  "{env_var}": "{value}",\n'
-            result += "}\n```\n\n"
+            parts.append(f"**Variables (direct values):**\n```json\n{json.dumps(env_config['from_variables'], indent=2)}\n```\n\n")
 
         if env_config["missing"]:
-            result += f"**⚠️ Missing (not in secrets/variables):** {', '.join(env_config['missing'])}\n"
+            parts.append(f"**⚠️ Missing (not in secrets/variables):** {', '.join(env_config['missing'])}\n")
 
-        return result
+        return "".join(parts)
     except Exception as e:
         return f"Error building env config: {e!s}"
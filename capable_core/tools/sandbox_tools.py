@@ -3,29 +3,259 @@
 Provides isolated code execution using Docker containers or Vertex AI Code Execution.
 """
 
+import atexit
+import collections
+import concurrent.futures
+import contextlib
+import functools
+import hashlib
 import io
+import itertools
 import json
+import multiprocessing
 import os
-import tarfile
+import pathlib
+import re
+import shutil
+import tempfile
+import threading
 import time
+import urllib.parse
+from collections.abc import Callable, Iterator
 from dataclasses import dataclass, field
-from enum import Enum
+from enum import StrEnum
 from typing import Any
 
-import docker
 import structlog
 
 
+try:
+    import orjson  # Optional: faster JSON validation in validate_syntax
+except ImportError:
+    orjson = None
+
+from capable_core.config import settings
+
+
 log = structlog.get_logger()
 
 
-class ExecutionStatus(Enum):
-    """Execution result status."""
+# Test-summary patterns for _parse_test_output as (name, pattern), merged into
+# one alternation so the output is scanned once. At any position the earlier
+# alternative wins and consumes its text: multi-count summary lines (cargo,
+# Maven, Jest) come first so the generic "N passed"-style patterns don't count
+# their numbers a second time.
+_TEST_SUMMARY_PATTERNS = (
+    # cargo: "test result: ok. X passed; Y failed; Z ignored"
+    ("cargo", r"test result:.*?(?P<cargo_passed>\d+) passed;\s*(?P<cargo_failed>\d+) failed;\s*(?P<cargo_ignored>\d+) ignored"),
+    # Maven: "Tests run: X, Failures: Y, Errors: Z, Skipped: W"
+    (
+        "maven",
+        r"Tests run:\s*(?P<maven_run>\d+),\s*Failures:\s*(?P<maven_failures>\d+),\s*"
+        r"Errors:\s*(?P<maven_errors>\d+),\s*Skipped:\s*(?P<maven_skipped>\d+)",
+    ),
+    # Jest: "Tests: X passed, Y failed, Z total"
+    ("jest_passed", r"Tests:\s*(?P<jest_passed_count>\d+) passed"),
+    ("jest_failed", r"Tests:.*?(?P<jest_failed_count>\d+) failed"),
+    # pytest: "X passed, Y failed, Z skipped"
+    ("pytest_passed", r"(?P<pytest_passed_count>\d+) passed"),
+    ("pytest_failed", r"(?P<pytest_failed_count>\d+) failed"),
+    ("pytest_skipped", r"(?P<pytest_skipped_count>\d+) skipped"),
+    # Mocha: "X passing", "Y failing", "Z pending"
+    ("mocha_passing", r"(?P<mocha_passing_count>\d+) passing"),
+    ("mocha_failing", r"(?P<mocha_failing_count>\d+) failing"),
+    ("mocha_pending", r"(?P<mocha_pending_count>\d+) pending"),
+    # go test: one "--- PASS:" / "--- FAIL:" / "--- SKIP:" line per test
+    ("go", r"--- (?P<go_result>PASS|FAIL|SKIP):"),
+    # dotnet: "Passed: X, Failed: Y, Skipped: Z"
+    ("dotnet_passed", r"Passed:\s*(?P<dotnet_passed_count>\d+)"),
+    ("dotnet_failed", r"Failed:\s*(?P<dotnet_failed_count>\d+)"),
+    ("dotnet_skipped", r"Skipped:\s*(?P<dotnet_skipped_count>\d+)"),
+    # Coverage totals - Python "TOTAL ... XX%", Istanbul table and text-summary,
+    # go tool cover "total: (statements) XX.X%", go test / JaCoCo / generic
+    # "coverage: XX.X%", tarpaulin "XX.XX% coverage"
+    ("coverage_python", r"TOTAL\s+\d+\s+\d+\s+(?P<coverage_python_percent>\d+)%"),
+    ("coverage_istanbul_table", r"All files\s*\|\s*(?P<coverage_istanbul_table_percent>[\d.]+)"),
+    ("coverage_statements", r"Statements\s*:\s*(?P<coverage_statements_percent>[\d.]+)%"),
+    ("coverage_lines", r"Lines\s*:\s*(?P<coverage_lines_percent>[\d.]+)%"),
+    ("coverage_go_total", r"total:\s*\(statements\)\s*(?P<coverage_go_total_percent>[\d.]+)%"),
+    ("coverage_go", r"(?i:coverage):\s*(?P<coverage_go_percent>\d+(?:\.\d+)?)%"),
+    ("coverage_tarpaulin", r"(?P<coverage_tarpaulin_percent>\d+(?:\.\d+)?)%\s*coverage"),
+)
+_RE_TEST_SUMMARY = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in _TEST_SUMMARY_PATTERNS))
+
+# Coverage alternatives in the order they're preferred, with their value group
+_COVERAGE_GROUPS = (
+    ("coverage_python", "coverage_python_percent"),
+    ("coverage_istanbul_table", "coverage_istanbul_table_percent"),
+    ("coverage_statements", "coverage_statements_percent"),
+    ("coverage_lines", "coverage_lines_percent"),
+    ("coverage_go_total", "coverage_go_total_percent"),
+    ("coverage_go", "coverage_go_percent"),
+    ("coverage_tarpaulin", "coverage_tarpaulin_percent"),
+)
+
+
+def _priority_alternation(*patterns: str) -> re.Pattern[str]:
+    """Compile patterns, each with exactly one capture group, into one case-insensitive alternation.
+
+    The alternation sits in a lookahead so matches consume nothing: every start
+    position is tried, and a low-priority match can't swallow the text a
+    higher-priority one needs.
+    """
+    return re.compile("(?=" + "|".join(f"({pattern})" for pattern in patterns) + ")", re.IGNORECASE)
+
+
+def _search_by_priority(pattern: re.Pattern[str], text: str) -> str | None:
+    """Value captured by the earliest-listed alternative that matches anywhere in text.
+
+    Same result as trying each pattern in turn with re.search, in a single scan.
+    """
+    best_index = value = None
+    for match in pattern.finditer(text):
+        # Alternative k (from 0) is group 2k+1 with its value in group 2k+2; lastindex is the outer group
+        if best_index is None or match.lastindex < best_index:
+            best_index = match.lastindex
+            value = match[best_index + 1]
+            if best_index == 1:
+                break
+    return value
+
+
+def _errors_block(stderr: str, title: str = "Errors") -> str:
+    """Markdown section for a report's stderr, or an empty string when there was none."""
+    return f"### {title}\n```\n{stderr}\n```" if stderr else ""
+
+
+# Coverage percentage for run_tests_with_coverage, patterns in order of preference
+_RE_COVERAGE_PERCENT = _priority_alternation(
+    r"TOTAL\s+\d+\s+\d+\s+(\d+)%",  # Python pytest-cov
+    r"All files\s*\|\s*[\d.]+\s*\|\s*[\d.]+\s*\|\s*[\d.]+\s*\|\s*([\d.]+)",  # NYC/Istanbul
+    r"Coverage:\s*([\d.]+)%",  # Generic (case-insensitive)
+    r"(\d+(?:\.\d+)?)\s*%\s*coverage",  # "XX% coverage"
+)
+
+# Generic mutation-tool summary counts (mutmut, PIT, Stryker text), per figure in order of preference
+_RE_MUTATION_COUNTS = {
+    "total": _priority_alternation(r"(\d+)\s*mutants", r"Total:\s*(\d+)", r"(\d+)\s*mutations"),
+    "killed": _priority_alternation(r"Killed:\s*(\d+)", r"(\d+)\s*killed", r"(\d+)\s*detected"),
+    "survived": _priority_alternation(r"Survived:\s*(\d+)", r"(\d+)\s*survived", r"(\d+)\s*undetected"),
+    "score": _priority_alternation(r"Mutation\s*score:\s*([\d.]+)%?", r"Score:\s*([\d.]+)%?"),
+}
+
+# Stryker (JavaScript/TypeScript) summary lines for run_mutation_tests_on_branch, one
+# alternative per line kind so the output is scanned once
+_RE_STRYKER_SUMMARY = re.compile(
+    # "Instrumented 9 source file(s) with 425 mutant(s)"
+    r"(?P<instrumented>with\s+(?P<instrumented_total>\d+)\s+mutant)"
+    # "422/425 tested (0 survived, 21 timed out)"
+    r"|(?P<progress>(?P<tested>\d+)/(?P<progress_total>\d+)\s+tested\s*\((?P<survived>\d+)\s+survived,?\s*(?P<timed_out>\d+)?\s*timed\s*out\))"
+    # "Mutation score: 94.35%"
+    r"|(?P<score>(?i:Mutation\s+score)[:\s]+(?P<score_percent>\d+(?:\.\d+)?)\s*%)"
+)
+
+# What mutation tools print when the unmutated tests already fail: Stryker, mutmut, PIT
+_RE_MUTATION_BASELINE_FAILED = re.compile(
+    r"initial test run failed|failed tests in the initial test run|tests don't run cleanly without mutations|tests failing without mutation",
+    re.IGNORECASE,
+)
+
+# Bytes of stdout and of stderr kept per command. Output is streamed and only its
+# start and end are kept: reports show the first few KB (never more than
+# _CAPTURED_OUTPUT_HEAD_BYTES), and test and coverage summaries come last.
+_MAX_CAPTURED_OUTPUT_BYTES = 256 * 1024
+_CAPTURED_OUTPUT_HEAD_BYTES = 8 * 1024
+
+# Branch test, coverage and mutation reports show a few KB and parse summaries from
+# the end of the output, so their sandboxes keep less
+_BRANCH_CAPTURED_OUTPUT_BYTES = 64 * 1024
+
+# Coverage and mutation runs can print megabytes. _with_capped_output keeps their full
+# log in the container and sends back only the head, this much of the tail, and any
+# line the coverage and mutation patterns above might need
+_CAPPED_OUTPUT_TAIL_BYTES = 56 * 1024
+_SUMMARY_LINE_KEYWORDS = "total|all files|statements|lines|coverage|mutant|mutation|killed|survived|detected|score"
+# Heads the summary-line appendix, which is only added when the output was cut
+_SUMMARY_LINES_MARKER = "[summary lines]"
+
+# Machine-readable reports read back from branch runs when the command writes them,
+# preferred over scraping the text output: pytest-cov --cov-report=json, Jest/Istanbul
+# --coverageReporters=json-summary, and Stryker's json reporter
+_COVERAGE_REPORT_FILES = ("/app/repo/coverage.json", "/app/repo/coverage/coverage-summary.json")
+_STRYKER_REPORT_FILE = "/app/repo/reports/mutation/mutation.json"
+_MAX_COLLECTED_FILE_BYTES = 32 * 1024 * 1024
+
+
+def _with_capped_output(command: str) -> str:
+    """Wrap a shell command so only the head and tail of its output leave the container.
+
+    When either stream was cut, the summary lines from the cut part follow stdout
+    after a _SUMMARY_LINES_MARKER line.
+    """
+    head = _CAPTURED_OUTPUT_HEAD_BYTES
+    tail = _CAPPED_OUTPUT_TAIL_BYTES
+    return (
+        f"( {command}\n) > /tmp/capable.out 2> /tmp/capable.err; status=$?; "
+        f'fits() {{ [ "$(wc -c < "$1")" -le {head + tail} ]; }}; '
+        f'emit() {{ head -c {head} "$1"; fits "$1" || {{ echo; echo "[... truncated in the sandbox ...]"; }}; '
+        f'tail -c +{head + 1} "$1" | tail -c {tail}; }}; '
+        "emit /tmp/capable.out; emit /tmp/capable.err >&2; "
+        "if ! fits /tmp/capable.out || ! fits /tmp/capable.err; then "
+        f'echo; echo "{_SUMMARY_LINES_MARKER}"; grep -ihE "{_SUMMARY_LINE_KEYWORDS}" /tmp/capable.out /tmp/capable.err | tail -n 50; fi; '
+        "rm -f /tmp/capable.out /tmp/capable.err; exit $status"
+    )
+
+
+class _BoundedOutput:
+    """Keeps the first head_bytes and the last max_bytes - head_bytes of a byte stream fed in chunks."""
+
+    def __init__(self, max_bytes: int, head_bytes: int):
+        self.head = bytearray()
+        self.head_bytes = head_bytes
+        self.tail_bytes = max_bytes - head_bytes
+        self.chunks: collections.deque[bytes] = collections.deque()
+        self.size = 0
+        self.dropped = 0
+
+    def append(self, chunk: bytes) -> None:
+        """Add a chunk, dropping whole chunks that fall between the head and the tail."""
+        if len(self.head) < self.head_bytes:
+            room = self.head_bytes - len(self.head)
+            self.head += chunk[:room]
+            chunk = chunk[room:]
+            if not chunk:
+                return
+        self.chunks.append(chunk)
+        self.size += len(chunk)
+        while self.chunks and self.size - len(self.chunks[0]) >= self.tail_bytes:
+            # Whole chunks only - the final slice in text() trims the rest
+            dropped = self.chunks.popleft()
+            self.size -= len(dropped)
+            self.dropped += len(dropped)
+
+    def text(self) -> str:
+        """The kept output as text, with a note where anything was dropped."""
+        tail = b"".join(self.chunks)
+        cut = max(0, len(tail) - self.tail_bytes)
+        if not (self.dropped or cut):
+            # Nothing dropped: decode as one, so a character spanning the head boundary survives
+            return (bytes(self.head) + tail).decode("utf-8", errors="replace")
+        # The head/tail boundaries may split a multi-byte character, hence errors="replace"
+        head = self.head.decode("utf-8", errors="replace")
+        text = tail[cut:].decode("utf-8", errors="replace")
+        return f"{head}\n[... {self.dropped + cut} bytes truncated ...]\n{text}"
+
+
+class ExecutionStatus(StrEnum):
+    """Execution result status.
+
+    Values are upper-case as shown in reports, so members format directly.
+    """
 
-    SUCCESS = "success"
-    FAILURE = "failure"
-    TIMEOUT = "timeout"
-    ERROR = "error"
+    SUCCESS = "SUCCESS"
+    FAILURE = "FAILURE"
+    TIMEOUT = "TIMEOUT"
+    ERROR = "ERROR"
 
 
 @dataclass
@@ -41,6 +271,8 @@ class TestResult:
     tests_failed: int = 0
     tests_skipped: int = 0
     coverage_percent: float | None = None
+    # Report files the command wrote, by container path (see DockerSandbox.execute's collect)
+    files: dict[str, bytes] = field(default_factory=dict)
 
     def to_prompt(self) -> str:
         """Format result for LLM consumption."""
@@ -49,7 +281,7 @@ class TestResult:
         return f"""
 ## Test Execution Result {status_icon}
 
-**Status:** {self.status.value.upper()}
+**Status:** {self.status}
 **Exit Code:** {self.exit_code}
 **Duration:** {self.duration_seconds:.2f}s
 
@@ -63,7 +295,7 @@ class TestResult:
 ```
 {self.stdout[:3000]}
 ```
-{f"### Errors{chr(10)}```{chr(10)}{self.stderr[:1500]}{chr(10)}```" if self.stderr else ""}
+{_errors_block(self.stderr[:1500])}
 """
 
 
@@ -84,7 +316,7 @@ class MutationTestResult:
         return f"""
 ## Mutation Testing Result
 
-**Status:** {self.status.value.upper()}
+**Status:** {self.status}
 **Mutation Score:** {self.mutation_score:.1f}%
 
 ### Mutant Summary
@@ -98,13 +330,244 @@ class MutationTestResult:
 """
 
     def _format_survived(self) -> str:
-        if not self.survived_details:
-            return "None - all mutants were killed!"
+        return (
+            "\n".join(
+                f"- **{m.get('file', 'unknown')}:{m.get('line', '?')}** - {m.get('description', 'mutation survived')}"
+                for m in itertools.islice(self.survived_details, 10)  # Limit to 10
+            )
+            or "None - all mutants were killed!"
+        )
+
+
+# Warm containers kept between runs, per DockerSandbox._pool_key, least recently
+# released key first. Starting a container costs far more than an exec, and tools
+# build a new DockerSandbox per call. Only the container is kept warm: each command is
+# a fresh exec, so interpreter start-up and imports are paid per command (CRIU
+# checkpoints would need an experimental daemon).
+_PoolKey = tuple[str, str, int, bool, str, bool, tuple[tuple[str, str], ...], tuple[tuple[str, str], ...], str]
+_idle_containers: collections.OrderedDict[_PoolKey, list[Any]] = collections.OrderedDict()
+_idle_containers_lock = threading.Lock()
+_MAX_IDLE_CONTAINERS_PER_KEY = 2
+_MAX_IDLE_CONTAINERS = 8
+
+# Host directory bind-mounted at /app, per container id (use_bind_mount sandboxes only)
+_container_workdirs: dict[str, str] = {}
+
+# Code-file archives by content digest, most recent last. Tools running side by side
+# on the same code_files (run_quality_gate) upload one shared buffer instead of each
+# holding its own copy
+_code_archives: collections.OrderedDict[str, bytes] = collections.OrderedDict()
+_code_archives_lock = threading.Lock()
+_MAX_CACHED_CODE_ARCHIVES = 4
+
+# Readies a container for the pool: kills whatever the last run left running
+# (everything but the keep-alive PID 1 and this shell) and empties /app and /tmp,
+# dotfiles included. Installed packages and home directories stay.
+_RESET_WORKDIR_COMMAND = [
+    "sh",
+    "-c",
+    'for p in /proc/[0-9]*; do pid="${p#/proc/}"; [ "$pid" = 1 ] || [ "$pid" = $$ ] || kill -9 "$pid" 2>/dev/null; done; '
+    "rm -rf /app/* /app/.[!.]* /app/..?* /tmp/* /tmp/.[!.]* /tmp/..?*",
+]
+
+
+# docker run options for DockerSandbox(read_only=True)
+_READ_ONLY_CONTAINER_OPTIONS: dict[str, Any] = {
+    "read_only": True,
+    "tmpfs": {"/tmp": "rw,size=16m"},
+    "cap_drop": ["ALL"],
+    "security_opt": ["no-new-privileges"],
+}
+
+# Scratch tmpfs for the branch test, coverage and mutation runs: temp files, caches
+# and the capped-output capture stay in memory (charged to the memory limit) instead
+# of the container's overlay. exec because Docker mounts tmpfs noexec by default and
+# go test runs its binaries from /tmp
+_BRANCH_SCRATCH_TMPFS = {"/tmp": "rw,exec,nosuid,size=512m,mode=1777"}
+
+# Byte-compiles the stdlib and site-packages of a setup image that has Python. Official
+# images ship without .pyc files and a container's own writes are thrown away, so each
+# run would otherwise recompile everything it imports
+_PRECOMPILE_PYTHON_COMMAND = (
+    "command -v python3 > /dev/null || exit 0; python3 -m compileall -q -j 0 "
+    "$(python3 -c \"import sysconfig; print(*map(sysconfig.get_path, ('stdlib', 'purelib')))\") > /dev/null 2>&1 || true"
+)
+
+# Derived images with setup commands baked in, tagged by a hash of what went into them
+_SETUP_IMAGE_REPO = "capable-sandbox-setup"
+_SETUP_IMAGE_LABEL = "capable-sandbox.setup-image"
+
+# Package-manager download caches kept in named volumes, by image family (the image
+# name without registry or tag) and cache name, for the branch test, coverage and
+# mutation sandboxes. Volumes are per repository, so one repository's branches can't
+# plant packages in another's cache
+_DEPENDENCY_CACHE_DIRS = {
+    "python": {"pip": "/root/.cache/pip"},
+    "node": {"npm": "/root/.npm"},
+    "maven": {"maven": "/root/.m2"},
+    "golang": {"go-mod": "/go/pkg/mod", "go-build": "/root/.cache/go-build"},
+}
+_DEPENDENCY_CACHE_LABEL = "capable-sandbox.dependency-cache"
+_created_cache_volumes: set[str] = set()
+
+# Setup commands that only install declared dependencies, so running them ahead of
+# time against the manifests below gives the same result as running them per call.
+# Anything else (pip install ., builds, scripts) keeps running inline.
+_RE_BAKEABLE_SETUP = re.compile(
+    r"\s*(?:"
+    r"(?:python3? -m )?pip3? install(?:\s+(?![./]|-e\b|--editable\b)\S+)+"
+    r"|npm (?:install|ci|i)(?:\s+(?![./])\S+)*"
+    r"|yarn(?: install)?(?:\s+--\S+)*"
+    r"|go mod download"
+    r")\s*"
+)
+
+# Files copied into a setup image so installs can read them
+_RE_SETUP_MANIFEST = re.compile(r"requirements[\w.-]*\.txt|package(?:-lock)?\.json|npm-shrinkwrap\.json|yarn\.lock|\.npmrc|go\.(?:mod|sum)")
+
+# Setup image tags whose build failed; those setups run inline from then on
+_failed_setup_images: set[str] = set()
+
+
+def _docker() -> Any:
+    """The Docker SDK module, imported on first use.
+
+    It drags in requests, urllib3 and websocket-client, so importing this module
+    for its parsers or tool signatures shouldn't pay for it up front.
+    """
+    import docker  # Deferred: heavy import graph, only needed once a sandbox runs
+
+    return docker
+
+
+@functools.lru_cache(maxsize=1)
+def _github_token() -> str:
+    """GITHUB_TOKEN as seen on first use ("" when unset), shared by every tool call.
+
+    Read lazily rather than at import so a .env loaded after import still applies,
+    matching how the GitHub client picks up the token.
+    """
+    return os.getenv("GITHUB_TOKEN", "")
+
+
+# Seconds an unreachable daemon is reported as such before it's probed again
+_DOCKER_RETRY_SECONDS = 30.0
+_docker_unreachable_until = 0.0
+_docker_unreachable_error = ""
+
 
-        details = ""
-        for m in self.survived_details[:10]:  # Limit to 10
-            details += f"- **{m.get('file', 'unknown')}:{m.get('line', '?')}** - {m.get('description', 'mutation survived')}\n"
-        return details
+@functools.lru_cache(maxsize=1)
+def _connect_docker_client() -> Any:
+    """Connect to the Docker daemon; cached on success only."""
+    client = _docker().from_env()
+    client.ping()  # Verify connection
+    return client
+
+
+def _get_docker_client() -> Any:
+    """Return the process-wide Docker client, connecting on first use.
+
+    A failed connection is remembered for _DOCKER_RETRY_SECONDS, so a loop of
+    tool calls doesn't wait on a down (or hung) daemon every time, while a
+    restarted Docker Desktop is still picked up shortly after.
+
+    Raises:
+        docker.errors.DockerException: If the daemon is unreachable.
+    """
+    global _docker_unreachable_until, _docker_unreachable_error
+    if time.monotonic() < _docker_unreachable_until:
+        raise _docker().errors.DockerException(_docker_unreachable_error)
+    try:
+        return _connect_docker_client()
+    except Exception as e:
+        _docker_unreachable_until = time.monotonic() + _DOCKER_RETRY_SECONDS
+        _docker_unreachable_error = str(e)
+        raise
+
+
+def _forget_docker_client(error: Exception) -> None:
+    """Drop the cached client if ``error`` means the daemon has gone away.
+
+    The next sandbox then reports Docker as unavailable (for _DOCKER_RETRY_SECONDS)
+    and reconnects after that, instead of every call failing on a dead client.
+    """
+    import requests  # Deferred: docker-py's transport, only consulted once a call has failed
+
+    global _docker_unreachable_until, _docker_unreachable_error
+    if isinstance(error, requests.ConnectionError):
+        _connect_docker_client.cache_clear()
+        _docker_unreachable_until = time.monotonic() + _DOCKER_RETRY_SECONDS
+        _docker_unreachable_error = str(error)
+
+
+def _remove_container(container: Any) -> None:
+    """Stop and delete a sandbox container, logging rather than raising on failure."""
+    try:
+        container.stop(timeout=5)
+        container.remove()
+        log.info("sandbox_container_cleaned", container_id=container.short_id)
+    except Exception:
+        log.warning("sandbox_container_cleanup_failed", container_id=container.short_id)
+    workdir = _container_workdirs.pop(container.id, None)
+    if workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _write_workdir_files(workdir: str, files: dict[str, str]) -> None:
+    """Write files under a bind-mounted host directory, refusing paths that escape it."""
+    root = pathlib.Path(workdir).resolve()
+    for filename, content in files.items():
+        target = (root / filename).resolve()
+        if not target.is_relative_to(root):
+            raise ValueError(f"File path escapes the sandbox directory: {filename}")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(content.encode("utf-8"))
+
+
+@atexit.register
+def _remove_idle_containers() -> None:
+    """Tear down every warm container when the process exits."""
+    with _idle_containers_lock:
+        containers = [container for idle in _idle_containers.values() for container in idle]
+        _idle_containers.clear()
+    for container in containers:
+        _remove_container(container)
+
+
+def _prewarm_images(images: list[str]) -> None:
+    """Pull the images most tools run on, so the first tool call doesn't wait for the pull."""
+    try:
+        client = _get_docker_client()
+    except Exception:
+        return  # No Docker; DockerSandbox reports it when a tool actually runs
+    for image in images:
+        try:
+            client.images.get(image)
+        except _docker().errors.ImageNotFound:
+            log.info("sandbox_image_prewarming", image=image)
+            try:
+                client.images.pull(image)
+            except Exception as e:
+                log.warning("sandbox_image_prewarm_failed", image=image, error=str(e))
+        except Exception as e:
+            log.warning("sandbox_image_prewarm_failed", image=image, error=str(e))
+
+
+# Images pulled in the background once sandboxes are about to be used (not at import,
+# which would load docker for every importer); SANDBOX_PREWARM_IMAGES="" turns it off
+_PREWARM_IMAGES = [image.strip() for image in settings.sandbox.prewarm_images.split(",") if image.strip()]
+_prewarm_lock = threading.Lock()
+_prewarm_started = False
+
+
+def prewarm_sandbox_images() -> None:
+    """Start pulling the configured sandbox images in the background, once per process."""
+    global _prewarm_started
+    with _prewarm_lock:
+        if _prewarm_started or not _PREWARM_IMAGES:
+            return
+        _prewarm_started = True
+    threading.Thread(target=_prewarm_images, args=(_PREWARM_IMAGES,), name="sandbox-prewarm", daemon=True).start()
 
 
 class DockerSandbox:
@@ -113,7 +576,20 @@ class DockerSandbox:
     Language-agnostic - supports any Docker image and command.
     """
 
-    def __init__(self, image: str, timeout: int = 300, memory_limit: str = "512m", cpu_limit: float = 1.0):
+    def __init__(
+        self,
+        image: str,
+        timeout: int = 300,
+        memory_limit: str = "512m",
+        cpu_limit: float = 1.0,
+        use_bind_mount: bool | None = None,
+        network: str = "bridge",
+        read_only: bool = False,
+        affinity: str = "",
+        max_output_bytes: int = _MAX_CAPTURED_OUTPUT_BYTES,
+        tmpfs: dict[str, str] | None = None,
+        volumes: dict[str, str] | None = None,
+    ):
         """
         Initialize a Docker sandbox.
 
@@ -128,38 +604,92 @@ class DockerSandbox:
             timeout: Max execution time in seconds.
             memory_limit: Container memory limit.
             cpu_limit: CPU cores to allocate.
+            use_bind_mount: Write code files to a host directory bind-mounted at /app
+                instead of uploading a TAR archive. Needs a Docker daemon that
+                shares the host's temp directory (not a remote DOCKER_HOST).
+                Defaults to SANDBOX_USE_BIND_MOUNT.
+            network: Docker network mode; "none" for commands that need no network.
+            read_only: Run with a read-only root filesystem, a small /tmp tmpfs,
+                no capabilities and no privilege escalation. Code files and
+                archives can't be injected into such a sandbox.
+            affinity: Only reuse warm containers released by sandboxes with the
+                same affinity. Only /app and /tmp are emptied between runs, so
+                whatever setup installed elsewhere (pip, apt, files under /root)
+                is still there for the next run with this affinity.
+            max_output_bytes: Bytes of stdout and of stderr kept per command: the
+                first few KB and the rest from the end.
+            tmpfs: Extra tmpfs mounts, path to mount options. Not for /app: files
+                are injected with put_archive, which doesn't write into tmpfs mounts.
+            volumes: Named volumes to mount, volume name to path; created on
+                first use. Their contents outlive the container.
         """
         self.image = image
         self.timeout = timeout
         self.memory_limit = memory_limit
         self.cpu_limit = cpu_limit
+        self.use_bind_mount = settings.sandbox.use_bind_mount if use_bind_mount is None else use_bind_mount
+        self.network = network
+        self.read_only = read_only
+        self.affinity = affinity
+        self.max_output_bytes = max_output_bytes
+        self.tmpfs = tmpfs or {}
+        self.volumes = volumes or {}
         self.client = None
-        self._container = None
         self._docker_available = False
 
         # Try to connect to Docker
         try:
-            self.client = docker.from_env()
-            self.client.ping()  # Verify connection
+            self.client = _get_docker_client()
             self._docker_available = True
             log.info("docker_sandbox_initialized", image=image)
+            prewarm_sandbox_images()
         except Exception as e:
             log.warning("docker_not_available", error=str(e))
             self._docker_available = False
 
     def _create_tar_stream(self, files: dict[str, str]) -> io.BytesIO:
         """Creates a TAR archive from file dict."""
+        import tarfile  # Deferred: only the put_archive path needs it
+
         tar_buffer = io.BytesIO()
-        with tarfile.open(fileobj=tar_buffer, mode="w") as tar:
+        mtime = time.time()  # One timestamp for the batch; the default 0 reads as 1970 to build tools
+        with tarfile.open(fileobj=tar_buffer, mode="w|") as tar:
             for filename, content in files.items():
                 data = content.encode("utf-8")
                 info = tarfile.TarInfo(name=filename)
                 info.size = len(data)
+                info.mtime = mtime
                 tar.addfile(info, io.BytesIO(data))
         tar_buffer.seek(0)
         return tar_buffer
 
-    def execute(self, command: str, code_files: dict[str, str], env_vars: dict[str, str] | None = None) -> TestResult:
+    def _code_archive(self, files: dict[str, str]) -> bytes:
+        """The TAR archive of ``files``, shared with other sandboxes injecting the same content."""
+        digest = hashlib.sha256()
+        for filename, content in sorted(files.items()):
+            digest.update(f"{len(filename)}:{filename}{len(content)}:".encode())
+            digest.update(content.encode("utf-8"))
+        key = digest.hexdigest()
+        with _code_archives_lock:
+            archive = _code_archives.get(key)
+            if archive is not None:
+                _code_archives.move_to_end(key)
+                return archive
+        archive = self._create_tar_stream(files).getvalue()
+        with _code_archives_lock:
+            _code_archives[key] = archive
+            while len(_code_archives) > _MAX_CACHED_CODE_ARCHIVES:
+                _code_archives.popitem(last=False)
+        return archive
+
+    def execute(
+        self,
+        command: str,
+        code_files: dict[str, str],
+        env_vars: dict[str, str] | None = None,
+        archive: Any = None,
+        collect: tuple[str, ...] = (),
+    ) -> TestResult:
         """
         Executes a command in an isolated container.
 
@@ -167,13 +697,31 @@ class DockerSandbox:
             command: Shell command to run. Can be any valid shell command.
             code_files: Dict of {filepath: content} to inject.
             env_vars: Optional environment variables.
+            archive: Optional file-like TAR stream (plain, gzip, bzip2 or xz)
+                extracted into /app before the command; closed once uploaded.
+            collect: Container paths of report files to copy back into
+                ``TestResult.files`` if the command wrote them.
 
         Returns:
             TestResult with execution details.
         """
+        with self.session(code_files, archive) as run:
+            return run(command, env_vars, collect)
+
+    @contextlib.contextmanager
+    def session(self, code_files: dict[str, str] | None = None, archive: Any = None) -> Iterator[Callable[..., TestResult]]:
+        """Hold one container across several commands.
+
+        Code files and the archive are injected once, and installed dependencies
+        and build outputs carry over from one command to the next. Yields
+        ``run(command, env_vars=None, collect=())``, which returns a TestResult
+        just like ``execute``.
+        """
         # Check if Docker is available
         if not self._docker_available:
-            return TestResult(
+            if archive is not None:
+                archive.close()
+            unavailable = TestResult(
                 status=ExecutionStatus.ERROR,
                 exit_code=-1,
                 stdout="",
@@ -183,191 +731,368 @@ class DockerSandbox:
                 tests_failed=0,
                 tests_skipped=0,
             )
+            yield lambda command, env_vars=None, collect=(): unavailable
+            return
 
         container = None
+        setup_error: TestResult | None = None
+        # A failing command still leaves a usable container; only sandbox errors retire it
+        reusable = True
         start_time = time.time()
-
         try:
-            # Create container
-            container = self.client.containers.run(
-                self.image,
-                command="tail -f /dev/null",  # Keep alive
-                detach=True,
-                working_dir="/app",
-                mem_limit=self.memory_limit,
-                nano_cpus=int(self.cpu_limit * 1e9),
-                environment=env_vars or {},
-                network_mode="bridge",
-            )
+            container = self._acquire_container()
 
-            log.info("sandbox_container_started", container_id=container.short_id)
+            if archive is not None:
+                container.put_archive("/app", archive)
 
             # Inject code files
-            if code_files:
-                tar_stream = self._create_tar_stream(code_files)
-                container.put_archive("/app", tar_stream)
+            if code_files and self.use_bind_mount:
+                _write_workdir_files(_container_workdirs[container.id], code_files)
+            elif code_files:
+                container.put_archive("/app", self._code_archive(code_files))
+        except Exception as e:
+            log.error("sandbox_execution_failed", error=str(e))
+            _forget_docker_client(e)
+            setup_error = self._error_result(f"Sandbox error: {e!s}", start_time)
+        finally:
+            if archive is not None:
+                archive.close()
+
+        def run(command: str, env_vars: dict[str, str] | None = None, collect: tuple[str, ...] = ()) -> TestResult:
+            nonlocal reusable
+            if setup_error is not None:
+                return setup_error
+            result = self._run_command(container, command, env_vars, collect)
+            if result.status == ExecutionStatus.ERROR:
+                reusable = False
+            return result
+
+        try:
+            yield run
+        finally:
+            if container is not None:
+                self._release_container(container, reusable and setup_error is None)
 
+    def _run_command(self, container: Any, command: str, env_vars: dict[str, str] | None, collect: tuple[str, ...] = ()) -> TestResult:
+        """Run one shell command in the container, parse its output and copy back the ``collect`` files it wrote."""
+        start_time = time.time()
+        try:
             # Execute the main command (mask any tokens in logs)
-            github_token = os.getenv("GITHUB_TOKEN", "")
-            log_command = command.replace(github_token, "***") if github_token else command
-            log.info("sandbox_executing", command=log_command)
-            exit_code, output = container.exec_run(
-                f"sh -c '{command}'",
-                demux=True,  # Separate stdout/stderr
-            )
+            log.info("sandbox_executing", command=_redact_token(command)[0])
+            # Stream the output so a huge log is never held in memory whole; the
+            # low-level exec API is used because exec_run(stream=True) drops the exit code.
+            # Output arrives as frames on the daemon's API socket, not on pipes we own,
+            # and everything past the captured head and tail is dropped on arrival.
+            exec_id = self.client.api.exec_create(container.id, f"sh -c '{command}'", environment=env_vars or None)["Id"]
+            stdout_capture = _BoundedOutput(self.max_output_bytes, _CAPTURED_OUTPUT_HEAD_BYTES)
+            stderr_capture = _BoundedOutput(self.max_output_bytes, _CAPTURED_OUTPUT_HEAD_BYTES)
+            for stdout_chunk, stderr_chunk in self.client.api.exec_start(exec_id, stream=True, demux=True):
+                if stdout_chunk:
+                    stdout_capture.append(stdout_chunk)
+                if stderr_chunk:
+                    stderr_capture.append(stderr_chunk)
+            exit_code = self.client.api.exec_inspect(exec_id)["ExitCode"]
 
             duration = time.time() - start_time
-            stdout = output[0].decode("utf-8") if output[0] else ""
-            stderr = output[1].decode("utf-8") if output[1] else ""
+            stdout = stdout_capture.text()
+            stderr = stderr_capture.text()
 
             # Parse test results from multiple frameworks
             result = self._parse_test_output(stdout, stderr)
             result.exit_code = exit_code
             result.duration_seconds = duration
             result.status = ExecutionStatus.SUCCESS if exit_code == 0 else ExecutionStatus.FAILURE
-
+            if collect:
+                result.files = self._collect_files(container, collect, start_time)
             return result
 
-        except docker.errors.ContainerError as e:
-            return TestResult(
-                status=ExecutionStatus.ERROR,
-                exit_code=-1,
-                stdout="",
-                stderr=f"Container error: {e!s}",
-                duration_seconds=time.time() - start_time,
-            )
+        except _docker().errors.ContainerError as e:
+            return self._error_result(f"Container error: {e!s}", start_time)
         except Exception as e:
             log.error("sandbox_execution_failed", error=str(e))
-            return TestResult(
-                status=ExecutionStatus.ERROR,
-                exit_code=-1,
-                stdout="",
-                stderr=f"Sandbox error: {e!s}",
-                duration_seconds=time.time() - start_time,
-            )
-        finally:
-            if container:
-                try:
-                    container.stop(timeout=5)
-                    container.remove()
-                    log.info("sandbox_container_cleaned", container_id=container.short_id)
-                except Exception:
-                    log.warning("sandbox_container_cleanup_failed", container_id=container.short_id)
+            _forget_docker_client(e)
+            return self._error_result(f"Sandbox error: {e!s}", start_time)
+
+    @staticmethod
+    def _collect_files(container: Any, paths: tuple[str, ...], since: float) -> dict[str, bytes]:
+        """Contents of the files at ``paths`` modified since ``since``; missing, stale or oversized files are left out.
+
+        The age check keeps a report committed to the repository from passing
+        for one the command wrote.
+        """
+        import tarfile  # Deferred: only report collection reads archives back
+
+        files = {}
+        for path in paths:
+            try:
+                chunks, stat = container.get_archive(path)
+                if stat["size"] > _MAX_COLLECTED_FILE_BYTES:
+                    log.warning("sandbox_report_too_large", path=path, size=stat["size"])
+                    continue
+                with tarfile.open(fileobj=io.BytesIO(b"".join(chunks)), mode="r|") as tar:
+                    member = tar.next()
+                    if member is not None and member.isfile() and member.mtime >= int(since):
+                        files[path] = tar.extractfile(member).read()
+            except _docker().errors.NotFound:
+                continue
+            except Exception as e:
+                log.warning("sandbox_report_unreadable", path=path, error=str(e))
+        return files
+
+    @staticmethod
+    def _error_result(message: str, start_time: float) -> TestResult:
+        """Build the ERROR result reported when the sandbox itself fails."""
+        return TestResult(
+            status=ExecutionStatus.ERROR,
+            exit_code=-1,
+            stdout="",
+            stderr=message,
+            duration_seconds=time.time() - start_time,
+        )
+
+    def bake_setup(self, setup_commands: list[str], code_files: dict[str, str], workdir: str = "/app") -> bool:
+        """Switch to an image with ``setup_commands`` already applied, building it on first use.
+
+        Only dependency installs are baked, against the manifests found in
+        ``code_files`` placed under ``workdir``, where the commands run; the
+        image is reused by every later call with the same base image, commands,
+        manifests and workdir.
+
+        Returns:
+            True if the sandbox now runs on the setup image and the commands must
+            not be run again; False if they still need to run inline.
+        """
+        cache_size = settings.sandbox.setup_image_cache_size
+        if (
+            not self._docker_available
+            or self.use_bind_mount  # The mount would hide whatever setup left in /app
+            or cache_size <= 0
+            or not all(_RE_BAKEABLE_SETUP.fullmatch(command) for command in setup_commands)
+        ):
+            return False
+
+        manifests = {path: content for path, content in code_files.items() if _RE_SETUP_MANIFEST.fullmatch(pathlib.PurePosixPath(path).name)}
+        key = json.dumps([self.image, setup_commands, sorted(manifests.items()), workdir])
+        tag = f"{_SETUP_IMAGE_REPO}:{hashlib.sha256(key.encode()).hexdigest()[:16]}"
+        if tag in _failed_setup_images:
+            return False
+
+        errors = _docker().errors
+        try:
+            self.client.images.get(tag)
+        except errors.ImageNotFound:
+            dockerfile = f"FROM {self.image}\nWORKDIR {workdir}\n"
+            if manifests:
+                dockerfile += f"COPY app/ {workdir}/\n"
+            dockerfile += f"RUN {json.dumps(['sh', '-c', ' && '.join(setup_commands)])}\n"
+            dockerfile += f"RUN {json.dumps(['sh', '-c', _PRECOMPILE_PYTHON_COMMAND])}\n"
+            context = self._create_tar_stream({"Dockerfile": dockerfile, **{f"app/{path}": content for path, content in manifests.items()}})
+            log.info("sandbox_setup_image_building", tag=tag, base_image=self.image)
+            try:
+                self.client.images.build(
+                    fileobj=context,
+                    custom_context=True,
+                    tag=tag,
+                    labels={_SETUP_IMAGE_LABEL: self.image},
+                    rm=True,
+                    forcerm=True,
+                    timeout=self.timeout,
+                )
+            except (errors.BuildError, errors.APIError) as e:
+                log.warning("sandbox_setup_image_failed", tag=tag, error=str(e))
+                _failed_setup_images.add(tag)
+                return False
+            self._prune_setup_images(cache_size)
+        except errors.APIError as e:
+            log.warning("sandbox_setup_image_lookup_failed", tag=tag, error=str(e))
+            return False
+
+        self.image = tag
+        return True
+
+    def _prune_setup_images(self, keep: int) -> None:
+        """Remove the oldest setup images beyond ``keep``; images still in use are skipped."""
+        try:
+            images = self.client.images.list(filters={"label": _SETUP_IMAGE_LABEL})
+        except Exception as e:
+            log.warning("sandbox_setup_image_list_failed", error=str(e))
+            return
+        images.sort(key=lambda image: image.attrs.get("Created", ""), reverse=True)
+        for image in images[keep:]:
+            try:
+                self.client.images.remove(image.id)
+            except Exception as e:
+                log.warning("sandbox_setup_image_prune_failed", image_id=image.short_id, error=str(e))
+
+    @property
+    def _pool_key(self) -> _PoolKey:
+        """Containers are interchangeable when image, resource limits, mounts, isolation and affinity match."""
+        return (
+            self.image,
+            self.memory_limit,
+            int(self.cpu_limit * 1e9),
+            self.use_bind_mount,
+            self.network,
+            self.read_only,
+            tuple(sorted(self.tmpfs.items())),
+            tuple(sorted(self.volumes.items())),
+            self.affinity,
+        )
+
+    def _acquire_container(self) -> Any:
+        """Take a warm container for this configuration, or start a new one.
+
+        Pooled containers had /app emptied when released, so each run starts from
+        just the injected files. Environment variables are passed per exec.
+        """
+        while True:
+            with _idle_containers_lock:
+                idle = _idle_containers.get(self._pool_key)
+                container = idle.pop() if idle else None
+            if container is None:
+                break
+            try:
+                container.reload()
+                if container.status == "running":
+                    log.info("sandbox_container_reused", container_id=container.short_id)
+                    return container
+            except Exception as e:
+                log.warning("sandbox_container_unusable", container_id=container.short_id, error=str(e))
+            _remove_container(container)
+
+        workdir = tempfile.mkdtemp(prefix="capable-sandbox-") if self.use_bind_mount else None
+        options = {**_READ_ONLY_CONTAINER_OPTIONS} if self.read_only else {}
+        if self.tmpfs:
+            options["tmpfs"] = {**options.get("tmpfs", {}), **self.tmpfs}
+        mounts = {name: {"bind": path, "mode": "rw"} for name, path in self.volumes.items()}
+        for name in self.volumes.keys() - _created_cache_volumes:
+            # Labelled so they can be listed and removed together
+            self.client.volumes.create(name=name, labels={_DEPENDENCY_CACHE_LABEL: ""})
+            _created_cache_volumes.add(name)
+        if workdir:
+            mounts[workdir] = {"bind": "/app", "mode": "rw"}
+        container = self.client.containers.run(
+            self.image,
+            # Keep alive regardless of the image's own entrypoint (mvn, golangci-lint, ...)
+            entrypoint=["tail", "-f", "/dev/null"],
+            detach=True,
+            working_dir="/app",
+            mem_limit=self.memory_limit,
+            nano_cpus=self._pool_key[2],
+            network_mode=self.network,
+            volumes=mounts or None,
+            **options,
+        )
+        if workdir:
+            _container_workdirs[container.id] = workdir
+        log.info("sandbox_container_started", container_id=container.short_id)
+        return container
+
+    def _release_container(self, container: Any, reusable: bool) -> None:
+        """Return a container to the warm pool, or remove it if it's unusable or the pool is full.
+
+        Leftover processes are killed and /app and /tmp emptied before pooling,
+        so idle containers don't hold on to the previous run's code, and the
+        next caller doesn't wait for the cleanup.
+        """
+        # A setup image may keep installed dependencies in /app (node_modules), which the reset would wipe
+        if reusable and self.image.startswith(f"{_SETUP_IMAGE_REPO}:"):
+            reusable = False
+        if reusable:
+            with _idle_containers_lock:
+                reusable = len(_idle_containers.get(self._pool_key, ())) < _MAX_IDLE_CONTAINERS_PER_KEY
+        if reusable:
+            try:
+                reset_id = self.client.api.exec_create(container.id, _RESET_WORKDIR_COMMAND)["Id"]
+                self.client.api.exec_start(reset_id)
+                reusable = self.client.api.exec_inspect(reset_id)["ExitCode"] == 0
+            except Exception as e:
+                log.warning("sandbox_container_reset_failed", container_id=container.short_id, error=str(e))
+                reusable = False
+        if reusable:
+            evicted = []
+            with _idle_containers_lock:
+                idle = _idle_containers.setdefault(self._pool_key, [])
+                if len(idle) < _MAX_IDLE_CONTAINERS_PER_KEY:
+                    idle.append(container)
+                    _idle_containers.move_to_end(self._pool_key)
+                    container = None
+                    # Over the overall cap: retire the oldest idle container of the least recently used key
+                    while sum(map(len, _idle_containers.values())) > _MAX_IDLE_CONTAINERS:
+                        oldest_key, oldest = next(iter(_idle_containers.items()))
+                        evicted.append(oldest.pop(0))
+                        if not oldest:
+                            del _idle_containers[oldest_key]
+            for stale in evicted:
+                _remove_container(stale)
+            if container is None:
+                return
+        _remove_container(container)
 
     def _parse_test_output(self, stdout: str, stderr: str) -> TestResult:
         """Parses test output from multiple testing frameworks.
 
         Supports: pytest, jest, mocha, JUnit/Maven, go test, cargo test, dotnet test.
         """
-        passed = failed = skipped = 0
-        coverage = None
-        combined = stdout + "\n" + stderr
-
-        import re
+        # The summary-line appendix of a cut output repeats lines, so it only fills in
+        # summaries missing from the output itself and its go result lines aren't counted
+        body, _, appendix = stdout.partition(f"\n{_SUMMARY_LINES_MARKER}\n")
+        combined = body + "\n" + stderr
+
+        # One pass over the output: keep the first match of each summary pattern
+        # and count every go test result line
+        first: dict[str, re.Match[str]] = {}
+        go_results = {"PASS": 0, "FAIL": 0, "SKIP": 0}
+        for match in _RE_TEST_SUMMARY.finditer(combined):
+            name = match.lastgroup
+            if name == "go":
+                go_results[match["go_result"]] += 1
+            elif name not in first:
+                first[name] = match
+        for match in _RE_TEST_SUMMARY.finditer(appendix):
+            name = match.lastgroup
+            if name != "go" and name not in first:
+                first[name] = match
+
+        def count(name: str, group: str) -> int:
+            match = first.get(name)
+            return int(match[group]) if match else 0
+
+        maven_run = count("maven", "maven_run")
+        maven_failures = count("maven", "maven_failures")
+        maven_errors = count("maven", "maven_errors")
+        maven_skipped = count("maven", "maven_skipped")
+
+        passed = (
+            count("pytest_passed", "pytest_passed_count")
+            + count("jest_passed", "jest_passed_count")
+            + count("mocha_passing", "mocha_passing_count")
+            + (maven_run - maven_failures - maven_errors - maven_skipped)
+            + go_results["PASS"]
+            + count("cargo", "cargo_passed")
+            + count("dotnet_passed", "dotnet_passed_count")
+        )
+        failed = (
+            count("pytest_failed", "pytest_failed_count")
+            + count("jest_failed", "jest_failed_count")
+            + count("mocha_failing", "mocha_failing_count")
+            + maven_failures
+            + maven_errors
+            + go_results["FAIL"]
+            + count("cargo", "cargo_failed")
+            + count("dotnet_failed", "dotnet_failed_count")
+        )
+        skipped = (
+            count("pytest_skipped", "pytest_skipped_count")
+            + count("mocha_pending", "mocha_pending_count")
+            + maven_skipped
+            + go_results["SKIP"]
+            + count("cargo", "cargo_ignored")
+            + count("dotnet_skipped", "dotnet_skipped_count")
+        )
 
-        # ============== Python (pytest) ==============
-        # Format: "X passed, Y failed, Z skipped"
-        match = re.search(r"(\d+) passed", combined)
-        if match:
-            passed += int(match.group(1))
-        match = re.search(r"(\d+) failed", combined)
-        if match:
-            failed += int(match.group(1))
-        match = re.search(r"(\d+) skipped", combined)
-        if match:
-            skipped += int(match.group(1))
-
-        # ============== JavaScript (Jest/Mocha) ==============
-        # Jest: "Tests: X passed, Y failed, Z total"
-        match = re.search(r"Tests:\s*(\d+) passed", combined)
-        if match:
-            passed += int(match.group(1))
-        match = re.search(r"Tests:.*?(\d+) failed", combined)
-        if match:
-            failed += int(match.group(1))
-
-        # Mocha: "X passing", "Y failing"
-        match = re.search(r"(\d+) passing", combined)
-        if match:
-            passed += int(match.group(1))
-        match = re.search(r"(\d+) failing", combined)
-        if match:
-            failed += int(match.group(1))
-        match = re.search(r"(\d+) pending", combined)
-        if match:
-            skipped += int(match.group(1))
-
-        # ============== Java (JUnit/Maven/Gradle) ==============
-        # Maven: "Tests run: X, Failures: Y, Errors: Z, Skipped: W"
-        match = re.search(r"Tests run:\s*(\d+),\s*Failures:\s*(\d+),\s*Errors:\s*(\d+),\s*Skipped:\s*(\d+)", combined)
-        if match:
-            total_run = int(match.group(1))
-            failures = int(match.group(2))
-            errors = int(match.group(3))
-            skip = int(match.group(4))
-            passed += total_run - failures - errors - skip
-            failed += failures + errors
-            skipped += skip
-
-        # ============== Go (go test) ==============
-        # Format: "ok" or "FAIL", count "--- PASS:" and "--- FAIL:"
-        pass_matches = re.findall(r"--- PASS:", combined)
-        passed += len(pass_matches)
-        fail_matches = re.findall(r"--- FAIL:", combined)
-        failed += len(fail_matches)
-        skip_matches = re.findall(r"--- SKIP:", combined)
-        skipped += len(skip_matches)
-
-        # ============== Rust (cargo test) ==============
-        # Format: "test result: ok. X passed; Y failed; Z ignored"
-        match = re.search(r"test result:.*?(\d+) passed;\s*(\d+) failed;\s*(\d+) ignored", combined)
-        if match:
-            passed += int(match.group(1))
-            failed += int(match.group(2))
-            skipped += int(match.group(3))
-
-        # ============== .NET (dotnet test) ==============
-        # Format: "Passed: X, Failed: Y, Skipped: Z"
-        match = re.search(r"Passed:\s*(\d+)", combined)
-        if match:
-            passed += int(match.group(1))
-        match = re.search(r"Failed:\s*(\d+)", combined)
-        if match:
-            failed += int(match.group(1))
-        match = re.search(r"Skipped:\s*(\d+)", combined)
-        if match:
-            skipped += int(match.group(1))
-
-        # ============== Coverage (multiple formats) ==============
-        # Python coverage: "TOTAL ... XX%"
-        match = re.search(r"TOTAL\s+\d+\s+\d+\s+(\d+)%", combined)
-        if match:
-            coverage = float(match.group(1))
-        # Jest/Istanbul table: "All files |   85.71 |" (first number after All files)
-        if coverage is None:
-            match = re.search(r"All files\s*\|\s*([\d.]+)", combined)
-            if match:
-                coverage = float(match.group(1))
-        # Jest text-summary: "Statements   : 85.71% ( 6/7 )"
-        if coverage is None:
-            match = re.search(r"Statements\s*:\s*([\d.]+)%", combined)
-            if match:
-                coverage = float(match.group(1))
-        # Jest text-summary: "Lines        : 85.71% ( 6/7 )"
-        if coverage is None:
-            match = re.search(r"Lines\s*:\s*([\d.]+)%", combined)
-            if match:
-                coverage = float(match.group(1))
-        # Go coverage: "coverage: XX.X% of statements"
-        if coverage is None:
-            match = re.search(r"coverage:\s*(\d+(?:\.\d+)?)%", combined)
-            if match:
-                coverage = float(match.group(1))
-        # Rust tarpaulin: "XX.XX% coverage"
-        if coverage is None:
-            match = re.search(r"(\d+(?:\.\d+)?)%\s*coverage", combined)
-            if match:
-                coverage = float(match.group(1))
+        # First coverage format present, in order of preference
+        coverage = next((float(first[name][group]) for name, group in _COVERAGE_GROUPS if name in first), None)
 
         return TestResult(
             status=ExecutionStatus.SUCCESS,
@@ -382,6 +1107,323 @@ class DockerSandbox:
         )
 
 
+# Python sources at least this long are compiled in a worker process, so a big file
+# doesn't hold the GIL - and the agent's event loop - for the whole compile
+_COMPILE_IN_WORKER_MIN_CHARS = 256 * 1024
+_COMPILE_TIMEOUT_SECONDS = 30
+_compile_worker_broken = False
+
+
+@functools.lru_cache(maxsize=1)
+def _compile_pool() -> concurrent.futures.ProcessPoolExecutor:
+    """One long-lived compile worker, started on first use.
+
+    Spawned rather than forked: forking a process that runs other threads can
+    deadlock the child.
+    """
+    return concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _compile_source(code_content: str, filename: str) -> None:
+    """Compile without returning the code object, which can't cross a process boundary."""
+    compile(code_content, filename, "exec")
+
+
+def _compile_python(code_content: str, filename: str) -> None:
+    """Compile Python source, raising SyntaxError; large sources go to the worker process.
+
+    If the worker can't run (a spawned child re-imports ``__main__``, which fails
+    for e.g. stdin scripts), the source is compiled here and the worker is not
+    used again.
+    """
+    global _compile_worker_broken
+    if len(code_content) >= _COMPILE_IN_WORKER_MIN_CHARS and not _compile_worker_broken:
+        try:
+            _compile_pool().submit(_compile_source, code_content, filename).result(timeout=_COMPILE_TIMEOUT_SECONDS)
+            return
+        except concurrent.futures.process.BrokenProcessPool:
+            log.warning("compile_worker_unavailable")
+            _compile_worker_broken = True
+    _compile_source(code_content, filename)
+
+
+def _check_json(code_content: str) -> None:
+    """Raise json.JSONDecodeError if code_content isn't valid JSON.
+
+    orjson, when installed, clears valid documents faster; whatever it rejects is
+    re-parsed with json, which is more lenient (NaN, very large integers) and gives
+    the reported error position.
+    """
+    if orjson is not None:
+        try:
+            orjson.loads(code_content)
+            return
+        except orjson.JSONDecodeError:
+            pass
+    json.loads(code_content)
+
+
+@functools.lru_cache(maxsize=1)
+def _yaml() -> Any | None:
+    """PyYAML, imported the first time validate_syntax checks YAML, or None if it isn't installed."""
+    try:
+        import yaml  # Deferred: only YAML validation needs it
+    except ImportError:
+        return None
+    return yaml
+
+
+@functools.lru_cache(maxsize=3)
+def _tree_sitter_language(grammar: str) -> Any | None:
+    """The tree-sitter grammar "javascript", "typescript" or "tsx", or None without the ``syntax`` extra."""
+    try:
+        # Optional dependencies; validate_syntax falls back to Node.js in Docker without them
+        from tree_sitter import Language
+
+        if grammar == "javascript":
+            import tree_sitter_javascript
+
+            return Language(tree_sitter_javascript.language())
+        import tree_sitter_typescript
+
+        return Language(tree_sitter_typescript.language_tsx() if grammar == "tsx" else tree_sitter_typescript.language_typescript())
+    except ImportError:
+        return None
+
+
+def _first_syntax_error(node: Any) -> Any | None:
+    """First ERROR or MISSING node of a tree-sitter tree, in source order."""
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node.is_error or node.is_missing:
+            return node
+        stack.extend(reversed([child for child in node.children if child.has_error or child.is_missing]))
+    return None
+
+
+# Debug commands that only inspect the checkout; run_command_on_branch gives them a small
+# container. Used with fullmatch: a single inspection command, with no ;, &&, ||, |,
+# newline, backtick or $( that could chain or substitute something heavier
+_RE_READ_ONLY_COMMAND = re.compile(r"[ \t]*(?:cat|grep|find|ls|echo|head|tail|wc|pip list)(?:[ \t](?:[^;&|`$\n]|\$(?!\())*)?")
+
+# GitHub REST endpoint serving a snapshot of a ref as a gzipped tarball
+_GITHUB_TARBALL_URL = "https://api.github.com/repos/{repo}/tarball/{ref}"
+
+# GitHub REST endpoint resolving a ref to its commit (just the SHA, with the sha media type)
+_GITHUB_COMMIT_URL = "https://api.github.com/repos/{repo}/commits/{ref}"
+
+# Branch snapshots straight from codeload, outside the REST API and its rate limit;
+# public repositories only
+_GITHUB_CODELOAD_URL = "https://codeload.github.com/{repo}/tar.gz/refs/heads/{ref}"
+_RE_COMMIT_SHA = re.compile(r"[0-9a-f]{40}")
+
+# Branch tarballs on the host, by repo and commit, most recently used kept. The tools
+# of one review (tests, coverage, lint, mutation) all run on the same commit
+_TARBALL_CACHE_DIR = pathlib.Path(tempfile.gettempdir()) / "capable-branch-tarballs"
+_MAX_CACHED_TARBALLS = 8
+
+# Checkouts already resolved by a tool that fans out into several branch runs, by
+# (repo, branch): the archive's path (None for the git-clone fallback) and the
+# checkout commands. The runs open the path instead of looking the branch up again
+_pinned_checkouts: dict[tuple[str, str], tuple[str | None, list[str]]] = {}
+
+# Largest manifest read out of a branch tarball to bake the branch's setup
+_MAX_MANIFEST_BYTES = 1024 * 1024
+
+# Checkout for a setup image that already has /app/repo (manifests plus whatever the
+# installs left there, e.g. node_modules): copy the extracted tree over it
+_MERGE_CHECKOUT_COMMAND = 'for d in /app/*/; do [ "$d" = /app/repo/ ] || { cp -a "$d." /app/repo/ && rm -rf "$d"; }; done'
+
+# Installs git in the container unless the image already has it (debian/alpine/rhel).
+# Only git and the CA bundle for https - its other recommends (ssh client, perl
+# extras, less) roughly double the download. Branch tools pin warm containers to a
+# repo (_branch_affinity), so after the first run the check finds git already there
+_INSTALL_GIT_COMMAND = (
+    "command -v git > /dev/null"
+    " || (apt-get update -qq && apt-get install -y -qq --no-install-recommends git ca-certificates) > /dev/null 2>&1"
+    " || apk add --no-cache git > /dev/null 2>&1 || yum install -y --setopt=install_weak_deps=False git > /dev/null 2>&1 || true"
+)
+
+
+# git credential helper answering with $GITHUB_TOKEN from the container environment.
+# Double-quoted since commands run inside sh -c '...'; \$ defers expansion to git.
+_GIT_CREDENTIAL_HELPER = '"!f() { echo username=x-access-token; echo password=\\$GITHUB_TOKEN; }; f"'
+
+
+def _redact_token(*texts: str) -> tuple[str, ...]:
+    """The texts with the GitHub token masked, in case a command printed it."""
+    github_token = _github_token()
+    if not github_token:
+        return texts
+    return tuple(text.replace(github_token, "***") for text in texts)
+
+
+def _branch_affinity(repo_name: str, setup_commands: list[str] | None) -> str:
+    """Warm-container affinity for a repo's branch tools, so a reused container already has the repo's setup installed."""
+    return hashlib.sha256(json.dumps([repo_name, setup_commands or []]).encode()).hexdigest()[:16]
+
+
+def _download_tarball(url: str, headers: dict[str, str], path: pathlib.Path) -> None:
+    """Download a tarball to ``path``, atomically, then prune the cache down to _MAX_CACHED_TARBALLS."""
+    import requests  # Deferred: only the *_on_branch tools download anything
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, partial = tempfile.mkstemp(dir=path.parent, suffix=".part")
+    try:
+        with requests.get(url, headers=headers, stream=True, timeout=(10, 300)) as response, os.fdopen(fd, "wb") as out:
+            response.raise_for_status()
+            shutil.copyfileobj(response.raw, out, 1024 * 1024)
+        # Concurrent downloads of the same commit just replace one another
+        os.replace(partial, path)
+    except BaseException:
+        pathlib.Path(partial).unlink(missing_ok=True)
+        raise
+    cached = sorted(path.parent.glob("*.tar.gz"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for stale in cached[_MAX_CACHED_TARBALLS:]:
+        stale.unlink(missing_ok=True)
+
+
+@functools.lru_cache(maxsize=_MAX_CACHED_TARBALLS)
+def _cached_tarball_manifests(path: str) -> dict[str, str]:
+    """`_tarball_manifests` of a tarball in _TARBALL_CACHE_DIR, whose name pins its commit."""
+    return _tarball_manifests(path)
+
+
+def _tarball_manifests(path: str) -> dict[str, str]:
+    """Dependency manifests in a branch tarball, by path inside the repo."""
+    import tarfile  # Deferred: only branch setup baking reads tarballs
+
+    manifests = {}
+    with tarfile.open(path, "r:gz") as tar:
+        for member in tar:
+            # Members are "owner-repo-sha/<path>"; vendored dependencies carry manifests of their own
+            _, _, name = member.name.partition("/")
+            if (
+                member.isfile()
+                and member.size <= _MAX_MANIFEST_BYTES
+                and _RE_SETUP_MANIFEST.fullmatch(pathlib.PurePosixPath(name).name)
+                and "node_modules" not in pathlib.PurePosixPath(name).parts
+            ):
+                manifests[name] = tar.extractfile(member).read().decode("utf-8", errors="replace")
+    return manifests
+
+
+def _dependency_cache_volumes(docker_image: str, repo_name: str, setup_commands: list[str] | None) -> dict[str, str]:
+    """Dependency cache volumes (name to path) for a branch sandbox; none when the setup opts out of caching."""
+    if any("--no-cache" in command for command in setup_commands or ()):
+        return {}
+    family = docker_image.rsplit("/", 1)[-1].split(":", 1)[0]
+    scope = hashlib.sha256(repo_name.encode()).hexdigest()[:12]
+    return {f"capable-cache-{scope}-{name}": path for name, path in _DEPENDENCY_CACHE_DIRS.get(family, {}).items()}
+
+
+def _branch_setup_commands(sandbox: DockerSandbox, archive: Any, checkout_commands: list[str], setup_commands: list[str] | None) -> list[str]:
+    """Commands that check out the branch and run its setup, with the setup baked into the sandbox's image when possible.
+
+    Baking needs the branch's manifests on the host, so only a downloaded tarball
+    (not the git-clone fallback) qualifies. Only tarballs in _TARBALL_CACHE_DIR are
+    named by commit; a codeload temp file's path is reused by later downloads, so
+    its manifests are read afresh every time.
+    """
+    if not setup_commands:
+        return checkout_commands
+    if archive is not None and isinstance(getattr(archive, "name", None), str):
+        import tarfile  # Deferred: only branch setup baking reads tarballs
+
+        path = pathlib.Path(archive.name)
+        read_manifests = _cached_tarball_manifests if path.parent == _TARBALL_CACHE_DIR else _tarball_manifests
+        try:
+            manifests = read_manifests(archive.name)
+        except (OSError, EOFError, tarfile.TarError) as e:
+            log.warning("branch_manifests_unreadable", error=str(e))
+        else:
+            if sandbox.bake_setup(setup_commands, manifests, workdir="/app/repo"):
+                return [_MERGE_CHECKOUT_COMMAND, "cd /app/repo"]
+    return [*checkout_commands, *setup_commands]
+
+
+def _branch_checkout(repo_name: str, branch_name: str, github_token: str) -> tuple[Any | None, list[str]]:
+    """How to get a branch into /app/repo: (archive to extract into /app, commands to run first).
+
+    Prefers GitHub's tarball of the branch's head commit, downloaded once per
+    commit on the host, so the image needs neither git nor a package-index
+    refresh and back-to-back tools on one commit don't download it again. The
+    snapshot has no .git directory. If the tarball can't be fetched, the branch
+    is cloned inside the container instead.
+    """
+    import requests  # Deferred: only the *_on_branch tools download anything
+
+    pinned = _pinned_checkouts.get((repo_name, branch_name))
+    if pinned is not None:
+        path, commands = pinned
+        try:
+            return (pathlib.Path(path).open("rb") if path else None), list(commands)
+        except OSError as e:
+            # A cached tarball pruned in the meantime - look the branch up as usual
+            log.warning("pinned_checkout_unavailable", repo=repo_name, branch=branch_name, error=str(e))
+
+    headers = {"Accept": "application/vnd.github+json"}
+    if github_token:
+        headers["Authorization"] = f"Bearer {github_token}"
+    try:
+        response = requests.get(
+            _GITHUB_COMMIT_URL.format(repo=repo_name, ref=urllib.parse.quote(branch_name, safe="/")),
+            headers={**headers, "Accept": "application/vnd.github.sha"},
+            timeout=10,
+        )
+        response.raise_for_status()
+        sha = response.text.strip()
+        if not _RE_COMMIT_SHA.fullmatch(sha):
+            raise ValueError(f"Unexpected commit SHA for {branch_name}: {sha[:80]!r}")
+        path = _TARBALL_CACHE_DIR / f"{repo_name.replace('/', '__')}-{sha}.tar.gz"
+        if path.exists():
+            path.touch()  # Most recently used survives pruning
+            log.info("branch_tarball_cached", repo=repo_name, branch=branch_name, sha=sha)
+        else:
+            _download_tarball(_GITHUB_TARBALL_URL.format(repo=repo_name, ref=sha), headers, path)
+        # Docker extracts the gzipped archive; its one top-level directory, owner-repo-sha, becomes /app/repo
+        return path.open("rb"), ["mv /app/*/ /app/repo", "cd /app/repo"]
+    except (requests.RequestException, OSError, ValueError) as e:
+        log.warning("branch_tarball_unavailable", repo=repo_name, branch=branch_name, error=str(e))
+
+    # Still no git needed when codeload has the branch. The commit isn't known, so the
+    # download is a temp file rather than a cache entry
+    archive = tempfile.NamedTemporaryFile(suffix=".tar.gz")  # noqa: SIM115 - the sandbox closes (and so deletes) it
+    try:
+        url = _GITHUB_CODELOAD_URL.format(repo=repo_name, ref=urllib.parse.quote(branch_name, safe="/"))
+        with requests.get(url, stream=True, timeout=(10, 300)) as response:
+            response.raise_for_status()
+            shutil.copyfileobj(response.raw, archive, 1024 * 1024)
+        archive.seek(0)
+        return archive, ["mv /app/*/ /app/repo", "cd /app/repo"]
+    except (requests.RequestException, OSError) as e:
+        archive.close()
+        log.warning("branch_codeload_unavailable", repo=repo_name, branch=branch_name, error=str(e))
+
+    # The token reaches git through the GITHUB_TOKEN env var, never the command line or the remote URL
+    credentials = f"-c credential.helper={_GIT_CREDENTIAL_HELPER} " if github_token else ""
+    clone = f"git -c protocol.version=2 {credentials}clone --depth 1 --no-tags --branch {branch_name} https://github.com/{repo_name}.git /app/repo"
+    return None, [_INSTALL_GIT_COMMAND, clone, "cd /app/repo"]
+
+
+def _prepare_branch_run(
+    sandbox: DockerSandbox, repo_name: str, branch_name: str, setup_commands: list[str] | None
+) -> tuple[Any | None, list[str], dict[str, str]]:
+    """What every *_on_branch tool runs before its own command.
+
+    Returns:
+        The archive to extract, the checkout and setup commands (ending in
+        /app/repo) and the environment variables for the run.
+    """
+    github_token = _github_token()
+    archive, commands = _branch_checkout(repo_name, branch_name, github_token)
+    commands = _branch_setup_commands(sandbox, archive, commands, setup_commands)
+    if commands[-1] != "cd /app/repo":
+        commands.append("cd /app/repo")  # Setup commands may leave the shell elsewhere
+    return archive, commands, {"GITHUB_TOKEN": github_token} if github_token else {}
+
+
 # =============================================================================
 # TOOL FUNCTIONS (For Agent Use)
 # =============================================================================
@@ -394,7 +1436,7 @@ def run_in_sandbox(
     setup_commands: list[str] | None = None,
     env_vars: dict[str, str] | None = None,
     timeout: int = 300,
-    memory_limit: str = "1g",
+    memory_limit: str = "512m",
 ) -> str:
     """
     Executes any command in an isolated Docker container.
@@ -418,7 +1460,7 @@ def run_in_sandbox(
                         (e.g., ["pip install -r requirements.txt", "npm install"]).
         env_vars: Optional environment variables for the container.
         timeout: Maximum execution time in seconds (default: 300).
-        memory_limit: Container memory limit (default: "1g").
+        memory_limit: Container memory limit (default: "512m").
 
     Returns:
         Execution result with stdout, stderr, exit code, and duration.
@@ -444,8 +1486,8 @@ Docker Desktop is not running. Please start Docker Desktop and try again.
 
     # Build full command with setup
     full_command = command
-    if setup_commands:
-        full_command = " && ".join(setup_commands) + f" && {command}"
+    if setup_commands and not sandbox.bake_setup(setup_commands, code_files or {}):
+        full_command = " && ".join([*setup_commands, command])
 
     result = sandbox.execute(command=full_command, code_files=code_files or {}, env_vars=env_vars)
 
@@ -465,7 +1507,7 @@ Docker Desktop is not running. Please start Docker Desktop and try again.
 ```
 {result.stdout[:4000]}
 ```
-{f"### Errors{chr(10)}```{chr(10)}{result.stderr[:2000]}{chr(10)}```" if result.stderr else ""}
+{_errors_block(result.stderr[:2000])}
 """
 
 
@@ -527,8 +1569,8 @@ Docker Desktop is not running. Please start Docker Desktop and try again.
 
     # Build command with setup
     full_command = test_command
-    if setup_commands:
-        full_command = " && ".join(setup_commands) + f" && {test_command}"
+    if setup_commands and not sandbox.bake_setup(setup_commands, code_files):
+        full_command = " && ".join([*setup_commands, test_command])
 
     result = sandbox.execute(command=full_command, code_files=code_files)
 
@@ -592,32 +1634,16 @@ def run_tests_with_coverage(
 
     # Build command with setup
     full_command = coverage_command
-    if setup_commands:
-        full_command = " && ".join(setup_commands) + f" && {coverage_command}"
+    if setup_commands and not sandbox.bake_setup(setup_commands, code_files):
+        full_command = " && ".join([*setup_commands, coverage_command])
 
-    result = sandbox.execute(command=full_command, code_files=code_files)
+    result = sandbox.execute(command=_with_capped_output(full_command), code_files=code_files)
 
     prompt = result.to_prompt()
 
     # Try to parse coverage from output (works for many formats)
-    import re
-
-    coverage = None
-
-    # Common coverage output patterns
-    patterns = [
-        r"TOTAL\s+\d+\s+\d+\s+(\d+)%",  # Python pytest-cov
-        r"All files\s*\|\s*[\d.]+\s*\|\s*[\d.]+\s*\|\s*[\d.]+\s*\|\s*([\d.]+)",  # NYC/Istanbul
-        r"Coverage:\s*([\d.]+)%",  # Generic
-        r"coverage:\s*([\d.]+)%",  # Generic lowercase
-        r"(\d+(?:\.\d+)?)\s*%\s*coverage",  # "XX% coverage"
-    ]
-
-    for pattern in patterns:
-        match = re.search(pattern, result.stdout, re.IGNORECASE)
-        if match:
-            coverage = float(match.group(1))
-            break
+    value = _search_by_priority(_RE_COVERAGE_PERCENT, result.stdout)
+    coverage = float(value) if value is not None else None
 
     # Add coverage gate result
     if coverage is not None:
@@ -680,13 +1706,16 @@ def run_mutation_tests(
 
     # First run normal tests to establish baseline
     baseline_cmd = test_command
-    if setup_commands:
-        baseline_cmd = " && ".join(setup_commands) + f" && {test_command}"
+    if setup_commands and not sandbox.bake_setup(setup_commands, code_files):
+        baseline_cmd = " && ".join([*setup_commands, test_command])
 
-    test_result = sandbox.execute(command=baseline_cmd, code_files=code_files)
+    # Baseline and mutation run in one container, so files are injected and
+    # setup commands run only once
+    with sandbox.session(code_files) as run:
+        test_result = run(baseline_cmd)
 
-    if test_result.status != ExecutionStatus.SUCCESS:
-        return f"""
+        if test_result.status != ExecutionStatus.SUCCESS:
+            return f"""
 ## Mutation Testing Skipped ❌
 
 **Baseline tests failed.** Cannot run mutation tests until all tests pass.
@@ -694,42 +1723,16 @@ def run_mutation_tests(
 {test_result.to_prompt()}
 """
 
-    # Run mutation tests
-    mutation_cmd = mutation_command
-    if setup_commands:
-        mutation_cmd = " && ".join(setup_commands) + f" && {mutation_command}"
-
-    mutation_result = sandbox.execute(command=mutation_cmd, code_files=code_files)
+        # Run mutation tests
+        mutation_result = run(_with_capped_output(mutation_command))
 
     # Parse mutation output (try common patterns)
-    import re
-
-    total = killed = survived = 0
-    score = 0.0
-
     output = mutation_result.stdout + mutation_result.stderr
-
-    # Try various mutation testing output patterns
-    patterns = {
-        "total": [r"(\d+)\s*mutants", r"Total:\s*(\d+)", r"(\d+)\s*mutations"],
-        "killed": [r"Killed:\s*(\d+)", r"(\d+)\s*killed", r"(\d+)\s*detected"],
-        "survived": [r"Survived:\s*(\d+)", r"(\d+)\s*survived", r"(\d+)\s*undetected"],
-        "score": [r"Mutation\s*[sS]core:\s*([\d.]+)%?", r"Score:\s*([\d.]+)%?"],
-    }
-
-    for key, pattern_list in patterns.items():
-        for pattern in pattern_list:
-            match = re.search(pattern, output, re.IGNORECASE)
-            if match:
-                if key == "total":
-                    total = int(match.group(1))
-                elif key == "killed":
-                    killed = int(match.group(1))
-                elif key == "survived":
-                    survived = int(match.group(1))
-                elif key == "score":
-                    score = float(match.group(1))
-                break
+    counts = {key: _search_by_priority(pattern, output) for key, pattern in _RE_MUTATION_COUNTS.items()}
+    total = int(counts["total"] or 0)
+    killed = int(counts["killed"] or 0)
+    survived = int(counts["survived"] or 0)
+    score = float(counts["score"] or 0)
 
     # Calculate score if not found but we have killed/total
     if score == 0 and total > 0:
@@ -772,7 +1775,8 @@ def validate_syntax(code_content: str, filename: str, language: str = "python")
         filename: Filename for error reporting.
         language: Programming language. Supports:
                   - "python" (uses compile())
-                  - "javascript" / "typescript" (uses esprima/tsc via Docker)
+                  - "javascript" / "typescript" (tree-sitter in-process with the
+                    ``syntax`` extra installed, otherwise Node.js via Docker)
                   - "json" (uses json.loads)
                   - "yaml" (uses yaml.safe_load)
 
@@ -787,7 +1791,7 @@ def validate_syntax(code_content: str, filename: str, language: str = "python")
 
     if language == "python":
         try:
-            compile(code_content, filename, "exec")
+            _compile_python(code_content, filename)
             return f"✅ **Syntax Valid:** {filename} has no Python syntax errors."
         except SyntaxError as e:
             return f"""
@@ -802,7 +1806,7 @@ def validate_syntax(code_content: str, filename: str, language: str = "python")
 
     elif language == "json":
         try:
-            json.loads(code_content)
+            _check_json(code_content)
             return f"✅ **Syntax Valid:** {filename} is valid JSON."
         except json.JSONDecodeError as e:
             return f"""
@@ -812,17 +1816,34 @@ def validate_syntax(code_content: str, filename: str, language: str = "python")
 """
 
     elif language == "yaml":
+        yaml = _yaml()
+        if yaml is None:
+            return f"⚠️ Cannot validate YAML syntax - PyYAML is not installed. File: {filename}"
         try:
-            import yaml
-
             yaml.safe_load(code_content)
             return f"✅ **Syntax Valid:** {filename} is valid YAML."
-        except Exception as e:
+        except yaml.YAMLError as e:
             return f"❌ **YAML Syntax Error in {filename}:** {e!s}"
 
     elif language in ["javascript", "js", "typescript", "ts"]:
-        # Use Docker for JS/TS syntax check
-        sandbox = DockerSandbox(image="node:22-slim", timeout=30, memory_limit="256m")
+        # Parse in-process when the tree-sitter grammars are installed - no container start
+        typescript = language in ("typescript", "ts")
+        grammar = ("tsx" if filename.endswith(".tsx") else "typescript") if typescript else "javascript"
+        language_name = "TypeScript" if typescript else "JavaScript"
+        ts_language = _tree_sitter_language(grammar)
+        if ts_language is not None:
+            from tree_sitter import Parser  # Optional dependency, known to be installed here
+
+            error = _first_syntax_error(Parser(ts_language).parse(code_content.encode("utf-8")).root_node)
+            if error is None:
+                return f"✅ **Syntax Valid:** {filename} has no {language_name} syntax errors."
+            snippet = error.text.decode("utf-8", errors="replace").strip().split("\n", 1)[0][:40]
+            problem = f"missing `{error.type}`" if error.is_missing else f"unexpected `{snippet or error.type}`"
+            row, column = error.start_point
+            return f"❌ **{language_name} Syntax Error in {filename}:** Line {row + 1}, Column {column + 1}: {problem}"
+
+        # Use Docker for JS/TS syntax check; the code travels in the command, so it needs no network or writes
+        sandbox = DockerSandbox(image="node:22-slim", timeout=30, memory_limit="256m", network="none", read_only=True)
         if not sandbox._docker_available:
             return "⚠️ Cannot validate JS/TS syntax - Docker not available."
 
@@ -893,8 +1914,8 @@ def lint_code(code_files: dict[str, str], lint_command: str, docker_image: str,
 
     # Build command with setup
     full_command = lint_command
-    if setup_commands:
-        full_command = " && ".join(setup_commands) + f" && {lint_command}"
+    if setup_commands and not sandbox.bake_setup(setup_commands, code_files):
+        full_command = " && ".join([*setup_commands, lint_command])
 
     result = sandbox.execute(command=full_command, code_files=code_files)
 
@@ -910,12 +1931,75 @@ def lint_code(code_files: dict[str, str], lint_command: str, docker_image: str,
 ```
 {result.stdout[:3000]}
 ```
-{f"### Errors{chr(10)}```{chr(10)}{result.stderr[:1000]}{chr(10)}```" if result.stderr else ""}
+{_errors_block(result.stderr[:1000])}
 
 **ACTION:** Please fix the linting issues above.
 """
 
 
+def run_quality_gate(
+    code_files: dict[str, str],
+    lint_command: str,
+    test_command: str,
+    coverage_command: str,
+    docker_image: str,
+    setup_commands: list[str] | None = None,
+    min_coverage: float = 80.0,
+) -> str:
+    """
+    Runs linting, tests and coverage on the same code files concurrently.
+
+    Equivalent to calling `lint_code`, `run_tests_in_sandbox` and
+    `run_tests_with_coverage` one after another, but each phase runs in its own
+    container so the gate takes as long as the slowest phase instead of all three.
+
+    Args:
+        code_files: Dict of {filepath: content}, including source and test files.
+        lint_command: The linting command to run (e.g., "ruff check .").
+        test_command: The test command to run (e.g., "pytest -v").
+        coverage_command: Test command WITH coverage reporting
+                          (e.g., "pytest --cov=. --cov-report=term-missing").
+        docker_image: Docker image to use (latest stable for your language).
+        setup_commands: Commands to install dependencies, test, lint and coverage tools.
+        min_coverage: Minimum required coverage percentage (default: 80%).
+
+    Returns:
+        The lint, test and coverage reports, one section each.
+
+    Example:
+        >>> run_quality_gate(
+        ...     code_files={"app.py": "...", "test_app.py": "..."},
+        ...     lint_command="ruff check .",
+        ...     test_command="pytest -v",
+        ...     coverage_command="pytest --cov=. --cov-report=term-missing",
+        ...     docker_image="python:3.12-slim",
+        ...     setup_commands=["pip install pytest pytest-cov ruff"],
+        ... )
+    """
+    sandbox = DockerSandbox(image=docker_image)
+
+    if not sandbox._docker_available:
+        return "❌ **Docker Not Available** - Cannot run the quality gate."
+
+    # Bake once up front so the three phases don't race to build the same setup image
+    if setup_commands and sandbox.bake_setup(setup_commands, code_files):
+        docker_image, setup_commands = sandbox.image, None
+
+    phases: dict[str, Callable[[], str]] = {
+        "Lint": functools.partial(lint_code, code_files, lint_command, docker_image, setup_commands),
+        "Tests": functools.partial(run_tests_in_sandbox, code_files, test_command, docker_image, setup_commands),
+        "Coverage": functools.partial(
+            run_tests_with_coverage, code_files, test_command, coverage_command, docker_image, setup_commands, min_coverage
+        ),
+    }
+    # The phases are independent and each blocks on its own container - run them side by side
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(phases)) as executor:
+        futures = {name: executor.submit(phase) for name, phase in phases.items()}
+        reports = {name: future.result() for name, future in futures.items()}
+
+    return "\n\n".join(f"# {name}\n{report.strip()}" for name, report in reports.items())
+
+
 def lint_code_on_branch(
     repo_name: str,
     branch_name: str,
@@ -982,37 +2066,20 @@ def lint_code_on_branch(
         ...     docker_image="golangci/golangci-lint:latest",
         ... )
     """
-    import os
-
-    github_token = os.getenv("GITHUB_TOKEN", "")
-
-    sandbox = DockerSandbox(image=docker_image, timeout=timeout, memory_limit="1g")
+    sandbox = DockerSandbox(image=docker_image, timeout=timeout, affinity=_branch_affinity(repo_name, setup_commands))
 
     if not sandbox._docker_available:
         return "❌ **Docker Not Available** - Please start Docker Desktop."
 
-    # Build clone URL
-    clone_url = f"https://{github_token}@github.com/{repo_name}.git" if github_token else f"https://github.com/{repo_name}.git"
-
-    # Build commands
-    commands = [
-        "apt-get update -qq && apt-get install -y -qq git > /dev/null 2>&1 || apk add --no-cache git > /dev/null 2>&1 || true",
-        f"git clone --depth 1 --branch {branch_name} {clone_url} /app/repo",
-        "cd /app/repo",
-    ]
-
-    if setup_commands:
-        commands.extend(setup_commands)
-
-    full_command = " && ".join(commands) + f" && cd /app/repo && {lint_command}"
+    archive, commands, env_vars = _prepare_branch_run(sandbox, repo_name, branch_name, setup_commands)
+    full_command = " && ".join([*commands, lint_command])
 
     log.info("running_lint_on_branch", repo=repo_name, branch=branch_name)
 
-    result = sandbox.execute(command=full_command, code_files={}, env_vars={"GITHUB_TOKEN": github_token} if github_token else {})
+    result = sandbox.execute(command=full_command, code_files={}, env_vars=env_vars, archive=archive)
 
     # Clean token from output
-    stdout = result.stdout.replace(github_token, "***") if github_token else result.stdout
-    stderr = result.stderr.replace(github_token, "***") if github_token else result.stderr
+    stdout, stderr = _redact_token(result.stdout, result.stderr)
 
     # Determine status
     is_success = result.exit_code == 0
@@ -1053,7 +2120,7 @@ def lint_code_on_branch(
 ```
 {stdout[:4000]}
 ```
-{f"### Errors{chr(10)}```{chr(10)}{stderr[:2000]}{chr(10)}```" if stderr else ""}
+{_errors_block(stderr[:2000])}
 
 ---
 **REQUIRED_ACTION:** Fix the linting issues above before the PR can be approved.
@@ -1067,6 +2134,7 @@ def run_command_on_branch(
     docker_image: str,
     setup_commands: list[str] | None = None,
     timeout: int = 300,
+    memory_limit: str | None = None,
 ) -> str:
     """
     Clones a GitHub branch into Docker and runs arbitrary CLI commands.
@@ -1081,6 +2149,9 @@ def run_command_on_branch(
     Unlike run_tests_on_branch, this tool accepts MULTIPLE commands and does
     not assume any specific purpose - use it for any investigation.
 
+    The branch is checked out as a snapshot of its files without git history,
+    so git commands (log, blame, diff) are not available.
+
     Args:
         repo_name: Repository in "owner/repo" format.
         branch_name: The branch to clone.
@@ -1098,6 +2169,9 @@ def run_command_on_branch(
         setup_commands: Commands to run after cloning (install deps, etc).
                         Examples: ["pip install -r requirements.txt"]
         timeout: Maximum execution time in seconds (default: 300).
+        memory_limit: Container memory limit (e.g., "2g"). By default "256m" when
+                      there are no setup commands and every command only reads
+                      (cat, grep, find, ls, ...), otherwise "1g".
 
     Returns:
         Combined output from all commands.
@@ -1127,11 +2201,11 @@ def run_command_on_branch(
         ...     docker_image="python:3.12-slim",
         ... )
     """
-    import os
-
-    github_token = os.getenv("GITHUB_TOKEN", "")
+    if memory_limit is None:
+        read_only = not setup_commands and all(_RE_READ_ONLY_COMMAND.fullmatch(command) for command in commands)
+        memory_limit = "256m" if read_only else "1g"
 
-    sandbox = DockerSandbox(image=docker_image, timeout=timeout, memory_limit="2g")
+    sandbox = DockerSandbox(image=docker_image, timeout=timeout, memory_limit=memory_limit, affinity=_branch_affinity(repo_name, setup_commands))
 
     if not sandbox._docker_available:
         return """
@@ -1140,21 +2214,8 @@ def run_command_on_branch(
 Docker Desktop is not running. Please start Docker Desktop and try again.
 """
 
-    # Build clone URL
-    clone_url = f"https://{github_token}@github.com/{repo_name}.git" if github_token else f"https://github.com/{repo_name}.git"
-
-    # Build command sequence: install git, clone, setup, then run each user command with output labels
-    base_commands = [
-        """
-        apt-get update -qq && apt-get install -y -qq git > /dev/null 2>&1 ||
-        apk add --no-cache git > /dev/null 2>&1 || yum install -y git > /dev/null 2>&1 || true
-        """,
-        f"git clone --depth 1 --branch {branch_name} {clone_url} /app/repo",
-        "cd /app/repo",
-    ]
-
-    if setup_commands:
-        base_commands.extend(setup_commands)
+    # Build command sequence: check out the branch, setup, then run each user command with output labels
+    archive, base_commands, env_vars = _prepare_branch_run(sandbox, repo_name, branch_name, setup_commands)
 
     # Run each user command with a labeled separator so output is clear
     user_commands = []
@@ -1163,15 +2224,14 @@ Docker Desktop is not running. Please start Docker Desktop and try again.
         user_commands.append(cmd)
         user_commands.append("echo '══════ EXIT CODE: '$?' ══════'")
 
-    full_command = " && ".join(base_commands) + " && cd /app/repo && " + " ; ".join(user_commands)
+    full_command = " && ".join([*base_commands, " ; ".join(user_commands)])
 
     log.info("running_command_on_branch", repo=repo_name, branch=branch_name, image=docker_image, num_commands=len(commands))
 
-    result = sandbox.execute(command=full_command, code_files={}, env_vars={"GITHUB_TOKEN": github_token} if github_token else {})
+    result = sandbox.execute(command=full_command, code_files={}, env_vars=env_vars, archive=archive)
 
     # Clean token from output
-    stdout = result.stdout.replace(github_token, "***") if github_token else result.stdout
-    stderr = result.stderr.replace(github_token, "***") if github_token else result.stderr
+    stdout, stderr = _redact_token(result.stdout, result.stderr)
 
     return f"""
 ## Debug Output for Branch: {branch_name}
@@ -1185,7 +2245,34 @@ Docker Desktop is not running. Please start Docker Desktop and try again.
 ```
 {stdout[:6000]}
 ```
-{f"### Errors / Warnings{chr(10)}```{chr(10)}{stderr[:3000]}{chr(10)}```" if stderr else ""}
+{_errors_block(stderr[:3000], title="Errors / Warnings")}
+"""
+
+
+# Result of run_tests_on_branch. The agents key off the TEST_STATUS line, so keep it stable.
+_BRANCH_TEST_REPORT_TEMPLATE = """
+## Test Results for Branch: {branch_name} {status_icon}
+
+**TEST_STATUS: {status_text}**
+
+**Repository:** {repo_name}
+**Docker Image:** {docker_image}
+**Exit Code:** {result.exit_code}
+**Duration:** {result.duration_seconds:.2f}s
+
+### Test Summary
+- Passed: {result.tests_passed}
+- Failed: {result.tests_failed}
+- Skipped: {result.tests_skipped}
+
+### Output
+```
+{stdout}
+```
+{errors_block}
+
+---
+**NEXT_ACTION:** {next_action}
 """
 
 
@@ -1256,10 +2343,15 @@ def run_tests_on_branch(
         ...     docker_image="maven:3-eclipse-temurin-21",
         ... )
     """
-    import os
-
-    github_token = os.getenv("GITHUB_TOKEN", "")
-    sandbox = DockerSandbox(image=docker_image, timeout=timeout, memory_limit="2g")
+    sandbox = DockerSandbox(
+        image=docker_image,
+        timeout=timeout,
+        memory_limit="2g",
+        affinity=_branch_affinity(repo_name, setup_commands),
+        max_output_bytes=_BRANCH_CAPTURED_OUTPUT_BYTES,
+        tmpfs=_BRANCH_SCRATCH_TMPFS,
+        volumes=_dependency_cache_volumes(docker_image, repo_name, setup_commands),
+    )
     # Check Docker availability
     if not sandbox._docker_available:
         return """
@@ -1272,49 +2364,65 @@ Alternatively, you can:
 2. Use `validate_syntax` for quick syntax checks
 """
 
-    # Build clone URL
-    clone_url = f"https://{github_token}@github.com/{repo_name}.git" if github_token else f"https://github.com/{repo_name}.git"
-
-    # Build setup commands - install git first, then clone
-    commands = [
-        # Install git (works on debian/alpine/etc)
-        """
-        apt-get update -qq && apt-get install -y -qq git > /dev/null 2>&1 ||
-        apk add --no-cache git > /dev/null 2>&1 || yum install -y git > /dev/null 2>&1 || true
-        """,
-        f"git clone --depth 1 --branch {branch_name} {clone_url} /app/repo",
-        "cd /app/repo",
-    ]
-
-    # Add user-specified setup commands
-    if setup_commands:
-        commands.extend(setup_commands)
-
-    # Add the test command
-    full_command = " && ".join(commands) + f" && cd /app/repo && {test_command}"
+    # Check out the branch and run the setup commands (baked into the image when possible), then the tests
+    archive, commands, env_vars = _prepare_branch_run(sandbox, repo_name, branch_name, setup_commands)
+    full_command = " && ".join([*commands, test_command])
 
     log.info("running_tests_on_branch", repo=repo_name, branch=branch_name, image=docker_image)
 
-    result = sandbox.execute(command=full_command, code_files={}, env_vars={"GITHUB_TOKEN": github_token} if github_token else {})
+    result = sandbox.execute(command=full_command, code_files={}, env_vars=env_vars, archive=archive)
 
     # Clean token from output if present
-    stdout = result.stdout.replace(github_token, "***") if github_token else result.stdout
-    stderr = result.stderr.replace(github_token, "***") if github_token else result.stderr
+    stdout, stderr = _redact_token(result.stdout, result.stderr)
 
     # Determine clear PASS/FAIL status
     is_success = result.status == ExecutionStatus.SUCCESS and result.exit_code == 0
     status_icon = "✅" if is_success else "❌"
     status_text = "PASSED" if is_success else "FAILED"
 
-    return f"""
-## Test Results for Branch: {branch_name} {status_icon}
+    return _BRANCH_TEST_REPORT_TEMPLATE.format(
+        branch_name=branch_name,
+        status_icon=status_icon,
+        status_text=status_text,
+        repo_name=repo_name,
+        docker_image=docker_image,
+        result=result,
+        stdout=stdout[:4000],
+        errors_block=_errors_block(stderr[:2000]),
+        next_action="Proceed to create PR - all tests passed!" if is_success else "Fix the failing tests and push again using push_files_to_branch",
+    )
+
+
+def _coverage_from_reports(files: dict[str, bytes]) -> float | None:
+    """Total coverage from a pytest-cov JSON or Istanbul json-summary report, if one was collected."""
+    for path in _COVERAGE_REPORT_FILES:
+        if path not in files:
+            continue
+        try:
+            report = json.loads(files[path])
+            if "totals" in report:
+                return float(report["totals"]["percent_covered"])
+            return float(report["total"]["statements"]["pct"])
+        except (ValueError, KeyError, TypeError) as e:
+            log.warning("coverage_report_unparsable", path=path, error=str(e))
+    return None
 
-**TEST_STATUS: {status_text}**
+
+# Result of run_coverage_on_branch. The agents key off the COVERAGE_STATUS line, so keep it stable.
+_BRANCH_COVERAGE_REPORT_TEMPLATE = """
+## Coverage Report for Branch: {branch_name} {status_icon}
+
+**COVERAGE_STATUS: {status}**
 
 **Repository:** {repo_name}
+**Branch:** {branch_name}
 **Docker Image:** {docker_image}
-**Exit Code:** {result.exit_code}
-**Duration:** {result.duration_seconds:.2f}s
+
+### Coverage Analysis
+- **Coverage:** {coverage_str} {coverage_status}
+- **Required:** {min_coverage}%
+- **Tests Exit Code:** {result.exit_code}
+- **Duration:** {result.duration_seconds:.2f}s
 
 ### Test Summary
 - Passed: {result.tests_passed}
@@ -1323,12 +2431,12 @@ Alternatively, you can:
 
 ### Output
 ```
-{stdout[:4000]}
+{stdout}
 ```
-{f"### Errors{chr(10)}```{chr(10)}{stderr[:2000]}{chr(10)}```" if stderr else ""}
+{errors_block}
 
 ---
-**NEXT_ACTION:** {"Proceed to create PR - all tests passed!" if is_success else "Fix the failing tests and push again using push_files_to_branch"}
+**COVERAGE_GATE:** {coverage_gate}
 """
 
 
@@ -1355,6 +2463,8 @@ def run_coverage_on_branch(
                           - Node.js (NYC/Mocha): "npx nyc --reporter=text npm test"
                           - Go: "go test -cover -coverprofile=coverage.out ./... && go tool cover -func=coverage.out"
                           - Java: "mvn test jacoco:report"
+                          Adding "--cov-report=json" (pytest) or "--coverageReporters=json-summary"
+                          (Jest) lets the total be read from the JSON report instead of the text.
         docker_image: Docker image to use. Use latest stable versions:
                       - Python: "python:3.12-slim"
                       - Node.js: "node:22-slim"
@@ -1398,73 +2508,35 @@ def run_coverage_on_branch(
         ...     setup_commands=["npm install", "npm install -D nyc"],
         ... )
     """
-    import os
-    import re
-
-    github_token = os.getenv("GITHUB_TOKEN", "")
-
-    sandbox = DockerSandbox(image=docker_image, timeout=timeout, memory_limit="2g")
+    sandbox = DockerSandbox(
+        image=docker_image,
+        timeout=timeout,
+        memory_limit="2g",
+        affinity=_branch_affinity(repo_name, setup_commands),
+        max_output_bytes=_BRANCH_CAPTURED_OUTPUT_BYTES,
+        tmpfs=_BRANCH_SCRATCH_TMPFS,
+        volumes=_dependency_cache_volumes(docker_image, repo_name, setup_commands),
+    )
 
     if not sandbox._docker_available:
         return "❌ **Docker Not Available** - Please start Docker Desktop."
 
-    # Build clone URL
-    clone_url = f"https://{github_token}@github.com/{repo_name}.git" if github_token else f"https://github.com/{repo_name}.git"
-
-    # Build commands
-    commands = [
-        "apt-get update -qq && apt-get install -y -qq git > /dev/null 2>&1 || apk add --no-cache git > /dev/null 2>&1 || true",
-        f"git clone --depth 1 --branch {branch_name} {clone_url} /app/repo",
-        "cd /app/repo",
-    ]
-
-    if setup_commands:
-        commands.extend(setup_commands)
-
-    full_command = " && ".join(commands) + f" && cd /app/repo && {coverage_command}"
+    archive, commands, env_vars = _prepare_branch_run(sandbox, repo_name, branch_name, setup_commands)
+    full_command = " && ".join([*commands, coverage_command])
 
     log.info("running_coverage_on_branch", repo=repo_name, branch=branch_name)
 
-    result = sandbox.execute(command=full_command, code_files={}, env_vars={"GITHUB_TOKEN": github_token} if github_token else {})
+    result = sandbox.execute(
+        command=_with_capped_output(full_command), code_files={}, env_vars=env_vars, archive=archive, collect=_COVERAGE_REPORT_FILES
+    )
 
     # Clean token from output
-    stdout = result.stdout.replace(github_token, "***") if github_token else result.stdout
-    stderr = result.stderr.replace(github_token, "***") if github_token else result.stderr
+    stdout, stderr = _redact_token(result.stdout, result.stderr)
 
-    # Parse coverage from output
-    coverage = None
-    combined = stdout + "\n" + stderr
-
-    patterns = [
-        # Python pytest-cov: "TOTAL    100    20    80%"
-        r"TOTAL\s+\d+\s+\d+\s+(\d+)%",
-        # Jest/Istanbul table: "All files |   85.71 |" (first number after All files)
-        r"All files\s*\|\s*([\d.]+)",
-        # Jest text-summary: "Statements   : 85.71% ( 6/7 )"
-        r"Statements\s*:\s*([\d.]+)%",
-        # Jest text-summary: "Lines        : 85.71% ( 6/7 )"
-        r"Lines\s*:\s*([\d.]+)%",
-        # NYC text reporter: "Lines        : 85.71%"
-        r"All files\s*\|\s*[\d.]+\s*\|\s*[\d.]+\s*\|\s*[\d.]+\s*\|\s*([\d.]+)",  # NYC table with 4 columns
-        # Go: "total:    (statements)  85.0%"
-        r"total:\s*\(statements\)\s*([\d.]+)%",
-        # Go coverage: "coverage: 85.0% of statements"
-        r"coverage:\s*([\d.]+)%\s*of\s*statements",
-        # Generic patterns
-        r"Coverage:\s*([\d.]+)%",
-        r"coverage:\s*([\d.]+)%",
-        r"(\d+(?:\.\d+)?)\s*%\s*coverage",
-        # JaCoCo
-        r"Line coverage:\s*([\d.]+)%",
-        # C8/V8 coverage: "Lines: 85.71%"
-        r"Lines:\s*([\d.]+)%",
-    ]
-
-    for pattern in patterns:
-        match = re.search(pattern, combined, re.IGNORECASE)
-        if match:
-            coverage = float(match.group(1))
-            break
+    # A JSON report if the command wrote one, otherwise the same scan of the output as the test counts
+    coverage = _coverage_from_reports(result.files)
+    if coverage is None:
+        coverage = result.coverage_percent
 
     # Determine status
     tests_passed = result.exit_code == 0
@@ -1480,36 +2552,210 @@ def run_coverage_on_branch(
     coverage_str = f"{coverage:.1f}%" if coverage else "UNKNOWN"
     coverage_status = "✅" if coverage_passed else "❌"
 
+    return _BRANCH_COVERAGE_REPORT_TEMPLATE.format(
+        branch_name=branch_name,
+        status_icon=status_icon,
+        status=status,
+        repo_name=repo_name,
+        docker_image=docker_image,
+        coverage_str=coverage_str,
+        coverage_status=coverage_status,
+        min_coverage=min_coverage,
+        result=result,
+        stdout=stdout[:4000],
+        errors_block=_errors_block(stderr[:2000]),
+        coverage_gate=f"PASSED - Coverage meets {min_coverage:.0f}% threshold"
+        if coverage_passed
+        else f"FAILED - Coverage below {min_coverage:.0f}% threshold",
+    )
+
+
+def run_tests_and_coverage_on_branch(
+    repo_name: str,
+    branch_name: str,
+    test_command: str,
+    coverage_command: str,
+    docker_image: str,
+    setup_commands: list[str] | None = None,
+    min_coverage: float = 80.0,
+    timeout: int = 600,
+) -> str:
+    """
+    Runs `run_tests_on_branch` and `run_coverage_on_branch` on the same branch concurrently.
+
+    Each run gets its own container, so both reports arrive in about the time
+    of the slower one instead of the two back to back.
+
+    Args:
+        repo_name: Repository in "owner/repo" format.
+        branch_name: The branch to test.
+        test_command: The test command to run (e.g., "pytest -v --tb=short").
+        coverage_command: Command to run tests with coverage
+                          (e.g., "pytest --cov=. --cov-report=term-missing").
+        docker_image: Docker image to use (latest stable for your language).
+        setup_commands: Commands to run after cloning (install deps, coverage tools).
+        min_coverage: Minimum required coverage percentage (default: 80%).
+        timeout: Maximum execution time of each run in seconds (default: 600).
+
+    Returns:
+        The test and coverage reports, one section each.
+
+    Example:
+        >>> run_tests_and_coverage_on_branch(
+        ...     repo_name="owner/repo",
+        ...     branch_name="fix-issue-123",
+        ...     test_command="pytest -v",
+        ...     coverage_command="pytest --cov=. --cov-report=term-missing",
+        ...     docker_image="python:3.12-slim",
+        ...     setup_commands=["pip install -r requirements.txt", "pip install pytest pytest-cov"],
+        ... )
+    """
+    sandbox = DockerSandbox(image=docker_image, affinity=_branch_affinity(repo_name, setup_commands))
+
+    if not sandbox._docker_available:
+        return "❌ **Docker Not Available** - Please start Docker Desktop."
+
+    # Fetch the branch and bake the setup image once up front, so the two runs don't race to do
+    # both, then pin the checkout so they reopen this archive instead of looking the branch up again
+    archive, checkout_commands = _branch_checkout(repo_name, branch_name, _github_token())
+    _branch_setup_commands(sandbox, archive, checkout_commands, setup_commands)
+    key = (repo_name, branch_name)
+    pinned = (archive.name if archive is not None else None, checkout_commands)
+    _pinned_checkouts[key] = pinned
+
+    runs: dict[str, Callable[[], str]] = {
+        "Tests": functools.partial(run_tests_on_branch, repo_name, branch_name, test_command, docker_image, setup_commands, timeout),
+        "Coverage": functools.partial(
+            run_coverage_on_branch, repo_name, branch_name, coverage_command, docker_image, setup_commands, min_coverage, timeout
+        ),
+    }
+    try:
+        # Both runs block on their own container - run them side by side
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(runs)) as executor:
+            futures = {name: executor.submit(run) for name, run in runs.items()}
+            reports = {name: future.result() for name, future in futures.items()}
+    finally:
+        # A concurrent call on the same branch may have pinned its own checkout since
+        if _pinned_checkouts.get(key) is pinned:
+            del _pinned_checkouts[key]
+        if archive is not None:
+            archive.close()  # Deletes a codeload temp file only now that both runs have extracted it
+
+    return "\n\n".join(f"# {name}\n{report.strip()}" for name, report in reports.items())
+
+
+def _stryker_report_counts(report_json: bytes) -> collections.Counter[str] | None:
+    """Mutant counts by Stryker status (Killed, Survived, Timeout, NoCoverage, ...) from its JSON report."""
+    try:
+        report = json.loads(report_json)
+        return collections.Counter(mutant["status"] for file in report["files"].values() for mutant in file["mutants"])
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        log.warning("stryker_report_unparsable", error=str(e))
+        return None
+
+
+def _mutation_baseline_failed_report(stdout: str, stderr: str) -> str:
+    """Report for a branch whose tests fail before any mutant is tried."""
     return f"""
-## Coverage Report for Branch: {branch_name} {status_icon}
+## Mutation Testing Skipped ❌
 
-**COVERAGE_STATUS: {status}**
+**MUTATION_STATUS: SKIPPED**
+
+**Reason:** Baseline tests failed. Cannot run mutation tests until all tests pass.
+
+### Baseline Test Output
+```
+{stdout[:3000]}
+```
+{_errors_block(stderr[:1500])}
+
+**REQUIRED_ACTION:** Fix the failing tests first, then retry mutation testing.
+"""
+
+
+def _mutation_counts_from_output(combined: str) -> tuple[int, int, int, int, int, float]:
+    """Total, killed, survived, timed-out and uncovered mutants and the score, scraped from Stryker or generic tool output."""
+    total = killed = survived = timed_out = no_coverage = 0
+    score = 0.0
+
+    # ============== Stryker (JavaScript/TypeScript) ==============
+    # First line of each kind, in one pass
+    stryker: dict[str, re.Match[str]] = {}
+    for match in _RE_STRYKER_SUMMARY.finditer(combined):
+        stryker.setdefault(match.lastgroup, match)
+        if len(stryker) == 3:
+            break
+
+    match = stryker.get("instrumented")
+    if match:
+        total = int(match["instrumented_total"])
+
+    match = stryker.get("progress")
+    if match:
+        tested = int(match["tested"])
+        total = total if total else int(match["progress_total"])
+        survived = int(match["survived"])
+        timed_out = int(match["timed_out"]) if match["timed_out"] else 0
+        killed = tested - survived - timed_out
+
+    match = stryker.get("score")
+    if match:
+        score = float(match["score_percent"])
+
+    if total:
+        # Stryker's own summary lines were found, so the generic patterns below aren't needed
+        no_coverage = combined.count("[NoCoverage]")
+    else:
+        # ============== Mutmut (Python) ==============
+        # Format: "X passed, Y failed, Z skipped"
+        counts = {key: _search_by_priority(pattern, combined) for key, pattern in _RE_MUTATION_COUNTS.items()}
+        if counts["total"] is not None:
+            total = int(counts["total"])
+        if counts["killed"] is not None:
+            killed = int(counts["killed"])
+        if counts["survived"] is not None:
+            survived = int(counts["survived"])
+        if counts["score"] is not None:
+            score = float(counts["score"])
+
+    # Calculate score if not found
+    if score == 0 and total > 0:
+        # For mutation score: killed / (total - no_coverage) if we have no_coverage info
+        effective_total = total - no_coverage if no_coverage > 0 else total
+        if effective_total > 0:
+            score = (killed / effective_total) * 100
+
+    return total, killed, survived, timed_out, no_coverage, score
+
+
+# Result of run_mutation_tests_on_branch. The agents key off the MUTATION_STATUS line, so keep it stable.
+_BRANCH_MUTATION_REPORT_TEMPLATE = """
+## Mutation Testing Report for Branch: {branch_name} {status_icon}
+
+**MUTATION_STATUS: {status}**
 
 **Repository:** {repo_name}
 **Branch:** {branch_name}
-**Docker Image:** {docker_image}
-
-### Coverage Analysis
-- **Coverage:** {coverage_str} {coverage_status}
-- **Required:** {min_coverage}%
-- **Tests Exit Code:** {result.exit_code}
-- **Duration:** {result.duration_seconds:.2f}s
+**Mutation Score:** {score:.1f}% {score_icon}
+**Required Score:** {min_mutation_score}%
 
-### Test Summary
-- Passed: {result.tests_passed}
-- Failed: {result.tests_failed}
-- Skipped: {result.tests_skipped}
+### Mutant Summary
+- **Total Mutants:** {total}
+- **Killed (detected by tests):** {killed} ✅
+- **Survived (missed by tests):** {survived} {survived_icon}{no_coverage_str}{timed_out_str}
 
-### Output
+### Raw Output
 ```
-{stdout[:4000]}
+{output}
 ```
-{f"### Errors{chr(10)}```{chr(10)}{stderr[:2000]}{chr(10)}```" if stderr else ""}
 
 ---
-**COVERAGE_GATE:** {
-        f"PASSED - Coverage meets {min_coverage:.0f}% threshold" if coverage_passed else f"FAILED - Coverage below {min_coverage:.0f}% threshold"
-    }
+**INTERPRETATION:**
+- **High mutation score (>{min_mutation_score:.0f}%):** Tests are thorough ✅
+- **Low mutation score:** Tests may miss bugs ⚠️
+- **Survived mutants:** Indicate code paths not properly tested
+
+**MUTATION_GATE:** {mutation_gate}
 """
 
 
@@ -1522,6 +2768,7 @@ def run_mutation_tests_on_branch(
     test_command: str = "pytest",
     min_mutation_score: float = 60.0,
     timeout: int = 900,
+    verify_baseline: bool = False,
 ) -> str:
     """
     Clones a GitHub branch into Docker and runs mutation testing.
@@ -1529,6 +2776,9 @@ def run_mutation_tests_on_branch(
     Mutation testing modifies code in small ways to verify tests catch the changes.
     Use this to verify test quality on a branch before approving a PR.
 
+    Mutation tools run the unmutated tests first and stop if they fail; that is
+    reported as skipped, the same as a failing separate baseline run.
+
     Args:
         repo_name: Repository in "owner/repo" format.
         branch_name: The branch to clone and test.
@@ -1537,6 +2787,8 @@ def run_mutation_tests_on_branch(
                           - Node.js (Jest): "npx stryker run --testRunner jest --mutate 'src/**/*.ts,src/**/*.tsx,!src/**/*.test.*'"
                           - Node.js (Mocha): "npx stryker run --testRunner mocha"
                           - Java: "mvn pitest:mutationCoverage"
+                          Adding "--reporters clear-text,progress,json" to Stryker lets the
+                          counts be read from its JSON report instead of the text.
         docker_image: Docker image to use.
                       IMPORTANT: For Node.js mutation testing, use "node:22" (NOT slim!)
                       Stryker requires the `ps` command which is missing in slim images.
@@ -1546,9 +2798,11 @@ def run_mutation_tests_on_branch(
                         - Python: ["pip install -r requirements.txt", "pip install pytest mutmut"]
                         - Node.js (Jest): ["npm install", "npm install -D @stryker-mutator/core @stryker-mutator/jest-runner"]
                         - Node.js (Mocha): ["npm install", "npm install -D @stryker-mutator/core @stryker-mutator/mocha-runner"]
-        test_command: Base test command to verify tests pass first.
+        test_command: Test command for the separate baseline run (verify_baseline=True).
         min_mutation_score: Minimum required mutation score (default: 60%).
         timeout: Maximum execution time (default: 900s - mutation tests are slow).
+        verify_baseline: Run test_command on its own before the mutation tool
+                         (default: False - the mutation tool's own baseline run is used).
 
     Returns:
         Mutation testing report with score and survived mutants.
@@ -1574,124 +2828,52 @@ def run_mutation_tests_on_branch(
         ...     test_command="npm test",
         ... )
     """
-    import os
-    import re
-
-    github_token = os.getenv("GITHUB_TOKEN", "")
-
-    sandbox = DockerSandbox(image=docker_image, timeout=timeout, memory_limit="2g")
+    sandbox = DockerSandbox(
+        image=docker_image,
+        timeout=timeout,
+        memory_limit="2g",
+        affinity=_branch_affinity(repo_name, setup_commands),
+        max_output_bytes=_BRANCH_CAPTURED_OUTPUT_BYTES,
+        tmpfs=_BRANCH_SCRATCH_TMPFS,
+        volumes=_dependency_cache_volumes(docker_image, repo_name, setup_commands),
+    )
 
     if not sandbox._docker_available:
         return "❌ **Docker Not Available** - Please start Docker Desktop."
 
-    # Build clone URL
-    clone_url = f"https://{github_token}@github.com/{repo_name}.git" if github_token else f"https://github.com/{repo_name}.git"
-
-    # Build commands - first run baseline tests
-    commands = [
-        "apt-get update -qq && apt-get install -y -qq git > /dev/null 2>&1 || apk add --no-cache git > /dev/null 2>&1 || true",
-        f"git clone --depth 1 --branch {branch_name} {clone_url} /app/repo",
-        "cd /app/repo",
-    ]
-
-    if setup_commands:
-        commands.extend(setup_commands)
-
-    # First verify baseline tests pass
-    baseline_command = " && ".join(commands) + f" && cd /app/repo && {test_command}"
-
-    log.info("running_baseline_tests", repo=repo_name, branch=branch_name)
-
-    baseline_result = sandbox.execute(command=baseline_command, code_files={}, env_vars={"GITHUB_TOKEN": github_token} if github_token else {})
-
-    if baseline_result.exit_code != 0:
-        stdout = baseline_result.stdout.replace(github_token, "***") if github_token else baseline_result.stdout
-        stderr = baseline_result.stderr.replace(github_token, "***") if github_token else baseline_result.stderr
-        return f"""
-## Mutation Testing Skipped ❌
-
-**MUTATION_STATUS: SKIPPED**
-
-**Reason:** Baseline tests failed. Cannot run mutation tests until all tests pass.
-
-### Baseline Test Output
-```
-{stdout[:3000]}
-```
-{f"### Errors{chr(10)}```{chr(10)}{stderr[:1500]}{chr(10)}```" if stderr else ""}
-
-**REQUIRED_ACTION:** Fix the failing tests first, then retry mutation testing.
-"""
+    archive, commands, env_vars = _prepare_branch_run(sandbox, repo_name, branch_name, setup_commands)
+    # An explicit baseline shares the mutation run's container, so the clone and
+    # setup commands still run only once
+    with sandbox.session(archive=archive) as run:
+        if verify_baseline:
+            log.info("running_baseline_tests", repo=repo_name, branch=branch_name)
+            baseline_result = run(" && ".join([*commands, test_command]), env_vars)
+            if baseline_result.exit_code != 0:
+                return _mutation_baseline_failed_report(*_redact_token(baseline_result.stdout, baseline_result.stderr))
+            commands = ["cd /app/repo"]
 
-    # Now run mutation tests
-    full_command = " && ".join(commands) + f" && cd /app/repo && {mutation_command}"
+        # Now run mutation tests
+        log.info("running_mutation_tests_on_branch", repo=repo_name, branch=branch_name)
 
-    log.info("running_mutation_tests_on_branch", repo=repo_name, branch=branch_name)
-
-    result = sandbox.execute(command=full_command, code_files={}, env_vars={"GITHUB_TOKEN": github_token} if github_token else {})
+        result = run(_with_capped_output(" && ".join([*commands, mutation_command])), env_vars, (_STRYKER_REPORT_FILE,))
 
     # Clean token from output
-    stdout = result.stdout.replace(github_token, "***") if github_token else result.stdout
-    stderr = result.stderr.replace(github_token, "***") if github_token else result.stderr
+    stdout, stderr = _redact_token(result.stdout, result.stderr)
     combined = stdout + "\n" + stderr
 
-    # Parse mutation results
-    total = killed = survived = timed_out = no_coverage = 0
-    score = 0.0
-
-    # ============== Stryker (JavaScript/TypeScript) ==============
-    # Format: "Instrumented 9 source file(s) with 425 mutant(s)"
-    match = re.search(r"with\s+(\d+)\s+mutant", combined)
-    if match:
-        total = int(match.group(1))
-
-    # Format: "422/425 tested (0 survived, 21 timed out)"
-    match = re.search(r"(\d+)/(\d+)\s+tested\s*\((\d+)\s+survived,?\s*(\d+)?\s*timed\s*out\)", combined)
-    if match:
-        tested = int(match.group(1))
-        total = total if total else int(match.group(2))
-        survived = int(match.group(3))
-        timed_out = int(match.group(4)) if match.group(4) else 0
-        killed = tested - survived - timed_out
-
-    # Stryker final summary: "Mutation score: 94.35%"
-    match = re.search(r"Mutation\s+score[:\s]+(\d+(?:\.\d+)?)\s*%", combined, re.IGNORECASE)
-    if match:
-        score = float(match.group(1))
-
-    # Count [NoCoverage] mutants
-    no_coverage = len(re.findall(r"\[NoCoverage\]", combined))
-
-    # ============== Mutmut (Python) ==============
-    # Format: "X passed, Y failed, Z skipped"
-    if total == 0:
-        patterns = {
-            "total": [r"(\d+)\s*mutants", r"Total:\s*(\d+)", r"(\d+)\s*mutations"],
-            "killed": [r"Killed:\s*(\d+)", r"(\d+)\s*killed", r"(\d+)\s*detected"],
-            "survived": [r"Survived:\s*(\d+)", r"(\d+)\s*survived", r"(\d+)\s*undetected"],
-            "score": [r"Mutation\s*[sS]core:\s*([\d.]+)%?", r"Score:\s*([\d.]+)%?"],
-        }
-
-        for key, pattern_list in patterns.items():
-            for pattern in pattern_list:
-                match = re.search(pattern, combined, re.IGNORECASE)
-                if match:
-                    if key == "total":
-                        total = int(match.group(1))
-                    elif key == "killed":
-                        killed = int(match.group(1))
-                    elif key == "survived":
-                        survived = int(match.group(1))
-                    elif key == "score":
-                        score = float(match.group(1))
-                    break
-
-    # Calculate score if not found
-    if score == 0 and total > 0:
-        # For mutation score: killed / (total - no_coverage) if we have no_coverage info
-        effective_total = total - no_coverage if no_coverage > 0 else total
-        if effective_total > 0:
-            score = (killed / effective_total) * 100
+    if _RE_MUTATION_BASELINE_FAILED.search(combined):
+        return _mutation_baseline_failed_report(stdout, stderr)
+
+    # Parse mutation results, from Stryker's JSON report when its json reporter wrote one
+    statuses = _stryker_report_counts(result.files[_STRYKER_REPORT_FILE]) if _STRYKER_REPORT_FILE in result.files else None
+    if statuses:
+        killed, survived, timed_out, no_coverage = statuses["Killed"], statuses["Survived"], statuses["Timeout"], statuses["NoCoverage"]
+        total = sum(statuses.values())
+        # Stryker's score: detected mutants over valid ones (compile and runtime errors excluded)
+        valid = killed + timed_out + survived + no_coverage
+        score = (killed + timed_out) / valid * 100 if valid else 0.0
+    else:
+        total, killed, survived, timed_out, no_coverage, score = _mutation_counts_from_output(combined)
 
     # Determine status
     mutation_passed = score >= min_mutation_score
@@ -1707,35 +2889,24 @@ def run_mutation_tests_on_branch(
     no_coverage_str = f"\n- **Not Covered by Tests:** {no_coverage} ⚠️" if no_coverage > 0 else ""
     timed_out_str = f"\n- **Timed Out:** {timed_out}" if timed_out > 0 else ""
 
-    return f"""
-## Mutation Testing Report for Branch: {branch_name} {status_icon}
-
-**MUTATION_STATUS: {status}**
-
-**Repository:** {repo_name}
-**Branch:** {branch_name}
-**Mutation Score:** {score:.1f}% {"✅" if mutation_passed else "❌"}
-**Required Score:** {min_mutation_score}%
-
-### Mutant Summary
-- **Total Mutants:** {total}
-- **Killed (detected by tests):** {killed} ✅
-- **Survived (missed by tests):** {survived} {"⚠️" if survived > 0 else "✅"}{no_coverage_str}{timed_out_str}
-
-### Raw Output
-```
-{combined[:4000]}
-```
-
----
-**INTERPRETATION:**
-- **High mutation score (>{min_mutation_score:.0f}%):** Tests are thorough ✅
-- **Low mutation score:** Tests may miss bugs ⚠️
-- **Survived mutants:** Indicate code paths not properly tested
-
-**MUTATION_GATE:** {
-        f"PASSED - Score meets {min_mutation_score:.0f}% threshold"
-        if mutation_passed
-        else f"NEEDS IMPROVEMENT - Score below {min_mutation_score:.0f}% threshold"
-    }
-"""
+    return _BRANCH_MUTATION_REPORT_TEMPLATE.format(
+        branch_name=branch_name,
+        status_icon=status_icon,
+        status=status,
+        repo_name=repo_name,
+        score=score,
+        score_icon="✅" if mutation_passed else "❌",
+        min_mutation_score=min_mutation_score,
+        total=total,
+        killed=killed,
+        survived=survived,
+        survived_icon="⚠️" if survived > 0 else "✅",
+        no_coverage_str=no_coverage_str,
+        timed_out_str=timed_out_str,
+        output=combined[:4000],
+        mutation_gate=(
+            f"PASSED - Score meets {min_mutation_score:.0f}% threshold"
+            if mutation_passed
+            else f"NEEDS IMPROVEMENT - Score below {min_mutation_score:.0f}% threshold"
+        ),
+    )
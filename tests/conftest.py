@@ -1,3 +1,34 @@
 """Pytest configuration for capable_core tests."""
 
 from __future__ import annotations
+
+import importlib
+import os
+import sys
+from typing import TYPE_CHECKING
+
+import pytest
+
+
+# Never pull sandbox images from a test run, whatever the developer's environment says
+os.environ["SANDBOX_PREWARM_IMAGES"] = ""
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+    from types import ModuleType
+
+
+@pytest.fixture()
+def fresh_config() -> Iterator[Callable[[], ModuleType]]:
+    """Import capable_core.config afresh on each call, so env changes made by the test take effect.
+
+    The module is dropped again on teardown so later tests don't see this test's settings.
+    """
+
+    def load() -> ModuleType:
+        sys.modules.pop("capable_core.config", None)
+        return importlib.import_module("capable_core.config")
+
+    yield load
+    sys.modules.pop("capable_core.config", None)
@@ -11,23 +11,67 @@ GOOGLE_API_KEY or any cloud credentials.
 
 from __future__ import annotations
 
+import re
 import sys
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import pytest
 
 
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+    from types import ModuleType
+
+
 # ---------------------------------------------------------------------------
 # Fixtures - environment & heavy-import isolation
 # ---------------------------------------------------------------------------
 
 
-@pytest.fixture(autouse=True)
-def _mock_environment(monkeypatch: pytest.MonkeyPatch) -> None:
-    """Set minimal env vars so Pydantic Settings won't raise on import."""
-    monkeypatch.setenv("GITHUB_TOKEN", "ghp_fake_token_for_testing")
-    monkeypatch.setenv("GOOGLE_API_KEY", "fake-api-key-for-testing")
-    monkeypatch.setenv("AGENT_PROVIDER_TYPE", "gemini")
+@pytest.fixture(autouse=True, scope="module")
+def _mock_environment() -> Iterator[None]:
+    """Set minimal env vars so Pydantic Settings won't raise on import.
+
+    Module-scoped, so the module-scoped fixtures below see them too; a test's own
+    monkeypatch changes are undone back to these values.
+    """
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("GITHUB_TOKEN", "ghp_fake_token_for_testing")
+        monkeypatch.setenv("GOOGLE_API_KEY", "fake-api-key-for-testing")
+        monkeypatch.setenv("AGENT_PROVIDER_TYPE", "gemini")
+        yield
+
+
+@pytest.fixture(scope="module")
+def developer_tool_names() -> frozenset[str]:
+    """Tool names of one Developer agent, built once for the tool-inspection tests."""
+    from capable_core.agents.developer import create_developer_agent
+
+    return _tool_names(create_developer_agent())
+
+
+@pytest.fixture(scope="module")
+def qa_tool_names() -> frozenset[str]:
+    """Tool names of one QA Architect agent, built once for the tool-inspection tests."""
+    from capable_core.agents.qa_architect import create_qa_architect_agent
+
+    return _tool_names(create_qa_architect_agent())
+
+
+@pytest.fixture(scope="module")
+def developer_prompt_lower() -> str:
+    """The Developer system prompt, lower-cased once for the prompt-text tests."""
+    from capable_core.agents.developer import DEVELOPER_SYSTEM_PROMPT
+
+    return DEVELOPER_SYSTEM_PROMPT.lower()
+
+
+@pytest.fixture(scope="module")
+def qa_prompt_lower() -> str:
+    """The QA Architect system prompt (without mutation testing), lower-cased once."""
+    from capable_core.agents.qa_architect import QA_ARCHITECT_SYSTEM_PROMPT_NO_MUTATION
+
+    return QA_ARCHITECT_SYSTEM_PROMPT_NO_MUTATION.lower()
 
 
 @pytest.fixture()
@@ -46,16 +90,40 @@ def _fresh_modules() -> Any:
 # ---------------------------------------------------------------------------
 
 
-def _tool_names(agent: Any) -> list[str]:
+# Core tool chains each agent must carry
+_EXPECTED_DEVELOPER_TOOLS = frozenset(
+    {
+        "get_file_content",
+        "get_directory_tree",
+        "create_branch_with_files",
+        "push_files_to_branch",
+        "validate_syntax",
+        "run_tests_on_branch",
+        "lint_code_on_branch",
+        "create_pr",
+        "update_pr_with_changes",
+        "monitor_ci_for_pr",
+    }
+)
+_EXPECTED_QA_TOOLS = frozenset(
+    {
+        "get_pr_details",
+        "get_file_content",
+        "get_directory_tree",
+        "get_branch_info",
+        "run_tests_on_branch",
+        "run_coverage_on_branch",
+        "lint_code_on_branch",
+        "push_files_to_branch",
+        "add_pr_comment",
+    }
+)
+
+
+def _tool_names(agent: Any) -> frozenset[str]:
     """Extract the function names from an agent's tool list."""
-    names: list[str] = []
-    for t in getattr(agent, "tools", []):
-        # ADK wraps plain functions; the original is accessible via __name__
-        if callable(t):
-            names.append(getattr(t, "__name__", str(t)))
-        else:
-            names.append(str(t))
-    return names
+    # ADK wraps plain functions; the original is accessible via __name__
+    return frozenset(getattr(t, "__name__", str(t)) if callable(t) else str(t) for t in getattr(agent, "tools", ()))
 
 
 # ===================================================================
@@ -68,70 +136,40 @@ class TestDeveloperAgentReasoning:
 
     # -- Factory construction ------------------------------------------------
 
-    def test_developer_agent_has_get_directory_tree_tool(self) -> None:
+    def test_developer_agent_has_get_directory_tree_tool(self, developer_tool_names: frozenset[str]) -> None:
         """Developer agent must include get_directory_tree so it can explore the repo."""
-        from capable_core.agents.developer import create_developer_agent
+        assert "get_directory_tree" in developer_tool_names, f"get_directory_tree missing from Developer tools: {developer_tool_names}"
 
-        agent = create_developer_agent()
-        names = _tool_names(agent)
-        assert "get_directory_tree" in names, f"get_directory_tree missing from Developer tools: {names}"
-
-    def test_developer_agent_has_get_file_content_tool(self) -> None:
+    def test_developer_agent_has_get_file_content_tool(self, developer_tool_names: frozenset[str]) -> None:
         """Developer agent must include get_file_content for reading source code."""
-        from capable_core.agents.developer import create_developer_agent
-
-        agent = create_developer_agent()
-        names = _tool_names(agent)
-        assert "get_file_content" in names
+        assert "get_file_content" in developer_tool_names
 
-    def test_developer_tools_include_full_set(self) -> None:
+    def test_developer_tools_include_full_set(self, developer_tool_names: frozenset[str]) -> None:
         """Developer agent should carry the core tool chain."""
-        from capable_core.agents.developer import create_developer_agent
-
-        agent = create_developer_agent()
-        names = _tool_names(agent)
-
-        expected = {
-            "get_file_content",
-            "get_directory_tree",
-            "create_branch_with_files",
-            "push_files_to_branch",
-            "validate_syntax",
-            "run_tests_on_branch",
-            "lint_code_on_branch",
-            "create_pr",
-            "update_pr_with_changes",
-            "monitor_ci_for_pr",
-        }
-        missing = expected - set(names)
+        missing = _EXPECTED_DEVELOPER_TOOLS - developer_tool_names
         assert not missing, f"Developer agent missing tools: {missing}"
 
     # -- System prompt directs first step ------------------------------------
 
-    def test_developer_prompt_instructs_directory_tree_first(self) -> None:
+    def test_developer_prompt_instructs_directory_tree_first(self, developer_prompt_lower: str) -> None:
         """The system prompt must tell the Developer to explore with get_directory_tree before coding."""
-        from capable_core.agents.developer import DEVELOPER_SYSTEM_PROMPT
-
-        prompt_lower = DEVELOPER_SYSTEM_PROMPT.lower()
         # The prompt should mention exploring the project structure as Step 1
-        assert "get_directory_tree" in prompt_lower, "Developer prompt does not mention get_directory_tree"
-        # Locate the Step 1 / workflow section
-        step1_idx = prompt_lower.find("step 1")
-        assert step1_idx != -1, "Prompt missing Step 1 section"
+        assert "get_directory_tree" in developer_prompt_lower, "Developer prompt does not mention get_directory_tree"
+        assert "step 1" in developer_prompt_lower, "Prompt missing Step 1 section"
         # get_directory_tree must appear *within* the Step 1 section (after its heading)
-        tree_in_step1 = prompt_lower.find("get_directory_tree", step1_idx)
-        assert tree_in_step1 != -1, "get_directory_tree is not referenced in the Step 1 section of the Developer prompt"
+        assert re.search(r"step 1.*?get_directory_tree", developer_prompt_lower, re.DOTALL), (
+            "get_directory_tree is not referenced in the Step 1 section of the Developer prompt"
+        )
 
     # -- Mission parsing flow -----------------------------------------------
 
-    def test_developer_prompt_contains_mission_workflow(self) -> None:
+    def test_developer_prompt_contains_mission_workflow(self, developer_prompt_lower: str) -> None:
         """Developer prompt should describe the mission-based workflow."""
-        from capable_core.agents.developer import DEVELOPER_SYSTEM_PROMPT
-
-        prompt_lower = DEVELOPER_SYSTEM_PROMPT.lower()
         # Must mention reading/understanding the issue and the codebase
-        assert "understand" in prompt_lower or "read" in prompt_lower, "Prompt does not instruct developer to read/understand the codebase"
-        assert "workflow" in prompt_lower, "Prompt does not contain a workflow section"
+        assert "understand" in developer_prompt_lower or "read" in developer_prompt_lower, (
+            "Prompt does not instruct developer to read/understand the codebase"
+        )
+        assert "workflow" in developer_prompt_lower, "Prompt does not contain a workflow section"
 
     def test_developer_on_start_callback_parses_mission(self) -> None:
         """on_developer_start must extract mission context into a prompt."""
@@ -173,70 +211,29 @@ class TestQAArchitectAgentReasoning:
 
     # -- Factory construction ------------------------------------------------
 
-    def test_qa_agent_has_run_coverage_tool(self) -> None:
+    def test_qa_agent_has_run_coverage_tool(self, qa_tool_names: frozenset[str]) -> None:
         """QA Architect must include run_coverage_on_branch in its tool belt."""
-        from capable_core.agents.qa_architect import create_qa_architect_agent
-
-        agent = create_qa_architect_agent()
-        names = _tool_names(agent)
-        assert "run_coverage_on_branch" in names, f"run_coverage_on_branch missing from QA tools: {names}"
+        assert "run_coverage_on_branch" in qa_tool_names, f"run_coverage_on_branch missing from QA tools: {qa_tool_names}"
 
-    def test_qa_agent_has_get_pr_details_tool(self) -> None:
+    def test_qa_agent_has_get_pr_details_tool(self, qa_tool_names: frozenset[str]) -> None:
         """QA Architect must include get_pr_details to read the PR before testing."""
-        from capable_core.agents.qa_architect import create_qa_architect_agent
+        assert "get_pr_details" in qa_tool_names
 
-        agent = create_qa_architect_agent()
-        names = _tool_names(agent)
-        assert "get_pr_details" in names
-
-    def test_qa_agent_tools_include_full_set(self) -> None:
+    def test_qa_agent_tools_include_full_set(self, qa_tool_names: frozenset[str]) -> None:
         """QA Architect should carry the essential tool chain."""
-        from capable_core.agents.qa_architect import create_qa_architect_agent
-
-        agent = create_qa_architect_agent()
-        names = _tool_names(agent)
-
-        expected = {
-            "get_pr_details",
-            "get_file_content",
-            "get_directory_tree",
-            "get_branch_info",
-            "run_tests_on_branch",
-            "run_coverage_on_branch",
-            "lint_code_on_branch",
-            "push_files_to_branch",
-            "add_pr_comment",
-        }
-        missing = expected - set(names)
+        missing = _EXPECTED_QA_TOOLS - qa_tool_names
         assert not missing, f"QA Architect agent missing tools: {missing}"
 
     # -- System prompt directs coverage on PR --------------------------------
 
-    def test_qa_prompt_instructs_pr_details_first(self) -> None:
-        """QA prompt should instruct calling get_pr_details FIRST."""
-        from capable_core.agents.qa_architect import QA_ARCHITECT_SYSTEM_PROMPT_NO_MUTATION
-
-        prompt_lower = QA_ARCHITECT_SYSTEM_PROMPT_NO_MUTATION.lower()
-        assert "get_pr_details" in prompt_lower
-        # The "DO THIS FIRST" or "FIRST" instruction must precede coverage
-        first_idx = prompt_lower.find("first")
-        pr_idx = prompt_lower.find("get_pr_details")
-        assert first_idx != -1 and pr_idx != -1
-
-    def test_qa_prompt_instructs_coverage_on_branch(self) -> None:
-        """QA prompt must tell the agent to call run_coverage_on_branch."""
-        from capable_core.agents.qa_architect import QA_ARCHITECT_SYSTEM_PROMPT_NO_MUTATION
-
-        prompt_lower = QA_ARCHITECT_SYSTEM_PROMPT_NO_MUTATION.lower()
-        assert "run_coverage_on_branch" in prompt_lower, "QA prompt does not reference run_coverage_on_branch"
-
-    def test_qa_prompt_coverage_follows_pr_details(self) -> None:
-        """In the workflow, coverage should come after reading PR details."""
-        from capable_core.agents.qa_architect import QA_ARCHITECT_SYSTEM_PROMPT_NO_MUTATION
-
-        prompt_lower = QA_ARCHITECT_SYSTEM_PROMPT_NO_MUTATION.lower()
-        pr_idx = prompt_lower.find("get_pr_details")
-        cov_idx = prompt_lower.find("run_coverage_on_branch")
+    def test_qa_prompt_workflow_ordering(self, qa_prompt_lower: str) -> None:
+        """QA prompt should say FIRST, read the PR with get_pr_details, then run coverage on the branch."""
+        first_idx = qa_prompt_lower.find("first")
+        pr_idx = qa_prompt_lower.find("get_pr_details")
+        cov_idx = qa_prompt_lower.find("run_coverage_on_branch")
+        assert first_idx != -1, "QA prompt has no FIRST instruction"
+        assert pr_idx != -1, "QA prompt does not reference get_pr_details"
+        assert cov_idx != -1, "QA prompt does not reference run_coverage_on_branch"
         assert pr_idx < cov_idx, "run_coverage_on_branch appears before get_pr_details — wrong ordering"
 
 
@@ -248,39 +245,29 @@ class TestQAArchitectAgentReasoning:
 class TestConfigValidation:
     """Verify validate_environment behaviour with mocked env."""
 
-    def test_validation_passes_with_gemini_and_api_key(self, monkeypatch: pytest.MonkeyPatch) -> None:
+    def test_validation_passes_with_gemini_and_api_key(self, monkeypatch: pytest.MonkeyPatch, fresh_config: Callable[[], ModuleType]) -> None:
         """No errors when provider is gemini and GOOGLE_API_KEY is set."""
         monkeypatch.setenv("GOOGLE_API_KEY", "fake-key")
         monkeypatch.setenv("AGENT_PROVIDER_TYPE", "gemini")
-        # Force re-import to pick up fresh env
-        sys.modules.pop("capable_core.config", None)
-        from capable_core.config import validate_environment
-
-        errors = validate_environment()
+        errors = fresh_config().validate_environment()
         google_errors = [e for e in errors if "GOOGLE" in e]
         assert google_errors == []
 
-    def test_validation_skips_google_for_litellm(self, monkeypatch: pytest.MonkeyPatch) -> None:
+    def test_validation_skips_google_for_litellm(self, monkeypatch: pytest.MonkeyPatch, fresh_config: Callable[[], ModuleType]) -> None:
         """No Google-related errors when provider is litellm."""
         monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
         monkeypatch.delenv("GOOGLE_CLOUD_PROJECT", raising=False)
         monkeypatch.setenv("AGENT_PROVIDER_TYPE", "litellm")
-        sys.modules.pop("capable_core.config", None)
-        from capable_core.config import validate_environment
-
-        errors = validate_environment()
+        errors = fresh_config().validate_environment()
         google_errors = [e for e in errors if "GOOGLE" in e]
         assert google_errors == [], f"Unexpected Google errors for litellm provider: {google_errors}"
 
-    def test_validation_flags_missing_google_for_gemini(self, monkeypatch: pytest.MonkeyPatch) -> None:
+    def test_validation_flags_missing_google_for_gemini(self, monkeypatch: pytest.MonkeyPatch, fresh_config: Callable[[], ModuleType]) -> None:
         """Should error when provider is gemini but no Google credentials are set."""
         monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
         monkeypatch.delenv("GOOGLE_CLOUD_PROJECT", raising=False)
         monkeypatch.setenv("AGENT_PROVIDER_TYPE", "gemini")
-        sys.modules.pop("capable_core.config", None)
-        from capable_core.config import validate_environment
-
-        errors = validate_environment()
+        errors = fresh_config().validate_environment()
         google_errors = [e for e in errors if "GOOGLE" in e]
         assert len(google_errors) == 1
         assert "GOOGLE_CLOUD_PROJECT" in google_errors[0]
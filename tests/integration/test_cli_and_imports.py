@@ -11,32 +11,100 @@ All external calls (Docker, Google AI, GitHub) are mocked.
 
 from __future__ import annotations
 
+import functools
 import importlib
+import os
 import subprocess
 import sys
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import pytest
 
 
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+    from types import ModuleType
+
+
 # ---------------------------------------------------------------------------
 # Fixtures
 # ---------------------------------------------------------------------------
 
 
-@pytest.fixture(autouse=True)
-def _mock_environment(monkeypatch: pytest.MonkeyPatch) -> None:
-    """Set minimal env vars so Pydantic Settings won't raise on import."""
-    monkeypatch.setenv("GITHUB_TOKEN", "ghp_fake_token_for_testing")
-    monkeypatch.setenv("GOOGLE_API_KEY", "fake-api-key-for-testing")
-    monkeypatch.setenv("AGENT_PROVIDER_TYPE", "gemini")
+# Environment for the CLI subprocess, copied from os.environ once at import
+_BASE_CLI_ENV: dict[str, str] = {
+    **os.environ,
+    "GITHUB_TOKEN": "ghp_fake",
+    "GOOGLE_API_KEY": "fake-key",
+    "AGENT_PROVIDER_TYPE": "gemini",
+}
+
+# Marks a credential _apply_creds should leave as it is
+_UNSET: Any = object()
+
+
+def _apply_creds(
+    monkeypatch: pytest.MonkeyPatch,
+    *,
+    github: str | None = _UNSET,
+    google_api: str | None = _UNSET,
+    google_project: str | None = _UNSET,
+    provider: str | None = _UNSET,
+) -> None:
+    """Set (a string) or delete (None) the credential env vars; omitted ones are left alone."""
+    mapping = {
+        "GITHUB_TOKEN": github,
+        "GOOGLE_API_KEY": google_api,
+        "GOOGLE_CLOUD_PROJECT": google_project,
+        "AGENT_PROVIDER_TYPE": provider,
+    }
+    for key, value in mapping.items():
+        if value is _UNSET:
+            continue
+        if value is None:
+            monkeypatch.delenv(key, raising=False)
+        else:
+            monkeypatch.setenv(key, value)
+
+
+@functools.cache
+def _build_agent_config(**env: str) -> Any:
+    """Resolve Settings().agent with the given env vars set, once per distinct env.
+
+    Settings loads its sub-configs on attribute access, so the env must still be
+    patched when .agent is read; no config re-import is needed.
+    """
+    from capable_core.config import Settings
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        for key, value in env.items():
+            monkeypatch.setenv(key, value)
+        return Settings().agent
+
+
+@pytest.fixture(autouse=True, scope="module")
+def _mock_environment() -> Iterator[None]:
+    """Set minimal env vars so Pydantic Settings won't raise on import.
+
+    Module-scoped, so the module-scoped fixtures below see them too; a test's own
+    monkeypatch changes are undone back to these values.
+    """
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("GITHUB_TOKEN", "ghp_fake_token_for_testing")
+        monkeypatch.setenv("GOOGLE_API_KEY", "fake-api-key-for-testing")
+        monkeypatch.setenv("AGENT_PROVIDER_TYPE", "gemini")
+        yield
+
 
+@pytest.fixture(scope="module")
+def dry_run_results() -> dict[str, dict[str, Any]]:
+    """run_nightwatch(dry_run=True) results, built once per input for the dry-run tests."""
+    from capable_core.run import run_nightwatch
 
-@pytest.fixture()
-def _fresh_config(monkeypatch: pytest.MonkeyPatch) -> Any:
-    """Drop cached config module so env changes take effect."""
-    yield
-    sys.modules.pop("capable_core.config", None)
+    return {
+        "basic": run_nightwatch(repo_name="test-org/repo", dry_run=True),
+        "with_issue": run_nightwatch(repo_name="test-org/repo", issue_number=42, dry_run=True),
+    }
 
 
 # ===================================================================
@@ -47,29 +115,34 @@ def _fresh_config(monkeypatch: pytest.MonkeyPatch) -> Any:
 class TestCLISmoke:
     """Verify the CLI entry point loads, validates, and runs --dry-run."""
 
+    @staticmethod
+    def _run_main(monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str], *args: str) -> tuple[int, str]:
+        """Run main() in-process with the given CLI args and return (exit code, stdout)."""
+        monkeypatch.setattr("sys.argv", ["foundry-run", *args])
+        from capable_core.run import main
+
+        try:
+            main()
+            code = 0
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        return code, capsys.readouterr().out
+
     @staticmethod
     def _run_cli(*args: str, env_overrides: dict[str, str] | None = None) -> tuple[int, str, str]:
         """Run the CLI as a subprocess and return (returncode, stdout, stderr).
 
         Uses bytes mode + manual decode to avoid Windows cp1255 / text=True issues.
+        Only for the ``python -m capable_core.run`` entry path; prefer _run_main.
         """
-        import os
-
-        env = {
-            **os.environ,
-            "PYTHONIOENCODING": "utf-8",
-            "PYTHONUNBUFFERED": "1",
-            "GITHUB_TOKEN": "ghp_fake",
-            "GOOGLE_API_KEY": "fake-key",
-            "AGENT_PROVIDER_TYPE": "gemini",
-        }
-        if env_overrides:
-            env.update(env_overrides)
+        env = {**_BASE_CLI_ENV, **(env_overrides or {})}
 
+        # -I skips user site-packages and ignores PYTHON* env vars, so UTF-8 stdio
+        # comes from -X utf8; -S is not usable since the package lives in site-packages
         result = subprocess.run(
-            [sys.executable, "-m", "capable_core.run", *args],
+            [sys.executable, "-I", "-X", "utf8", "-m", "capable_core.run", *args],
             capture_output=True,
-            timeout=30,
+            timeout=10,
             env=env,
         )
         stdout = result.stdout.decode("utf-8", errors="replace")
@@ -77,26 +150,38 @@ class TestCLISmoke:
         return result.returncode, stdout, stderr
 
     def test_foundry_run_dry_run_succeeds(self) -> None:
-        """foundry-run --dry-run should exit 0 and print mission prompt."""
+        """python -m capable_core.run --dry-run should exit 0 and print mission prompt."""
         rc, stdout, stderr = self._run_cli("--repo", "test-org/test-repo", "--dry-run")
         assert rc == 0, f"CLI exited {rc}:\nSTDOUT: {stdout}\nSTDERR: {stderr}"
         assert "DRY RUN" in stdout or "dry_run" in stdout.lower()
 
-    def test_foundry_run_dry_run_contains_repo(self) -> None:
-        """--dry-run output should include the target repo name."""
-        rc, stdout, _ = self._run_cli("--repo", "acme/backend", "--dry-run")
+    @pytest.mark.parametrize(
+        ("args", "needles"),
+        [
+            (("--repo", "acme/backend", "--dry-run"), ("DRY RUN", "acme/backend")),
+            (("--repo", "acme/backend", "--issue", "99", "--dry-run"), ("DRY RUN", "acme/backend", "#99")),
+        ],
+        ids=["repo", "repo-and-issue"],
+    )
+    def test_foundry_run_dry_run_prints_mission(
+        self, args: tuple[str, ...], needles: tuple[str, ...], monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        """main() --dry-run should exit cleanly and print the mission's repo and issue."""
+        rc, stdout = self._run_main(monkeypatch, capsys, *args)
         assert rc == 0
-        assert "acme/backend" in stdout
+        for needle in needles:
+            assert needle in stdout, f"{needle!r} missing from dry-run output"
 
-    def test_foundry_run_dry_run_with_issue_number(self) -> None:
-        """--dry-run with --issue should reference that issue number."""
-        rc, stdout, _ = self._run_cli("--repo", "acme/backend", "--issue", "99", "--dry-run")
+    @pytest.mark.parametrize("flag", ["--help", "--hel", "-h", "-vh"])
+    def test_foundry_run_help_variants_print_help(self, flag: str, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]) -> None:
+        """Abbreviated --help and -h inside a short-flag cluster should print the full help."""
+        rc, stdout = self._run_main(monkeypatch, capsys, flag)
         assert rc == 0
-        assert "#99" in stdout
+        assert "Examples:" in stdout
 
-    def test_foundry_run_missing_repo_flag_exits_nonzero(self) -> None:
+    def test_foundry_run_missing_repo_flag_exits_nonzero(self, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]) -> None:
         """Omitting the required --repo flag should exit with error."""
-        rc, _, _ = self._run_cli()
+        rc, _ = self._run_main(monkeypatch, capsys)
         assert rc != 0
 
     def test_foundry_run_fails_without_github_token(self, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]) -> None:
@@ -117,51 +202,16 @@ class TestCLISmoke:
         captured = capsys.readouterr()
         assert "GITHUB_TOKEN" in captured.out
 
-    def test_cli_main_dry_run_in_process(self, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]) -> None:
-        """Run main() in-process with --dry-run to verify it prints without crashing."""
-        monkeypatch.setattr("sys.argv", ["foundry-run", "--repo", "test-org/repo", "--dry-run"])
-        from capable_core.run import main
-
-        # main() does not call sys.exit on dry-run success
-        try:
-            main()
-        except SystemExit as e:
-            assert e.code is None or e.code == 0, f"main() exited with code {e.code}"
-
-        captured = capsys.readouterr()
-        assert "DRY RUN" in captured.out
-
-    def test_cli_main_dry_run_no_exit(self, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]) -> None:
-        """main() with --dry-run should complete successfully and print mission info."""
-        monkeypatch.setattr("sys.argv", ["foundry-run", "--repo", "acme/backend", "--issue", "7", "--dry-run"])
-
-        from capable_core.run import main
-
-        # main() may or may not call sys.exit — handle both
-        try:
-            main()
-        except SystemExit as e:
-            assert e.code is None or e.code == 0, f"main() exited with code {e.code}"
-
-        captured = capsys.readouterr()
-        assert "DRY RUN" in captured.out
-        assert "acme/backend" in captured.out
-        assert "#7" in captured.out
-
-    def test_run_nightwatch_dry_run_returns_mission(self) -> None:
+    def test_run_nightwatch_dry_run_returns_mission(self, dry_run_results: dict[str, dict[str, Any]]) -> None:
         """run_nightwatch(dry_run=True) should return status=dry_run with a mission string."""
-        from capable_core.run import run_nightwatch
-
-        result = run_nightwatch(repo_name="test-org/repo", dry_run=True)
+        result = dry_run_results["basic"]
         assert result["status"] == "dry_run"
         assert result["would_execute"] is True
         assert "test-org/repo" in result["mission"]
 
-    def test_run_nightwatch_dry_run_with_issue(self) -> None:
+    def test_run_nightwatch_dry_run_with_issue(self, dry_run_results: dict[str, dict[str, Any]]) -> None:
         """run_nightwatch(dry_run=True, issue_number=42) should include the issue in the mission."""
-        from capable_core.run import run_nightwatch
-
-        result = run_nightwatch(repo_name="test-org/repo", issue_number=42, dry_run=True)
+        result = dry_run_results["with_issue"]
         assert result["status"] == "dry_run"
         assert "#42" in result["mission"]
 
@@ -172,7 +222,7 @@ class TestCLISmoke:
 
 # Every .py module in the package. If a new module is added and has a
 # circular import, it will fail here before it breaks production.
-ALL_MODULES = [
+ALL_MODULES: tuple[str, ...] = (
     "capable_core",
     "capable_core.config",
     "capable_core.run",
@@ -188,22 +238,22 @@ ALL_MODULES = [
     "capable_core.flows",
     "capable_core.flows.nightwatch",
     "capable_core.flows.nightwatch.agents",
-]
+)
 
 
 class TestModuleImports:
     """Ensure every package module imports without error."""
 
-    @pytest.mark.parametrize("module_name", ALL_MODULES)
+    @pytest.mark.parametrize("module_name", ALL_MODULES, ids=ALL_MODULES)
     def test_module_imports_cleanly(self, module_name: str) -> None:
         """Import the module; any ImportError or circular import will surface here."""
-        # Remove cached version so we get a fresh import path
-        sys.modules.pop(module_name, None)
+        # Modules already imported by earlier tests are cache hits: the first import in
+        # this process is what can fail, and re-importing would only repeat it
         try:
             mod = importlib.import_module(module_name)
-            assert mod is not None
-        except Exception as exc:
-            pytest.fail(f"Failed to import {module_name}: {exc}")
+        except ImportError as exc:
+            pytest.fail(f"ImportError for {module_name}: {exc}")
+        assert mod is not None
 
     def test_package_version_is_defined(self) -> None:
         """capable_core.__version__ should be a non-empty string."""
@@ -230,67 +280,35 @@ class TestModuleImports:
 class TestConfigValidationExtended:
     """Extended config validation covering edge cases beyond test_agent_reasoning.py."""
 
-    def test_missing_github_token_is_flagged(self, monkeypatch: pytest.MonkeyPatch, _fresh_config: Any) -> None:
+    def test_missing_github_token_is_flagged(self, monkeypatch: pytest.MonkeyPatch, fresh_config: Callable[[], ModuleType]) -> None:
         """validate_environment must report missing GITHUB_TOKEN."""
-        monkeypatch.delenv("GITHUB_TOKEN", raising=False)
-        monkeypatch.setenv("GOOGLE_API_KEY", "fake-key")
-        monkeypatch.setenv("AGENT_PROVIDER_TYPE", "gemini")
-        sys.modules.pop("capable_core.config", None)
-        from capable_core.config import validate_environment
-
-        errors = validate_environment()
+        _apply_creds(monkeypatch, github=None, google_api="fake-key", provider="gemini")
+        errors = fresh_config().validate_environment()
         github_errors = [e for e in errors if "GITHUB_TOKEN" in e]
         assert len(github_errors) == 1
 
-    def test_missing_all_credentials_returns_multiple_errors(self, monkeypatch: pytest.MonkeyPatch, _fresh_config: Any) -> None:
+    def test_missing_all_credentials_returns_multiple_errors(self, monkeypatch: pytest.MonkeyPatch, fresh_config: Callable[[], ModuleType]) -> None:
         """Missing both GITHUB_TOKEN and Google creds should yield multiple errors."""
-        monkeypatch.delenv("GITHUB_TOKEN", raising=False)
-        monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
-        monkeypatch.delenv("GOOGLE_CLOUD_PROJECT", raising=False)
-        monkeypatch.setenv("AGENT_PROVIDER_TYPE", "gemini")
-        sys.modules.pop("capable_core.config", None)
-        from capable_core.config import validate_environment
-
-        errors = validate_environment()
+        _apply_creds(monkeypatch, github=None, google_api=None, google_project=None, provider="gemini")
+        errors = fresh_config().validate_environment()
         assert len(errors) >= 2
         topics = " ".join(errors)
         assert "GITHUB_TOKEN" in topics
         assert "GOOGLE" in topics
 
-    def test_vertex_ai_project_satisfies_google_requirement(self, monkeypatch: pytest.MonkeyPatch, _fresh_config: Any) -> None:
+    def test_vertex_ai_project_satisfies_google_requirement(self, monkeypatch: pytest.MonkeyPatch, fresh_config: Callable[[], ModuleType]) -> None:
         """GOOGLE_CLOUD_PROJECT alone (no API key) should be valid for Gemini provider."""
-        monkeypatch.setenv("GITHUB_TOKEN", "ghp_fake")
-        monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
-        monkeypatch.setenv("GOOGLE_CLOUD_PROJECT", "my-project")
-        monkeypatch.setenv("AGENT_PROVIDER_TYPE", "gemini")
-        sys.modules.pop("capable_core.config", None)
-        from capable_core.config import validate_environment
-
-        errors = validate_environment()
-        assert errors == []
-
-    def test_litellm_provider_skips_google_check(self, monkeypatch: pytest.MonkeyPatch, _fresh_config: Any) -> None:
-        """Provider litellm should not require any Google credentials."""
-        monkeypatch.setenv("GITHUB_TOKEN", "ghp_fake")
-        monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
-        monkeypatch.delenv("GOOGLE_CLOUD_PROJECT", raising=False)
-        monkeypatch.setenv("AGENT_PROVIDER_TYPE", "litellm")
-        sys.modules.pop("capable_core.config", None)
-        from capable_core.config import validate_environment
-
-        errors = validate_environment()
+        _apply_creds(monkeypatch, github="ghp_fake", google_api=None, google_project="my-project", provider="gemini")
+        errors = fresh_config().validate_environment()
         assert errors == []
 
-    def test_hf_local_provider_skips_google_check(self, monkeypatch: pytest.MonkeyPatch, _fresh_config: Any) -> None:
-        """Provider hf-local should not require any Google credentials."""
-        monkeypatch.setenv("GITHUB_TOKEN", "ghp_fake")
-        monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
-        monkeypatch.delenv("GOOGLE_CLOUD_PROJECT", raising=False)
-        monkeypatch.setenv("AGENT_PROVIDER_TYPE", "hf-local")
-        sys.modules.pop("capable_core.config", None)
-        from capable_core.config import validate_environment
-
-        errors = validate_environment()
+    @pytest.mark.parametrize("provider", ["litellm", "hf-local"])
+    def test_non_gemini_provider_skips_google_check(
+        self, provider: str, monkeypatch: pytest.MonkeyPatch, fresh_config: Callable[[], ModuleType]
+    ) -> None:
+        """Non-Gemini providers should not require any Google credentials."""
+        _apply_creds(monkeypatch, github="ghp_fake", google_api=None, google_project=None, provider=provider)
+        errors = fresh_config().validate_environment()
         assert errors == []
 
     def test_settings_loads_agent_defaults(self) -> None:
@@ -313,17 +331,14 @@ class TestConfigValidationExtended:
         assert settings.sandbox.memory_limit  # non-empty
         assert settings.sandbox.cpu_limit > 0
 
-    def test_settings_per_role_overrides_empty_by_default(self, monkeypatch: pytest.MonkeyPatch, _fresh_config: Any) -> None:
+    def test_settings_per_role_overrides_empty_by_default(self, monkeypatch: pytest.MonkeyPatch, fresh_config: Callable[[], ModuleType]) -> None:
         """Per-role model overrides should be empty strings when env vars are unset."""
         monkeypatch.delenv("AGENT_DEVELOPER_MODEL", raising=False)
         monkeypatch.delenv("AGENT_DEVELOPER_PROVIDER", raising=False)
         monkeypatch.delenv("AGENT_QA_MODEL", raising=False)
         monkeypatch.delenv("AGENT_QA_PROVIDER", raising=False)
-        sys.modules.pop("capable_core.config", None)
-        from capable_core.config import AgentConfig
-
         # Instantiate directly to bypass .env file
-        config = AgentConfig(
+        config = fresh_config().AgentConfig(
             _env_file=None,  # type: ignore[call-arg]
         )
         assert config.developer_model == ""
@@ -331,17 +346,15 @@ class TestConfigValidationExtended:
         assert config.qa_model == ""
         assert config.qa_provider == ""
 
-    def test_settings_per_role_overrides_from_env(self, monkeypatch: pytest.MonkeyPatch, _fresh_config: Any) -> None:
+    def test_settings_per_role_overrides_from_env(self) -> None:
         """Per-role model overrides should be read from env vars."""
-        monkeypatch.setenv("AGENT_DEVELOPER_MODEL", "gpt-4o")
-        monkeypatch.setenv("AGENT_DEVELOPER_PROVIDER", "litellm")
-        monkeypatch.setenv("AGENT_QA_MODEL", "claude-sonnet")
-        monkeypatch.setenv("AGENT_QA_PROVIDER", "claude")
-        sys.modules.pop("capable_core.config", None)
-        from capable_core.config import Settings
-
-        s = Settings()
-        assert s.agent.developer_model == "gpt-4o"
-        assert s.agent.developer_provider == "litellm"
-        assert s.agent.qa_model == "claude-sonnet"
-        assert s.agent.qa_provider == "claude"
+        agent = _build_agent_config(
+            AGENT_DEVELOPER_MODEL="gpt-4o",
+            AGENT_DEVELOPER_PROVIDER="litellm",
+            AGENT_QA_MODEL="claude-sonnet",
+            AGENT_QA_PROVIDER="claude",
+        )
+        assert agent.developer_model == "gpt-4o"
+        assert agent.developer_provider == "litellm"
+        assert agent.qa_model == "claude-sonnet"
+        assert agent.qa_provider == "claude"
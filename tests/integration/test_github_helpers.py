@@ -0,0 +1,300 @@
+"""
+Table tests for the request-level helpers of github_tools.
+
+Covers what the push and CI-polling tools send to GitHub:
+- _commit_file_changes: one Git Data API commit per push, blobs uploaded once.
+- _get_json_conditional: ETag reuse on 304 Not Modified.
+- _poll_ci_status: conditional check-run polling, pagination and the status fallback.
+
+A fake repository records every request, so no token or network is needed.
+"""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+
+if TYPE_CHECKING:
+    from types import ModuleType
+
+
+# ---------------------------------------------------------------------------
+# Fakes & fixtures
+# ---------------------------------------------------------------------------
+
+
+class _FakeRequester:
+    """Stands in for PyGithub's Requester: replays scripted (headers, data) responses and records each call."""
+
+    def __init__(self, responses: list[Any] | None = None):
+        self.responses = list(responses or [])
+        self.calls: list[dict[str, Any]] = []
+
+    def requestJsonAndCheck(self, method: str, url: str, parameters: Any = None, headers: Any = None, input: Any = None) -> Any:
+        self.calls.append({"method": method, "url": url, "parameters": parameters, "headers": headers, "input": input})
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+class _FakeRepo:
+    """A lazy PyGithub Repository: a URL, a requester, and a branch whose tree holds the given entries."""
+
+    url = "/repos/acme/backend"
+
+    def __init__(self, tree: dict[str, tuple[str, str, str]] | None = None, responses: list[Any] | None = None):
+        self._requester = _FakeRequester(responses)
+        self.tree = [SimpleNamespace(path=path, type=kind, sha=sha, mode=mode) for path, (kind, sha, mode) in (tree or {}).items()]
+        self.blobs: list[str] = []
+        self.ref_reads = 0
+
+    def get_git_ref(self, ref: str) -> Any:
+        self.ref_reads += 1
+        return SimpleNamespace(object=SimpleNamespace(sha="head-sha"))
+
+    def get_git_commit(self, sha: str) -> Any:
+        return SimpleNamespace(sha=sha, tree=SimpleNamespace(sha="tree-sha"))
+
+    def get_git_tree(self, sha: str, recursive: bool = False) -> Any:
+        return SimpleNamespace(truncated=False, tree=self.tree)
+
+    def create_git_blob(self, content: str, encoding: str) -> Any:
+        self.blobs.append(content)
+        return SimpleNamespace(sha=f"blob-{len(self.blobs)}")
+
+
+# Branch contents of the commit tests, path -> (type, sha, mode)
+_BRANCH_TREE = {
+    "README.md": ("blob", "readme-sha", "100644"),
+    "run.sh": ("blob", "run-sha", "100755"),
+    "src": ("tree", "src-sha", "040000"),
+}
+
+# Responses to the tree, commit and ref-update requests of one successful commit
+_COMMIT_RESPONSES = [({}, {"sha": "new-tree"}), ({}, {"sha": "new-commit"}), ({}, {})]
+
+
+@pytest.fixture(scope="module")
+def github_tools() -> ModuleType:
+    """capable_core.tools.github_tools, imported on first use like the other suites' modules."""
+    from capable_core.tools import github_tools
+
+    return github_tools
+
+
+@pytest.fixture(autouse=True)
+def _empty_caches(github_tools: ModuleType, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Give each test empty branch-tip, ETag and CI-status caches, restored afterwards."""
+    monkeypatch.setattr(github_tools, "_BRANCH_TIP_CACHE", {})
+    monkeypatch.setattr(github_tools, "_etag_cache", {})
+    monkeypatch.setattr(github_tools, "_ci_status_cache", {})
+
+
+def _check_runs(*states: tuple[str, str | None], total: int | None = None) -> dict[str, Any]:
+    """A check-runs payload with one run per (status, conclusion)."""
+    runs = [{"name": f"job-{i}", "status": status, "conclusion": conclusion} for i, (status, conclusion) in enumerate(states)]
+    return {"total_count": len(runs) if total is None else total, "check_runs": runs}
+
+
+# ===================================================================
+# Committing File Changes
+# ===================================================================
+
+
+class TestCommitFileChanges:
+    """_commit_file_changes against a fake repo whose branch holds a few files."""
+
+    @pytest.mark.parametrize(
+        ("file_changes", "created", "updated", "uploads"),
+        [
+            ({"new.py": "print('new')\n"}, ["new.py"], [], ["print('new')\n"]),
+            ({"README.md": "# Backend\n"}, [], ["README.md"], ["# Backend\n"]),
+            ({"a.py": "same\n", "b.py": "same\n"}, ["a.py", "b.py"], [], ["same\n"]),
+            ({"new.py": "x = 1\n", "run.sh": "#!/bin/sh\n"}, ["new.py"], ["run.sh"], ["x = 1\n", "#!/bin/sh\n"]),
+        ],
+        ids=["create", "update", "same-content-uploaded-once", "create-and-update"],
+    )
+    def test_single_commit(
+        self,
+        github_tools: ModuleType,
+        file_changes: dict[str, str],
+        created: list[str],
+        updated: list[str],
+        uploads: list[str],
+    ) -> None:
+        """All changes land in one tree/commit/ref-update sequence with each distinct content uploaded once."""
+        repo = _FakeRepo(_BRANCH_TREE, list(_COMMIT_RESPONSES))
+
+        assert github_tools._commit_file_changes(repo, "fix-1", file_changes, "Fix it") == (created, updated)
+
+        assert sorted(repo.blobs) == sorted(uploads)
+        calls = repo._requester.calls
+        assert [(call["method"], call["url"]) for call in calls] == [
+            ("POST", f"{repo.url}/git/trees"),
+            ("POST", f"{repo.url}/git/commits"),
+            ("PATCH", f"{repo.url}/git/refs/heads/fix-1"),
+        ]
+        assert calls[0]["input"]["base_tree"] == "tree-sha"
+        assert {element["path"] for element in calls[0]["input"]["tree"]} == set(file_changes)
+        assert calls[1]["input"] == {"message": "Fix it", "tree": "new-tree", "parents": ["head-sha"]}
+        assert calls[2]["input"] == {"sha": "new-commit", "force": False}
+        assert github_tools._BRANCH_TIP_CACHE[(repo.url, "fix-1")] == ("new-commit", "new-tree")
+
+    @pytest.mark.parametrize(
+        ("path", "mode"),
+        [("run.sh", "100755"), ("README.md", "100644"), ("brand/new.txt", "100644")],
+    )
+    def test_keeps_existing_file_mode(self, github_tools: ModuleType, path: str, mode: str) -> None:
+        """Updated files keep their mode (an executable stays executable); new files are 100644."""
+        repo = _FakeRepo(_BRANCH_TREE, list(_COMMIT_RESPONSES))
+        github_tools._commit_file_changes(repo, "fix-1", {path: "changed content\n"}, "Fix it")
+        (element,) = repo._requester.calls[0]["input"]["tree"]
+        assert element["mode"] == mode
+
+    def test_unchanged_content_not_uploaded(self, github_tools: ModuleType) -> None:
+        """Content whose blob SHA the tree already holds isn't uploaded again."""
+        content = "unchanged\n"
+        tree = {"keep.txt": ("blob", github_tools._git_blob_sha(content), "100644")}
+        repo = _FakeRepo(tree, list(_COMMIT_RESPONSES))
+        assert github_tools._commit_file_changes(repo, "fix-1", {"keep.txt": content}, "Touch") == ([], ["keep.txt"])
+        assert repo.blobs == []
+
+    def test_directory_path_rejected(self, github_tools: ModuleType) -> None:
+        """A path naming a directory on the branch raises before anything is uploaded or committed."""
+        repo = _FakeRepo(_BRANCH_TREE)
+        with pytest.raises(github_tools._DirectoryPathError):
+            github_tools._commit_file_changes(repo, "fix-1", {"src": "not a file\n"}, "Oops")
+        assert repo.blobs == []
+        assert repo._requester.calls == []
+
+    @pytest.mark.parametrize("status", [409, 422])
+    def test_stale_cached_tip_retried_from_live_branch(self, github_tools: ModuleType, status: int) -> None:
+        """A rejected ref update on a cached tip re-reads the branch and commits once more."""
+        from github import GithubException
+
+        repo = _FakeRepo(_BRANCH_TREE, [*_COMMIT_RESPONSES[:2], GithubException(status, {}, {}), *_COMMIT_RESPONSES])
+        github_tools._BRANCH_TIP_CACHE[(repo.url, "fix-1")] = ("stale-sha", "tree-sha")
+
+        assert github_tools._commit_file_changes(repo, "fix-1", {"new.py": "x = 1\n"}, "Fix it") == (["new.py"], [])
+        assert repo.ref_reads == 1
+        commits = [call["input"] for call in repo._requester.calls if call["url"].endswith("/git/commits")]
+        assert [commit["parents"] for commit in commits] == [["stale-sha"], ["head-sha"]]
+
+    def test_rejected_update_without_cached_tip_raises(self, github_tools: ModuleType) -> None:
+        """A ref update rejected against a freshly read tip is a real conflict and isn't retried."""
+        from github import GithubException
+
+        repo = _FakeRepo(_BRANCH_TREE, [*_COMMIT_RESPONSES[:2], GithubException(422, {}, {})])
+        with pytest.raises(GithubException):
+            github_tools._commit_file_changes(repo, "fix-1", {"new.py": "x = 1\n"}, "Fix it")
+        assert (repo.url, "fix-1") not in github_tools._BRANCH_TIP_CACHE
+
+
+# ===================================================================
+# Conditional Requests
+# ===================================================================
+
+
+class TestGetJsonConditional:
+    """_get_json_conditional sends the last ETag of a URL and query and reuses its body on 304."""
+
+    @pytest.mark.parametrize(
+        ("responses", "expected", "sent_etags"),
+        [
+            ([({"etag": '"e1"'}, {"n": 1}), ({"etag": '"e1"'}, {})], [{"n": 1}, {"n": 1}], [None, '"e1"']),
+            ([({"etag": '"e1"'}, {"n": 1}), ({"etag": '"e2"'}, {"n": 2})], [{"n": 1}, {"n": 2}], [None, '"e1"']),
+            ([({}, {"n": 1}), ({}, {"n": 2})], [{"n": 1}, {"n": 2}], [None, None]),
+            (
+                [({"etag": '"e1"'}, {"n": 1}), ({"etag": '"e2"'}, {"n": 2}), ({"etag": '"e2"'}, {})],
+                [{"n": 1}, {"n": 2}, {"n": 2}],
+                [None, '"e1"', '"e2"'],
+            ),
+        ],
+        ids=["not-modified", "modified", "no-etag-not-cached", "latest-etag-sent"],
+    )
+    def test_repeat_reads(self, github_tools: ModuleType, responses: list[Any], expected: list[Any], sent_etags: list[str | None]) -> None:
+        """Each read sends the ETag of the last body seen, and a 304's empty body is replaced by that body."""
+        repo = _FakeRepo(responses=responses)
+        url = f"{repo.url}/commits/abc/status"
+
+        assert [github_tools._get_json_conditional(repo, url) for _ in responses] == expected
+        assert [(call["headers"] or {}).get("If-None-Match") for call in repo._requester.calls] == sent_etags
+
+    def test_etags_kept_per_query(self, github_tools: ModuleType) -> None:
+        """The same URL with another query (e.g. the next page) has an ETag of its own."""
+        repo = _FakeRepo(responses=[({"etag": '"p1"'}, {"page": 1}), ({"etag": '"p2"'}, {"page": 2}), ({}, {}), ({}, {})])
+        url = f"{repo.url}/commits/abc/check-runs"
+
+        for page in (1, 2, 1, 2):
+            github_tools._get_json_conditional(repo, url, parameters={"per_page": 100, "page": page})
+
+        assert [call["headers"] and call["headers"]["If-None-Match"] for call in repo._requester.calls] == [None, None, '"p1"', '"p2"']
+
+
+# ===================================================================
+# CI Polling
+# ===================================================================
+
+
+class TestPollCiStatus:
+    """_poll_ci_status over one poll's check-runs response."""
+
+    @pytest.mark.parametrize(
+        ("response", "expected"),
+        [
+            (({"etag": '"e1"'}, {}), (None, '"e1"')),
+            (({}, {}), (None, '"old"')),
+            (({"etag": '"e2"'}, _check_runs(("completed", "success"), ("completed", "skipped"))), ("success", '"e2"')),
+            (({"etag": '"e2"'}, _check_runs(("completed", "success"), ("in_progress", None))), ("in_progress", '"e2"')),
+            (({"etag": '"e2"'}, _check_runs(("completed", "success"), ("completed", "failure"))), ("failure", '"e2"')),
+            (({"etag": '"e2"'}, _check_runs(("completed", "timed_out"))), ("failure", '"e2"')),
+            (({"etag": '"e2"'}, _check_runs(("completed", "success"), ("completed", "cancelled"))), ("cancelled", '"e2"')),
+        ],
+        ids=["not-modified", "not-modified-keeps-etag", "success", "in-progress", "failure", "timed-out", "cancelled"],
+    )
+    def test_single_page(self, github_tools: ModuleType, response: tuple[dict[str, str], dict[str, Any]], expected: tuple[Any, Any]) -> None:
+        """One conditional request per poll; a 304 reports no change and keeps the ETag."""
+        repo = _FakeRepo(responses=[response])
+
+        assert github_tools._poll_ci_status(repo, "acme/backend", "abc", '"old"') == expected
+        (call,) = repo._requester.calls
+        assert call["headers"] == {"If-None-Match": '"old"'}
+        assert call["parameters"] == github_tools._CHECK_RUNS_PARAMETERS
+
+    def test_payload_remembered_for_failed_job_names(self, github_tools: ModuleType) -> None:
+        """A polled payload primes the ETag cache, so the failed-job read right after it is a 304."""
+        payload = _check_runs(("completed", "failure"), ("completed", "success"))
+        repo = _FakeRepo(responses=[({"etag": '"e1"'}, payload), ({"etag": '"e1"'}, {})])
+
+        assert github_tools._poll_ci_status(repo, "acme/backend", "abc") == ("failure", '"e1"')
+        assert github_tools._failed_check_run_names(repo, "abc") == ["job-0"]
+        assert repo._requester.calls[1]["headers"] == {"If-None-Match": '"e1"'}
+
+    def test_status_only_ci_falls_back_to_combined_status(self, github_tools: ModuleType, monkeypatch: pytest.MonkeyPatch) -> None:
+        """No check runs: the combined status decides, and no ETag is kept so the next poll re-reads it."""
+        monkeypatch.setattr(github_tools, "get_ci_status", lambda repo_name, commit_sha: "pending")
+        repo = _FakeRepo(responses=[({"etag": '"e1"'}, _check_runs())])
+
+        assert github_tools._poll_ci_status(repo, "acme/backend", "abc") == ("pending", None)
+
+    @pytest.mark.parametrize(
+        ("second_page", "expected"),
+        [
+            (_check_runs(("completed", "failure"), total=101), "failure"),
+            (_check_runs(("queued", None), total=101), "in_progress"),
+            (_check_runs(("completed", "success"), total=101), "success"),
+            ({"total_count": 101, "check_runs": []}, "success"),
+        ],
+        ids=["failure-on-page-2", "queued-on-page-2", "all-passed", "page-2-vanished"],
+    )
+    def test_later_pages_read(self, github_tools: ModuleType, second_page: dict[str, Any], expected: str) -> None:
+        """More than a page of runs: the rest are read too, and no ETag is kept for the first page alone."""
+        first_page = _check_runs(*[("completed", "success")] * 100, total=101)
+        repo = _FakeRepo(responses=[({"etag": '"e1"'}, first_page), ({"etag": '"p2"'}, second_page)])
+
+        assert github_tools._poll_ci_status(repo, "acme/backend", "abc") == (expected, None)
+        assert repo._requester.calls[1]["parameters"] == {**github_tools._CHECK_RUNS_PARAMETERS, "page": 2}
@@ -0,0 +1,334 @@
+"""
+Table tests for the output-parsing and output-capping helpers of sandbox_tools.
+
+Covers the pieces the branch tools' reports are built from:
+- Test-summary and coverage scraping (_parse_test_output, _search_by_priority).
+- Output capping on the host (_BoundedOutput) and in the container (_with_capped_output).
+- Machine-readable coverage and Stryker reports.
+- The read-only command check of run_command_on_branch.
+
+No Docker daemon is needed; _with_capped_output's script runs under the local sh.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import shutil
+import subprocess
+from typing import TYPE_CHECKING
+
+import pytest
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from types import ModuleType
+
+    _Run = Callable[[str], subprocess.CompletedProcess[str]]
+
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture(scope="module")
+def sandbox_tools() -> ModuleType:
+    """capable_core.tools.sandbox_tools, imported on first use like the other suites' modules."""
+    from capable_core.tools import sandbox_tools
+
+    return sandbox_tools
+
+
+def _parse(sandbox_tools: ModuleType, stdout: str, stderr: str = "") -> tuple[int, int, int, float | None]:
+    """(passed, failed, skipped, coverage) parsed from a command's output."""
+    # _parse_test_output reads no instance state, so no sandbox (or Docker) is needed
+    result = sandbox_tools.DockerSandbox._parse_test_output(None, stdout, stderr)
+    return result.tests_passed, result.tests_failed, result.tests_skipped, result.coverage_percent
+
+
+# ===================================================================
+# Test Summary Parsing
+# ===================================================================
+
+
+class TestParseTestOutput:
+    """_parse_test_output over each framework's summary line, via the merged _RE_TEST_SUMMARY."""
+
+    @pytest.mark.parametrize(
+        ("stdout", "expected"),
+        [
+            ("===== 3 passed, 1 failed, 2 skipped in 0.52s =====", (3, 1, 2, None)),
+            ("Tests:       1 failed, 4 passed, 5 total", (4, 1, 0, None)),
+            ("Tests run: 10, Failures: 1, Errors: 1, Skipped: 2", (6, 2, 2, None)),
+            ("--- PASS: TestA (0.00s)\n--- FAIL: TestB (0.01s)\n--- SKIP: TestC (0.00s)", (1, 1, 1, None)),
+            ("test result: FAILED. 5 passed; 1 failed; 2 ignored; 0 measured", (5, 1, 2, None)),
+            ("  4 passing (12ms)\n  1 failing\n  2 pending", (4, 1, 2, None)),
+            ("Failed!  - Failed:     1, Passed:     9, Skipped:     0, Total:    10", (9, 1, 0, None)),
+            ("no summary here", (0, 0, 0, None)),
+        ],
+        ids=["pytest", "jest", "maven", "go", "cargo", "mocha", "dotnet", "none"],
+    )
+    def test_counts_by_framework(self, sandbox_tools: ModuleType, stdout: str, expected: tuple[int, int, int, float | None]) -> None:
+        """Each framework's summary should be counted once, not again by the generic patterns."""
+        assert _parse(sandbox_tools, stdout) == expected
+
+    @pytest.mark.parametrize(
+        ("stdout", "coverage"),
+        [
+            ("TOTAL     100     20    80%", 80.0),
+            ("All files |   91.5 |    80 |   90 |   91.5 |", 91.5),
+            ("Statements   : 77.7% ( 7/9 )", 77.7),
+            ("total:\t(statements)\t64.2%", 64.2),
+            ("ok  \tpkg\t0.1s\tcoverage: 72.3% of statements", 72.3),
+            ("|| 55.25% coverage, 100/181 lines covered", 55.25),
+            ("coverage: 72.3% of statements\nTOTAL 100 20 80%", 80.0),
+        ],
+        ids=["python", "istanbul-table", "istanbul-summary", "go-total", "go", "tarpaulin", "python-preferred"],
+    )
+    def test_coverage_by_format(self, sandbox_tools: ModuleType, stdout: str, coverage: float) -> None:
+        """The first coverage format in _COVERAGE_GROUPS order wins, wherever it appears."""
+        assert _parse(sandbox_tools, stdout)[3] == coverage
+
+    def test_stderr_is_scanned(self, sandbox_tools: ModuleType) -> None:
+        """Summaries printed on stderr (cargo, go) count like stdout ones."""
+        assert _parse(sandbox_tools, "", "test result: ok. 2 passed; 0 failed; 0 ignored") == (2, 0, 0, None)
+
+    @pytest.mark.parametrize(
+        ("body", "appendix", "expected"),
+        [
+            ("--- PASS: TestA\n--- FAIL: TestB", "--- PASS: TestA\n--- FAIL: TestB", (1, 1, 0, None)),
+            ("[... truncated in the sandbox ...]", "TOTAL 100 10 90%", (0, 0, 0, 90.0)),
+            ("TOTAL 100 20 80%", "TOTAL 100 10 90%", (0, 0, 0, 80.0)),
+        ],
+        ids=["go-lines-not-recounted", "fills-missing-summary", "body-wins"],
+    )
+    def test_summary_lines_appendix(self, sandbox_tools: ModuleType, body: str, appendix: str, expected: tuple[int, int, int, float | None]) -> None:
+        """The appendix of a cut output only fills in summaries the output itself lacks."""
+        stdout = f"{body}\n{sandbox_tools._SUMMARY_LINES_MARKER}\n{appendix}"
+        assert _parse(sandbox_tools, stdout) == expected
+
+
+# ===================================================================
+# Priority Alternation
+# ===================================================================
+
+
+class TestSearchByPriority:
+    """_search_by_priority must agree with trying each pattern in turn with re.search."""
+
+    _PATTERNS = (r"TOTAL\s+\d+\s+\d+\s+(\d+)%", r"Coverage:\s*([\d.]+)%", r"(\d+(?:\.\d+)?)\s*%\s*coverage")
+
+    @pytest.mark.parametrize(
+        ("text", "expected"),
+        [
+            ("TOTAL 10 2 80%", "80"),
+            ("coverage: 61.5%", "61.5"),
+            ("61.5% coverage", "61.5"),
+            ("Coverage: 50%\nTOTAL 10 2 80%", "80"),
+            ("12% coverage then Coverage: 34%", "34"),
+            ("Coverage: 12% coverage", "12"),
+            ("nothing to see", None),
+            ("", None),
+        ],
+        ids=["first", "second-case-insensitive", "third", "later-but-preferred", "preferred-second", "overlapping", "none", "empty"],
+    )
+    def test_matches_sequential_search(self, sandbox_tools: ModuleType, text: str, expected: str | None) -> None:
+        """Earliest-listed alternative wins, even when a lower one matches first or overlaps it."""
+        sequential = next((m[1] for p in self._PATTERNS if (m := re.search(p, text, re.IGNORECASE))), None)
+        assert sequential == expected
+        assert sandbox_tools._search_by_priority(sandbox_tools._priority_alternation(*self._PATTERNS), text) == expected
+
+    @pytest.mark.parametrize(
+        ("text", "figure", "expected"),
+        [
+            ("425 mutants, Killed: 400, Survived: 25", "total", "425"),
+            ("Total: 90 ... 100 mutations", "total", "90"),
+            ("380 detected\nKilled: 400", "killed", "400"),
+            ("12 undetected, 7 survived", "survived", "7"),
+            ("Score: 80%\nMutation score: 94.35%", "score", "94.35"),
+        ],
+    )
+    def test_mutation_counts(self, sandbox_tools: ModuleType, text: str, figure: str, expected: str) -> None:
+        """The generic mutation-count alternations prefer their explicit labels."""
+        assert sandbox_tools._search_by_priority(sandbox_tools._RE_MUTATION_COUNTS[figure], text) == expected
+
+
+# ===================================================================
+# Output Capping
+# ===================================================================
+
+
+class TestBoundedOutput:
+    """_BoundedOutput keeps head_bytes from the start and max_bytes - head_bytes from the end."""
+
+    @pytest.mark.parametrize(
+        ("chunks", "expected"),
+        [
+            ([], ""),
+            ([b"abc"], "abc"),
+            ([b"abcd", b"efghij"], "abcdefghij"),
+            ([b"abcd", b"efgh", b"ijklmn"], "abcd\n[... 4 bytes truncated ...]\nijklmn"),
+            ([b"abcdefghijklmnop"], "abcd\n[... 6 bytes truncated ...]\nklmnop"),
+            ([b"ab", b"cd", b"ef", b"gh", b"ij", b"kl", b"mn"], "abcd\n[... 4 bytes truncated ...]\nijklmn"),
+            ([b"abcd", b"", b"efg"], "abcdefg"),
+        ],
+        ids=["empty", "head-only", "exactly-full", "whole-chunk-dropped", "one-big-chunk", "many-small-chunks", "empty-chunk"],
+    )
+    def test_keeps_head_and_tail(self, sandbox_tools: ModuleType, chunks: list[bytes], expected: str) -> None:
+        """Output within max_bytes is returned whole; longer output says how much was cut."""
+        output = sandbox_tools._BoundedOutput(max_bytes=10, head_bytes=4)
+        for chunk in chunks:
+            output.append(chunk)
+        assert output.text() == expected
+
+    @pytest.mark.parametrize("split", [1, 2, 3, 4, 5], ids=lambda split: f"split-{split}")
+    def test_character_across_head_boundary_survives(self, sandbox_tools: ModuleType, split: int) -> None:
+        """A multi-byte character straddling the head boundary decodes whole when nothing was cut."""
+        data = "ab══".encode()
+        output = sandbox_tools._BoundedOutput(max_bytes=16, head_bytes=3)
+        output.append(data[:split])
+        output.append(data[split:])
+        assert output.text() == "ab══"
+
+
+@pytest.mark.skipif(shutil.which("sh") is None, reason="needs a POSIX shell")
+class TestWithCappedOutput:
+    """_with_capped_output's shell wrapper, run locally with small head and tail sizes."""
+
+    @pytest.fixture()
+    def run(self, sandbox_tools: ModuleType, monkeypatch: pytest.MonkeyPatch) -> _Run:
+        """Run a command through the wrapper with a 4-byte head and 8-byte tail; returns the CompletedProcess."""
+        monkeypatch.setattr(sandbox_tools, "_CAPTURED_OUTPUT_HEAD_BYTES", 4)
+        monkeypatch.setattr(sandbox_tools, "_CAPPED_OUTPUT_TAIL_BYTES", 8)
+
+        def run(command: str) -> subprocess.CompletedProcess[str]:
+            return subprocess.run(["sh", "-c", sandbox_tools._with_capped_output(command)], capture_output=True, text=True, check=False)
+
+        return run
+
+    @pytest.mark.parametrize(
+        ("command", "stdout", "stderr", "exit_code"),
+        [
+            ("printf 'short'", "short", "", 0),
+            ("printf '0123456789ab'", "0123456789ab", "", 0),
+            ("printf 'short'; printf 'oops' >&2; exit 3", "short", "oops", 3),
+        ],
+        ids=["short", "exactly-head-plus-tail", "stderr-and-status"],
+    )
+    def test_uncut_output_passes_through(self, run: _Run, sandbox_tools: ModuleType, command: str, stdout: str, stderr: str, exit_code: int) -> None:
+        """Output that fits comes back unchanged, with no truncation note or summary-lines appendix."""
+        result = run(command)
+        assert (result.stdout, result.stderr, result.returncode) == (stdout, stderr, exit_code)
+        assert sandbox_tools._SUMMARY_LINES_MARKER not in result.stdout
+
+    @pytest.mark.parametrize("stream", ["stdout", "stderr"])
+    def test_cut_output_keeps_head_tail_and_summary_lines(self, run: _Run, sandbox_tools: ModuleType, stream: str) -> None:
+        """A cut stream keeps its head and tail, and the cut summary lines follow stdout."""
+        redirect = "" if stream == "stdout" else " >&2"
+        result = run(f"printf 'HEAD\\nTOTAL 10 2 80%%\\nmiddle\\nTAIL123\\n'{redirect}")
+        body, marker, appendix = result.stdout.partition(f"\n{sandbox_tools._SUMMARY_LINES_MARKER}\n")
+        assert marker
+        assert appendix.strip() == "TOTAL 10 2 80%"
+        kept = body if stream == "stdout" else result.stderr
+        assert kept.startswith("HEAD\n[... truncated in the sandbox ...]\n")
+        assert kept.endswith("TAIL123\n")
+        assert "TOTAL" not in kept
+
+
+# ===================================================================
+# Report Files
+# ===================================================================
+
+
+class TestReportFiles:
+    """Coverage and Stryker numbers read from the JSON reports a branch run collects."""
+
+    _PYTEST_COV = "/app/repo/coverage.json"
+    _ISTANBUL = "/app/repo/coverage/coverage-summary.json"
+
+    @pytest.mark.parametrize(
+        ("files", "expected"),
+        [
+            ({}, None),
+            ({_PYTEST_COV: json.dumps({"totals": {"percent_covered": 87.5}}).encode()}, 87.5),
+            ({_ISTANBUL: json.dumps({"total": {"statements": {"pct": 66.7}}}).encode()}, 66.7),
+            (
+                {
+                    _PYTEST_COV: json.dumps({"totals": {"percent_covered": 87.5}}).encode(),
+                    _ISTANBUL: json.dumps({"total": {"statements": {"pct": 66.7}}}).encode(),
+                },
+                87.5,
+            ),
+            ({_PYTEST_COV: b"{not json", _ISTANBUL: json.dumps({"total": {"statements": {"pct": 66.7}}}).encode()}, 66.7),
+            ({_PYTEST_COV: json.dumps({"meta": {}}).encode()}, None),
+            ({_PYTEST_COV: b"[]"}, None),
+        ],
+        ids=["none", "pytest-cov", "istanbul", "pytest-cov-preferred", "unparsable-skipped", "wrong-shape", "not-an-object"],
+    )
+    def test_coverage_from_reports(self, sandbox_tools: ModuleType, files: dict[str, bytes], expected: float | None) -> None:
+        """The first parsable report wins; unparsable ones are skipped rather than raising."""
+        assert sandbox_tools._coverage_from_reports(files) == expected
+
+    @pytest.mark.parametrize(
+        ("report", "expected"),
+        [
+            (
+                {"files": {"a.js": {"mutants": [{"status": "Killed"}, {"status": "Survived"}]}, "b.js": {"mutants": [{"status": "Killed"}]}}},
+                {"Killed": 2, "Survived": 1},
+            ),
+            ({"files": {}}, {}),
+            ({"files": {"a.js": {"mutants": [{"id": "1"}]}}}, None),
+            ({"files": []}, None),
+            ({}, None),
+        ],
+        ids=["counts", "no-files", "mutant-without-status", "files-not-a-mapping", "no-files-key"],
+    )
+    def test_stryker_report_counts(self, sandbox_tools: ModuleType, report: dict[str, object], expected: dict[str, int] | None) -> None:
+        """Mutants are counted by status; a report of the wrong shape gives None."""
+        counts = sandbox_tools._stryker_report_counts(json.dumps(report).encode())
+        assert (dict(counts) if counts is not None else None) == expected
+
+    def test_stryker_report_unparsable(self, sandbox_tools: ModuleType) -> None:
+        """Bytes that aren't JSON give None."""
+        assert sandbox_tools._stryker_report_counts(b"\x00not json") is None
+
+
+# ===================================================================
+# Read-only Commands
+# ===================================================================
+
+
+class TestReadOnlyCommand:
+    """_RE_READ_ONLY_COMMAND.fullmatch decides whether run_command_on_branch can use a small sandbox."""
+
+    @pytest.mark.parametrize(
+        "command",
+        ["ls", "  ls -la", "cat README.md", "grep -rn 'def main' src", "find . -name '*.py'", "pip list", "wc -l a.py b.py", "echo $HOME"],
+    )
+    def test_read_only(self, sandbox_tools: ModuleType, command: str) -> None:
+        """Single inspection commands with plain arguments are read-only."""
+        assert sandbox_tools._RE_READ_ONLY_COMMAND.fullmatch(command)
+
+    @pytest.mark.parametrize(
+        "command",
+        [
+            "cat a; rm -rf /",
+            "ls && make",
+            "ls || make",
+            "cat a | sh",
+            "echo $(rm x)",
+            "echo `id`",
+            "ls\nrm x",
+            "ls &",
+            "python -c 'print(1)'",
+            "pytest",
+            "lsof",
+            "catalog",
+            "pip install -e .",
+        ],
+    )
+    def test_not_read_only(self, sandbox_tools: ModuleType, command: str) -> None:
+        """Chains, pipes, substitutions and other programs are not read-only."""
+        assert not sandbox_tools._RE_READ_ONLY_COMMAND.fullmatch(command)